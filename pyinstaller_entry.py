@@ -1,6 +1,11 @@
 from __future__ import annotations
 
-from body_metrics_tracker.gui.app import run
+from body_metrics_tracker import profiling
+
+profiling.start()
+
+with profiling.phase("import gui"):
+    from body_metrics_tracker.gui.app import run
 
 
 if __name__ == "__main__":
@@ -166,12 +166,24 @@ function corsHeaders(request) {
   const headers = new Headers();
   headers.set("Access-Control-Allow-Origin", origin || "*");
   headers.set("Vary", "Origin");
-  headers.set("Access-Control-Allow-Headers", "Authorization, Content-Type, X-Admin-Token, X-Admin-Device");
+  headers.set("Access-Control-Allow-Headers", "Authorization, Content-Type, Content-Encoding, X-Admin-Token, X-Admin-Device");
   headers.set("Access-Control-Allow-Methods", "GET,POST,OPTIONS");
   headers.set("Access-Control-Max-Age", "86400");
   return headers;
 }
 
+async function readJson(request) {
+  const encoding = (request.headers.get("Content-Encoding") || "identity").trim().toLowerCase();
+  if (encoding === "identity") {
+    return request.json();
+  }
+  if (encoding !== "gzip" && encoding !== "deflate") {
+    throw unsupportedMediaType("Unsupported content encoding");
+  }
+  const stream = request.body.pipeThrough(new DecompressionStream(encoding));
+  return new Response(stream).json();
+}
+
 function jsonResponse(payload, status = 200, extraHeaders) {
   const headers = new Headers(extraHeaders || {});
   headers.set("Content-Type", "application/json");
@@ -183,7 +195,7 @@ function jsonResponse(payload, status = 200, extraHeaders) {
 }
 
 async function handleRegister(request, env) {
-  const body = await request.json();
+  const body = await readJson(request);
   const userId = toText(body.user_id);
   const friendCode = toText(body.friend_code);
   const displayName = toText(body.display_name) || "User";
@@ -260,7 +272,7 @@ async function handleRegister(request, env) {
 }
 
 async function handleProfileUpdate(request, env, user) {
-  const body = await request.json();
+  const body = await readJson(request);
   const displayName = toText(body.display_name) || "User";
   const avatar = normalizeAvatar(body.avatar_b64);
   await env.DB.prepare(
@@ -290,7 +302,7 @@ async function handleProfileSettingsGet(env, user) {
 }
 
 async function handleProfileSettingsSet(request, env, user) {
-  const body = await request.json();
+  const body = await readJson(request);
   const settings = body?.settings;
   if (!settings || typeof settings !== "object") {
     throw badRequest("settings is required");
@@ -311,7 +323,7 @@ async function handleProfileSettingsSet(request, env, user) {
 }
 
 async function handleSendInvite(request, env, user) {
-  const body = await request.json();
+  const body = await readJson(request);
   const toCode = toText(body.to_code);
   if (!toCode) {
     throw badRequest("to_code is required");
@@ -346,7 +358,7 @@ async function handleSendInvite(request, env, user) {
 }
 
 async function handleAcceptInvite(request, env, user) {
-  const body = await request.json();
+  const body = await readJson(request);
   const fromCode = toText(body.from_code);
   if (!fromCode) {
     throw badRequest("from_code is required");
@@ -508,7 +520,7 @@ async function handleInbox(env, user) {
 }
 
 async function handleShareSettings(request, env, user) {
-  const body = await request.json();
+  const body = await readJson(request);
   const friendCode = toText(body.friend_code);
   if (!friendCode) {
     throw badRequest("friend_code is required");
@@ -533,7 +545,7 @@ async function handleShareSettings(request, env, user) {
 }
 
 async function handleHistoryPush(request, env, user) {
-  const body = await request.json();
+  const body = await readJson(request);
   const entries = Array.isArray(body.entries) ? body.entries : [];
   if (!entries.length) {
     return { status: "ok", count: 0 };
@@ -642,7 +654,7 @@ async function handleSelfHistoryFetch(request, env, user) {
 }
 
 async function handleRemoveFriend(request, env, user) {
-  const body = await request.json();
+  const body = await readJson(request);
   const friendCode = toText(body.friend_code);
   if (!friendCode) {
     throw badRequest("friend_code is required");
@@ -674,7 +686,7 @@ async function handleRemoveFriend(request, env, user) {
 }
 
 async function handleStatus(request, env, user) {
-  const body = await request.json();
+  const body = await readJson(request);
   const loggedToday = body.logged_today ? 1 : 0;
   const lastEntryDate = toText(body.last_entry_date);
   const weightKg = body.weight_kg ?? null;
@@ -689,7 +701,7 @@ async function handleStatus(request, env, user) {
 }
 
 async function handleReminder(request, env, user) {
-  const body = await request.json();
+  const body = await readJson(request);
   const toCode = toText(body.to_code);
   const message = toText(body.message);
   if (!toCode || !message) {
@@ -742,7 +754,7 @@ async function handleReminderScheduleList(env, user) {
 }
 
 async function handleReminderScheduleUpsert(request, env, user) {
-  const body = await request.json();
+  const body = await readJson(request);
   const id = toText(body.id) || crypto.randomUUID();
   const message = toText(body.message);
   const time = normalizeTime(toText(body.time));
@@ -797,7 +809,7 @@ async function handleReminderScheduleUpsert(request, env, user) {
 }
 
 async function handleReminderScheduleDelete(request, env, user) {
-  const body = await request.json();
+  const body = await readJson(request);
   const id = toText(body.id);
   if (!id) {
     throw badRequest("id is required");
@@ -854,7 +866,7 @@ function handleVapidPublic(env) {
 }
 
 async function handlePushSubscribe(request, env, user) {
-  const body = await request.json();
+  const body = await readJson(request);
   const endpoint = toText(body.endpoint);
   const p256dh = toText(body.p256dh);
   const auth = toText(body.auth);
@@ -881,7 +893,7 @@ async function handlePushSubscribe(request, env, user) {
 }
 
 async function handlePushUnsubscribe(request, env, user) {
-  const body = await request.json();
+  const body = await readJson(request);
   const endpoint = toText(body.endpoint);
   if (!endpoint) {
     throw badRequest("endpoint is required");
@@ -905,7 +917,7 @@ async function handlePushTest(env, user) {
 }
 
 async function handlePushPending(request, env) {
-  const body = await request.json();
+  const body = await readJson(request);
   const endpoint = toText(body.endpoint);
   if (!endpoint) {
     throw badRequest("endpoint is required");
@@ -1131,7 +1143,7 @@ async function handleAdminDelete(env, userId) {
 }
 
 async function handleAdminMerge(request, env, targetId) {
-  const body = await request.json();
+  const body = await readJson(request);
   const sourceId = toText(body.source_user_id);
   if (!sourceId) {
     throw badRequest("source_user_id is required");
@@ -1433,7 +1445,7 @@ function chooseLatestStatus(targetStatus, sourceStatus) {
 }
 
 async function handleRecoveryClaim(request, env) {
-  const body = await request.json();
+  const body = await readJson(request);
   const code = normalizeRecoveryCode(toText(body.code));
   if (!code) {
     throw badRequest("recovery code required");
@@ -2068,3 +2080,7 @@ function unauthorized(message) {
 function notFound(message) {
   return Object.assign(new Error(message), { status: 404 });
 }
+
+function unsupportedMediaType(message) {
+  return Object.assign(new Error(message), { status: 415 });
+}
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+from . import profiling
+
 
 def main() -> None:
+    profiling.start()
     try:
-        from .gui.app import main as gui_main
+        with profiling.phase("import gui"):
+            from .gui.app import main as gui_main
     except ImportError as exc:
         raise SystemExit(
             "PySide6 is required to run the GUI. Install dependencies with: pip install -e .[dev]"
@@ -5,3 +5,16 @@ import os
 
 RELAY_URL = "https://body-metrics-relay.bodymetricstracker.workers.dev"
 DEFAULT_RELAY_URL = os.getenv("BMT_RELAY_URL", RELAY_URL).strip()
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, "").strip() or default)
+    except ValueError:
+        return default
+
+
+SAVE_DELAY_MS = max(0, _env_int("BMT_SAVE_DELAY_MS", 500))
+AVATAR_CACHE_BYTES = max(0, _env_int("BMT_AVATAR_CACHE_KB", 4096)) * 1024
+STARTUP_BUDGET_MS = max(0, _env_int("BMT_STARTUP_BUDGET_MS", 750))
+PROFILE_STARTUP = _env_int("BMT_PROFILE_STARTUP", 0) > 0
@@ -1,5 +1,13 @@
-from .aggregation import WeeklyDelta, WeeklySummary, compute_weekly_deltas, compute_weekly_summaries
+from .aggregation import (
+    AggregateEngine,
+    MonthlySummary,
+    WeeklyDelta,
+    WeeklySummary,
+    compute_weekly_deltas,
+    compute_weekly_summaries,
+)
 from .models import MeasurementEntry, UserProfile, WeightUnit, LengthUnit
+from .timeline import EntryTimeline
 from .units import (
     cm_to_in,
     in_to_cm,
@@ -12,10 +20,13 @@ from .units import (
 )
 
 __all__ = [
+    "AggregateEngine",
+    "MonthlySummary",
     "WeeklyDelta",
     "WeeklySummary",
     "compute_weekly_deltas",
     "compute_weekly_summaries",
+    "EntryTimeline",
     "MeasurementEntry",
     "UserProfile",
     "WeightUnit",
@@ -1,11 +1,17 @@
 from __future__ import annotations
 
+from bisect import bisect_left, insort
 from dataclasses import dataclass
 from datetime import date, timedelta
 from statistics import fmean
 from typing import Iterable, List, Sequence
+from uuid import UUID
 
-from .models import MeasurementEntry
+from .models import MeasurementEntry, SharedEntry
+
+WEIGHT = "weight_kg"
+WAIST = "waist_cm"
+METRICS = (WEIGHT, WAIST)
 
 
 @dataclass(frozen=True)
@@ -23,6 +29,26 @@ class WeeklyDelta:
     delta_waist_cm: float | None
 
 
+@dataclass(frozen=True)
+class MonthlySummary:
+    month_start_date_local: date
+    avg_weight_kg: float
+    avg_waist_cm: float | None
+    min_weight_kg: float
+    max_weight_kg: float
+    count_entries: int
+
+
+@dataclass(frozen=True)
+class PeriodStats:
+    period_start: date
+    count: int
+    total: float
+    minimum: float
+    maximum: float
+    mean: float
+
+
 def week_start_date(local_date: date) -> date:
     days_since_sunday = (local_date.weekday() + 1) % 7
     return local_date - timedelta(days=days_since_sunday)
@@ -93,3 +119,177 @@ def compute_weekly_deltas(summaries: Sequence[WeeklySummary]) -> List[WeeklyDelt
         )
 
     return deltas
+
+
+def month_start_date(local_date: date) -> date:
+    return local_date.replace(day=1)
+
+
+class _Bucket:
+    __slots__ = ("values", "stats")
+
+    def __init__(self) -> None:
+        self.values: dict[UUID, float] = {}
+        self.stats: PeriodStats | None = None
+
+
+class _PeriodSeries:
+    def __init__(self) -> None:
+        self._buckets: dict[date, _Bucket] = {}
+        self._starts: list[date] = []
+
+    def add(self, start: date, entry_id: UUID, value: float) -> None:
+        bucket = self._buckets.get(start)
+        if bucket is None:
+            bucket = self._buckets[start] = _Bucket()
+            insort(self._starts, start)
+        bucket.values[entry_id] = value
+        bucket.stats = None
+
+    def discard(self, start: date, entry_id: UUID) -> None:
+        bucket = self._buckets.get(start)
+        if bucket is None or bucket.values.pop(entry_id, None) is None:
+            return
+        bucket.stats = None
+        if not bucket.values:
+            del self._buckets[start]
+            del self._starts[bisect_left(self._starts, start)]
+
+    def get(self, start: date) -> PeriodStats | None:
+        bucket = self._buckets.get(start)
+        if bucket is None:
+            return None
+        if bucket.stats is None:
+            values = bucket.values.values()
+            bucket.stats = PeriodStats(
+                period_start=start,
+                count=len(values),
+                total=sum(values),
+                minimum=min(values),
+                maximum=max(values),
+                mean=fmean(values),
+            )
+        return bucket.stats
+
+    def starts(self, since: date | None = None) -> list[date]:
+        if since is None:
+            return list(self._starts)
+        return self._starts[bisect_left(self._starts, since) :]
+
+    def last_before(self, start: date) -> date | None:
+        index = bisect_left(self._starts, start)
+        return self._starts[index - 1] if index else None
+
+
+class AggregateEngine:
+    def __init__(self, entries: Iterable[MeasurementEntry | SharedEntry] = ()) -> None:
+        self._periods: dict[UUID, tuple[date, date]] = {}
+        self._weeks = {metric: _PeriodSeries() for metric in METRICS}
+        self._months = {metric: _PeriodSeries() for metric in METRICS}
+        for entry in entries:
+            self.add(entry)
+
+    def __len__(self) -> int:
+        return len(self._periods)
+
+    def add(self, entry: MeasurementEntry | SharedEntry) -> None:
+        self.discard(entry.entry_id)
+        if entry.is_deleted or entry.date_local is None:
+            return
+        week = week_start_date(entry.date_local)
+        month = month_start_date(entry.date_local)
+        for metric in METRICS:
+            value = getattr(entry, metric)
+            if value is None:
+                continue
+            self._weeks[metric].add(week, entry.entry_id, float(value))
+            self._months[metric].add(month, entry.entry_id, float(value))
+        self._periods[entry.entry_id] = (week, month)
+
+    def update(self, entry: MeasurementEntry | SharedEntry) -> None:
+        self.add(entry)
+
+    def discard(self, entry_id: UUID) -> None:
+        periods = self._periods.pop(entry_id, None)
+        if periods is None:
+            return
+        week, month = periods
+        for metric in METRICS:
+            self._weeks[metric].discard(week, entry_id)
+            self._months[metric].discard(month, entry_id)
+
+    def week(self, week_start: date, metric: str = WEIGHT) -> PeriodStats | None:
+        return self._weeks[metric].get(week_start)
+
+    def weeks(self, metric: str = WEIGHT, since: date | None = None) -> list[PeriodStats]:
+        series = self._weeks[metric]
+        start = week_start_date(since) if since is not None else None
+        return [series.get(week) for week in series.starts(start)]
+
+    def month(self, month_start: date, metric: str = WEIGHT) -> PeriodStats | None:
+        return self._months[metric].get(month_start)
+
+    def months(self, metric: str = WEIGHT, since: date | None = None) -> list[PeriodStats]:
+        series = self._months[metric]
+        start = month_start_date(since) if since is not None else None
+        return [series.get(month) for month in series.starts(start)]
+
+    def weekly_summary(self, week_start: date) -> WeeklySummary | None:
+        weight = self._weeks[WEIGHT].get(week_start)
+        if weight is None:
+            return None
+        waist = self._weeks[WAIST].get(week_start)
+        return WeeklySummary(
+            week_start_date_local=week_start,
+            avg_weight_kg=weight.mean,
+            avg_waist_cm=waist.mean if waist else None,
+            count_entries=weight.count,
+        )
+
+    def weekly_summaries(self, since: date | None = None) -> List[WeeklySummary]:
+        start = week_start_date(since) if since is not None else None
+        return [self.weekly_summary(week) for week in self._weeks[WEIGHT].starts(start)]
+
+    def previous_week(self, week_start: date) -> date | None:
+        return self._weeks[WEIGHT].last_before(week_start)
+
+    def weekly_delta(self, week_start: date) -> WeeklyDelta | None:
+        summary = self.weekly_summary(week_start)
+        if summary is None:
+            return None
+        prev = self.weekly_summary(week_start - timedelta(days=7))
+        if prev is None:
+            return WeeklyDelta(week_start_date_local=week_start, delta_weight_kg=None, delta_waist_cm=None)
+        return WeeklyDelta(
+            week_start_date_local=week_start,
+            delta_weight_kg=summary.avg_weight_kg - prev.avg_weight_kg,
+            delta_waist_cm=(
+                None
+                if summary.avg_waist_cm is None or prev.avg_waist_cm is None
+                else summary.avg_waist_cm - prev.avg_waist_cm
+            ),
+        )
+
+    def weekly_deltas(self) -> List[WeeklyDelta]:
+        # Imported here: analytics builds on this module and pulls in NumPy, which startup avoids.
+        from .analytics import summary_deltas
+
+        return summary_deltas(self.weekly_summaries())
+
+    def monthly_summary(self, month_start: date) -> MonthlySummary | None:
+        weight = self._months[WEIGHT].get(month_start)
+        if weight is None:
+            return None
+        waist = self._months[WAIST].get(month_start)
+        return MonthlySummary(
+            month_start_date_local=month_start,
+            avg_weight_kg=weight.mean,
+            avg_waist_cm=waist.mean if waist else None,
+            min_weight_kg=weight.minimum,
+            max_weight_kg=weight.maximum,
+            count_entries=weight.count,
+        )
+
+    def monthly_summaries(self, since: date | None = None) -> List[MonthlySummary]:
+        start = month_start_date(since) if since is not None else None
+        return [self.monthly_summary(month) for month in self._months[WEIGHT].starts(start)]
@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date
+from math import fsum
+from typing import Iterable, List, Sequence
+
+import numpy as np
+
+from .aggregation import WAIST, WEIGHT, MonthlySummary, WeeklyDelta, WeeklySummary
+from .models import LengthUnit, MeasurementEntry, SharedEntry, WeightUnit
+from .units import CM_PER_IN, LB_PER_KG
+
+WEEK = "week"
+MONTH = "month"
+_UNIX_EPOCH_ORDINAL = 719163
+
+
+@dataclass(frozen=True)
+class EntryColumns:
+    timestamps: np.ndarray
+    day_ordinals: np.ndarray
+    weight_kg: np.ndarray
+    waist_cm: np.ndarray
+    deleted: np.ndarray
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[MeasurementEntry | SharedEntry]) -> "EntryColumns":
+        rows = list(entries)
+        return cls(
+            timestamps=np.fromiter(
+                (entry.measured_at.timestamp() for entry in rows),
+                dtype=np.float64,
+                count=len(rows),
+            ),
+            day_ordinals=np.fromiter(
+                (_day_ordinal(entry) for entry in rows),
+                dtype=np.int64,
+                count=len(rows),
+            ),
+            weight_kg=np.fromiter(
+                (np.nan if entry.weight_kg is None else entry.weight_kg for entry in rows),
+                dtype=np.float64,
+                count=len(rows),
+            ),
+            waist_cm=np.fromiter(
+                (np.nan if entry.waist_cm is None else entry.waist_cm for entry in rows),
+                dtype=np.float64,
+                count=len(rows),
+            ),
+            deleted=np.fromiter((bool(entry.is_deleted) for entry in rows), dtype=bool, count=len(rows)),
+        )
+
+    def __len__(self) -> int:
+        return int(self.timestamps.shape[0])
+
+    def metric(self, name: str) -> np.ndarray:
+        if name == WEIGHT:
+            return self.weight_kg
+        if name == WAIST:
+            return self.waist_cm
+        raise ValueError(f"Unknown metric: {name}")
+
+    def present(self, name: str) -> np.ndarray:
+        return ~self.deleted & ~np.isnan(self.metric(name)) & (self.day_ordinals > 0)
+
+    def live(self) -> "EntryColumns":
+        return self.select(~self.deleted)
+
+    def select(self, mask: np.ndarray) -> "EntryColumns":
+        return EntryColumns(
+            timestamps=self.timestamps[mask],
+            day_ordinals=self.day_ordinals[mask],
+            weight_kg=self.weight_kg[mask],
+            waist_cm=self.waist_cm[mask],
+            deleted=self.deleted[mask],
+        )
+
+    def extended(self, entries: Iterable[MeasurementEntry | SharedEntry]) -> "EntryColumns":
+        tail = EntryColumns.from_entries(entries)
+        return EntryColumns(
+            timestamps=np.concatenate((self.timestamps, tail.timestamps)),
+            day_ordinals=np.concatenate((self.day_ordinals, tail.day_ordinals)),
+            weight_kg=np.concatenate((self.weight_kg, tail.weight_kg)),
+            waist_cm=np.concatenate((self.waist_cm, tail.waist_cm)),
+            deleted=np.concatenate((self.deleted, tail.deleted)),
+        )
+
+    def sorted(self) -> "EntryColumns":
+        return self.select(np.argsort(self.timestamps, kind="stable"))
+
+    def since(self, start_ordinal: int | None) -> "EntryColumns":
+        if start_ordinal is None:
+            return self
+        return self.select(self.day_ordinals >= start_ordinal)
+
+
+@dataclass(frozen=True)
+class PeriodColumns:
+    starts: np.ndarray
+    counts: np.ndarray
+    totals: np.ndarray
+    minimum: np.ndarray
+    maximum: np.ndarray
+    mean: np.ndarray
+
+    def __len__(self) -> int:
+        return int(self.starts.shape[0])
+
+    def start_dates(self) -> list[date]:
+        return [_ordinal_date(value) for value in self.starts.tolist()]
+
+
+def week_start_ordinals(day_ordinals: np.ndarray) -> np.ndarray:
+    return day_ordinals - day_ordinals % 7
+
+
+def month_start_ordinals(day_ordinals: np.ndarray) -> np.ndarray:
+    days = (day_ordinals - _UNIX_EPOCH_ORDINAL).astype("datetime64[D]")
+    months = days.astype("datetime64[M]").astype("datetime64[D]")
+    return months.astype(np.int64) + _UNIX_EPOCH_ORDINAL
+
+
+def period_stats(columns: EntryColumns, metric: str = WEIGHT, period: str = WEEK) -> PeriodColumns:
+    mask = columns.present(metric)
+    values = columns.metric(metric)[mask]
+    days = columns.day_ordinals[mask]
+    if period == WEEK:
+        keys = week_start_ordinals(days)
+    elif period == MONTH:
+        keys = month_start_ordinals(days)
+    else:
+        raise ValueError(f"Unknown period: {period}")
+    if values.size == 0:
+        empty = np.empty(0, dtype=np.float64)
+        return PeriodColumns(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), empty, empty, empty, empty)
+    starts, inverse = np.unique(keys, return_inverse=True)
+    counts = np.bincount(inverse)
+    order = np.argsort(inverse, kind="stable")
+    grouped = values[order]
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    totals = np.bincount(inverse, weights=values)
+    minimum = np.minimum.reduceat(grouped, offsets)
+    maximum = np.maximum.reduceat(grouped, offsets)
+    # fsum per bucket (not per entry) keeps means bit-identical to statistics.fmean.
+    mean = np.array([fsum(chunk.tolist()) / chunk.size for chunk in np.split(grouped, offsets[1:])])
+    return PeriodColumns(starts, counts, totals, minimum, maximum, mean)
+
+
+def weekly_summaries(columns: EntryColumns) -> List[WeeklySummary]:
+    weight = period_stats(columns, WEIGHT, WEEK)
+    waist = period_stats(columns, WAIST, WEEK)
+    waist_mean = _align(weight.starts, waist)
+    return [
+        WeeklySummary(
+            week_start_date_local=_ordinal_date(start),
+            avg_weight_kg=avg_weight,
+            avg_waist_cm=None if avg_waist != avg_waist else avg_waist,
+            count_entries=count,
+        )
+        for start, avg_weight, avg_waist, count in zip(
+            weight.starts.tolist(), weight.mean.tolist(), waist_mean.tolist(), weight.counts.tolist()
+        )
+    ]
+
+
+def weekly_deltas(columns: EntryColumns) -> List[WeeklyDelta]:
+    weight = period_stats(columns, WEIGHT, WEEK)
+    waist_mean = _align(weight.starts, period_stats(columns, WAIST, WEEK))
+    return _deltas(weight.starts, weight.mean, waist_mean)
+
+
+def summary_deltas(summaries: Sequence[WeeklySummary]) -> List[WeeklyDelta]:
+    starts = np.fromiter(
+        (summary.week_start_date_local.toordinal() for summary in summaries), dtype=np.int64, count=len(summaries)
+    )
+    weight_mean = np.fromiter((summary.avg_weight_kg for summary in summaries), dtype=np.float64, count=len(summaries))
+    waist_mean = np.fromiter(
+        (np.nan if summary.avg_waist_cm is None else summary.avg_waist_cm for summary in summaries),
+        dtype=np.float64,
+        count=len(summaries),
+    )
+    return _deltas(starts, weight_mean, waist_mean)
+
+
+def monthly_summaries(columns: EntryColumns) -> List[MonthlySummary]:
+    weight = period_stats(columns, WEIGHT, MONTH)
+    waist_mean = _align(weight.starts, period_stats(columns, WAIST, MONTH))
+    return [
+        MonthlySummary(
+            month_start_date_local=_ordinal_date(start),
+            avg_weight_kg=avg_weight,
+            avg_waist_cm=None if avg_waist != avg_waist else avg_waist,
+            min_weight_kg=low,
+            max_weight_kg=high,
+            count_entries=count,
+        )
+        for start, avg_weight, avg_waist, low, high, count in zip(
+            weight.starts.tolist(),
+            weight.mean.tolist(),
+            waist_mean.tolist(),
+            weight.minimum.tolist(),
+            weight.maximum.tolist(),
+            weight.counts.tolist(),
+        )
+    ]
+
+
+def weights_from_kg(values_kg: np.ndarray, unit: WeightUnit) -> np.ndarray:
+    if unit == WeightUnit.KG:
+        return values_kg
+    if unit == WeightUnit.LB:
+        return values_kg * LB_PER_KG
+    raise ValueError(f"Unsupported weight unit: {unit}")
+
+
+def waists_from_cm(values_cm: np.ndarray, unit: LengthUnit) -> np.ndarray:
+    if unit == LengthUnit.CM:
+        return values_cm
+    if unit == LengthUnit.IN:
+        return values_cm / CM_PER_IN
+    raise ValueError(f"Unsupported waist unit: {unit}")
+
+
+def within_goal_band(values: np.ndarray, goal: float | None, band: float | None) -> np.ndarray:
+    if goal is None:
+        return np.zeros(values.shape, dtype=bool)
+    return np.abs(values - goal) <= (band or 0.0)
+
+
+def nearest_index(sorted_values: np.ndarray, target: float) -> int:
+    count = int(sorted_values.shape[0])
+    if count == 0:
+        return -1
+    index = int(np.searchsorted(sorted_values, target))
+    if index == count:
+        return count - 1
+    if index > 0 and target - sorted_values[index - 1] <= sorted_values[index] - target:
+        return index - 1
+    return index
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    count = int(x.shape[0])
+    if threshold >= count or threshold < 3:
+        return np.arange(count)
+    edges = np.linspace(1, count - 1, threshold - 1).astype(np.int64)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = count - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else count
+        next_start = end if bucket + 2 < len(edges) else count - 1
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        area = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        indices[bucket + 1] = previous
+    return indices
+
+
+def downsample(x: np.ndarray, y: np.ndarray, threshold: int) -> tuple[np.ndarray, np.ndarray]:
+    indices = lttb_indices(x, y, threshold)
+    if indices.shape[0] == x.shape[0]:
+        return x, y
+    return x[indices], y[indices]
+
+
+def _deltas(starts: np.ndarray, weight_mean: np.ndarray, waist_mean: np.ndarray) -> List[WeeklyDelta]:
+    consecutive = np.zeros(starts.shape[0], dtype=bool)
+    consecutive[1:] = np.diff(starts) == 7
+    delta_weight = np.full(starts.shape[0], np.nan)
+    delta_weight[1:] = weight_mean[1:] - weight_mean[:-1]
+    delta_waist = np.full(starts.shape[0], np.nan)
+    delta_waist[1:] = waist_mean[1:] - waist_mean[:-1]
+    delta_weight[~consecutive] = np.nan
+    delta_waist[~consecutive] = np.nan
+    return [
+        WeeklyDelta(
+            week_start_date_local=_ordinal_date(start),
+            delta_weight_kg=None if dw != dw else dw,
+            delta_waist_cm=None if dc != dc else dc,
+        )
+        for start, dw, dc in zip(starts.tolist(), delta_weight.tolist(), delta_waist.tolist())
+    ]
+
+
+def _align(starts: np.ndarray, stats: PeriodColumns) -> np.ndarray:
+    aligned = np.full(starts.shape[0], np.nan)
+    if len(stats) == 0 or starts.size == 0:
+        return aligned
+    index = np.searchsorted(stats.starts, starts)
+    index = np.minimum(index, len(stats) - 1)
+    hit = stats.starts[index] == starts
+    aligned[hit] = stats.mean[index[hit]]
+    return aligned
+
+
+def _day_ordinal(entry: MeasurementEntry | SharedEntry) -> int:
+    return entry.date_local.toordinal() if entry.date_local is not None else 0
+
+
+def _ordinal_date(value: int) -> date:
+    return date.fromordinal(int(value))
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from typing import Sequence
+
+import numpy as np
+
+POINTS = "points"
+DAYS = "days"
+EWMA = "ewma"
+SECONDS_PER_DAY = 86400.0
+
+
+@dataclass(frozen=True)
+class SmoothingSpec:
+    kind: str = POINTS
+    size: float = 7
+
+    @property
+    def label(self) -> str:
+        size = int(self.size) if float(self.size).is_integer() else self.size
+        if self.kind == POINTS:
+            return f"{size} points"
+        if self.kind == DAYS:
+            return f"{size} days"
+        if self.kind == EWMA:
+            return f"EWMA {size}"
+        raise ValueError(f"Unknown smoothing kind: {self.kind}")
+
+
+def moving_average(values: Sequence[float] | np.ndarray, window: int) -> np.ndarray:
+    data = np.asarray(values, dtype=np.float64)
+    if window < 1 or data.size < window:
+        return np.empty(0, dtype=np.float64)
+    sums = np.cumsum(np.concatenate(([0.0], data)))
+    return (sums[window:] - sums[:-window]) / window
+
+
+def ewma(values: Sequence[float] | np.ndarray, span: float) -> np.ndarray:
+    data = np.asarray(values, dtype=np.float64)
+    result = np.empty_like(data)
+    state = ExponentialMean(span)
+    for index, value in enumerate(data.tolist()):
+        result[index] = state.push(value)
+    return result
+
+
+def time_window_average(
+    timestamps: Sequence[float] | np.ndarray,
+    values: Sequence[float] | np.ndarray,
+    seconds: float,
+) -> np.ndarray:
+    times = np.asarray(timestamps, dtype=np.float64)
+    data = np.asarray(values, dtype=np.float64)
+    if data.size == 0:
+        return np.empty(0, dtype=np.float64)
+    sums = np.cumsum(np.concatenate(([0.0], data)))
+    starts = np.searchsorted(times, times - seconds, side="right")
+    ends = np.arange(1, data.size + 1)
+    return (sums[ends] - sums[starts]) / (ends - starts)
+
+
+def smooth(
+    timestamps: Sequence[float] | np.ndarray,
+    values: Sequence[float] | np.ndarray,
+    spec: SmoothingSpec,
+) -> tuple[np.ndarray, np.ndarray]:
+    times = np.asarray(timestamps, dtype=np.float64)
+    if spec.kind == POINTS:
+        window = int(spec.size)
+        smoothed = moving_average(values, window)
+        return times[window - 1 :] if smoothed.size else smoothed, smoothed
+    if spec.kind == DAYS:
+        return times, time_window_average(times, values, spec.size * SECONDS_PER_DAY)
+    if spec.kind == EWMA:
+        return times, ewma(values, spec.size)
+    raise ValueError(f"Unknown smoothing kind: {spec.kind}")
+
+
+class RollingMean:
+    def __init__(self, window: int) -> None:
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        self.window = window
+        self._values: deque[float] = deque()
+        self._total = 0.0
+
+    def push(self, value: float) -> float | None:
+        self._values.append(value)
+        self._total += value
+        if len(self._values) > self.window:
+            self._total -= self._values.popleft()
+        if len(self._values) < self.window:
+            return None
+        return self._total / self.window
+
+
+class ExponentialMean:
+    def __init__(self, span: float) -> None:
+        if span < 1:
+            raise ValueError("span must be at least 1")
+        self.alpha = 2.0 / (span + 1.0)
+        self.value: float | None = None
+
+    def push(self, value: float) -> float:
+        if self.value is None:
+            self.value = value
+        else:
+            self.value += self.alpha * (value - self.value)
+        return self.value
+
+
+class TimeWindowMean:
+    def __init__(self, seconds: float) -> None:
+        self.seconds = seconds
+        self._points: deque[tuple[float, float]] = deque()
+        self._total = 0.0
+
+    def push(self, timestamp: float, value: float) -> float:
+        if self._points and timestamp < self._points[-1][0]:
+            raise ValueError("timestamps must be non-decreasing")
+        self._points.append((timestamp, value))
+        self._total += value
+        cutoff = timestamp - self.seconds
+        while self._points[0][0] <= cutoff:
+            self._total -= self._points.popleft()[1]
+        return self._total / len(self._points)
+
+
+class Smoother:
+    def __init__(self, spec: SmoothingSpec) -> None:
+        self.spec = spec
+        self.timestamps = np.empty(0, dtype=np.float64)
+        self.values = np.empty(0, dtype=np.float64)
+        if spec.kind == POINTS:
+            self._state: RollingMean | TimeWindowMean | ExponentialMean = RollingMean(int(spec.size))
+        elif spec.kind == DAYS:
+            self._state = TimeWindowMean(spec.size * SECONDS_PER_DAY)
+        elif spec.kind == EWMA:
+            self._state = ExponentialMean(spec.size)
+        else:
+            raise ValueError(f"Unknown smoothing kind: {spec.kind}")
+
+    @classmethod
+    def over(
+        cls,
+        timestamps: Sequence[float] | np.ndarray,
+        values: Sequence[float] | np.ndarray,
+        spec: SmoothingSpec,
+    ) -> "Smoother":
+        smoother = cls(spec)
+        times = np.asarray(timestamps, dtype=np.float64)
+        data = np.asarray(values, dtype=np.float64)
+        smoother.timestamps, smoother.values = smooth(times, data, spec)
+        smoother._prime(times, data)
+        return smoother
+
+    def append(self, timestamps: Sequence[float] | np.ndarray, values: Sequence[float] | np.ndarray) -> None:
+        times: list[float] = []
+        means: list[float] = []
+        for timestamp, value in zip(np.asarray(timestamps, dtype=np.float64).tolist(), np.asarray(values).tolist()):
+            mean = self._push(timestamp, value)
+            if mean is not None:
+                times.append(timestamp)
+                means.append(mean)
+        if means:
+            self.timestamps = np.concatenate((self.timestamps, times))
+            self.values = np.concatenate((self.values, means))
+
+    def _push(self, timestamp: float, value: float) -> float | None:
+        if isinstance(self._state, TimeWindowMean):
+            return self._state.push(timestamp, value)
+        return self._state.push(value)
+
+    def _prime(self, times: np.ndarray, data: np.ndarray) -> None:
+        # Only the tail that can still fall inside a window is replayed into the running state.
+        if not data.size:
+            return
+        if isinstance(self._state, RollingMean):
+            for value in data[max(0, data.size - self._state.window + 1) :].tolist():
+                self._state.push(value)
+        elif isinstance(self._state, TimeWindowMean):
+            start = int(np.searchsorted(times, times[-1] - self._state.seconds, side="right"))
+            for timestamp, value in zip(times[start:].tolist(), data[start:].tolist()):
+                self._state.push(timestamp, value)
+        else:
+            self._state.value = float(self.values[-1])
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Generic, Iterable, Iterator, Protocol, TypeVar
+from uuid import UUID
+
+# Entries carry their own UTC offset, so a local calendar day can start up to
+# 14 hours either side of midnight UTC.
+_MAX_UTC_OFFSET = timedelta(hours=14)
+
+
+class TimedEntry(Protocol):
+    entry_id: UUID
+    measured_at: datetime
+    is_deleted: bool
+
+
+E = TypeVar("E", bound=TimedEntry)
+
+
+class EntryTimeline(Generic[E]):
+    def __init__(self, entries: Iterable[E] = ()) -> None:
+        by_id = {entry.entry_id: entry for entry in entries}
+        live = sorted(
+            (entry for entry in by_id.values() if not entry.is_deleted),
+            key=lambda entry: (entry.measured_at, entry.entry_id),
+        )
+        self._items: list[E] = live
+        self._keys: list[tuple[datetime, UUID]] = [(entry.measured_at, entry.entry_id) for entry in live]
+        self._key_by_id: dict[UUID, tuple[datetime, UUID]] = {key[1]: key for key in self._keys}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[E]:
+        return iter(self._items)
+
+    def __reversed__(self) -> Iterator[E]:
+        return reversed(self._items)
+
+    def __contains__(self, entry_id: object) -> bool:
+        return entry_id in self._key_by_id
+
+    def add(self, entry: E) -> None:
+        self.discard(entry.entry_id)
+        if entry.is_deleted:
+            return
+        key = (entry.measured_at, entry.entry_id)
+        index = bisect_right(self._keys, key)
+        self._keys.insert(index, key)
+        self._items.insert(index, entry)
+        self._key_by_id[entry.entry_id] = key
+
+    def update(self, entry: E) -> None:
+        self.add(entry)
+
+    def discard(self, entry_id: UUID) -> bool:
+        key = self._key_by_id.pop(entry_id, None)
+        if key is None:
+            return False
+        index = bisect_left(self._keys, key)
+        del self._keys[index]
+        del self._items[index]
+        return True
+
+    def latest(self) -> E | None:
+        return self._items[-1] if self._items else None
+
+    def earliest(self) -> E | None:
+        return self._items[0] if self._items else None
+
+    def range(self, start: datetime | None = None, end: datetime | None = None) -> list[E]:
+        lo = bisect_left(self._keys, (start,)) if start is not None else 0
+        hi = bisect_left(self._keys, (end,)) if end is not None else len(self._keys)
+        return self._items[lo:hi]
+
+    def between_dates(self, start: date | None = None, end: date | None = None) -> list[E]:
+        lower = _day_start(start) - _MAX_UTC_OFFSET if start is not None else None
+        upper = _day_start(end + timedelta(days=1)) + _MAX_UTC_OFFSET if end is not None else None
+        candidates = self.range(lower, upper)
+        if start is None and end is None:
+            return candidates
+        return [
+            entry
+            for entry in candidates
+            if (start is None or entry.measured_at.date() >= start)
+            and (end is None or entry.measured_at.date() <= end)
+        ]
+
+    def on_date(self, day: date) -> list[E]:
+        return self.between_dates(day, day)
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
@@ -1,29 +1,46 @@
 from __future__ import annotations
 
 import sys
+import time
 
 from PySide6.QtWidgets import QApplication
 
-from .state import load_or_create_state
+from .state import default_store_path, load_or_create_state
 from .theme import apply_app_theme
 from .window import MainWindow
+from .. import profiling
+from ..relay import close_connections
 from ..resources import load_app_icon
+from ..storage import StorageError
 
 
 def run() -> int:
-    app = QApplication(sys.argv)
-    icon = load_app_icon()
-    if icon is not None:
-        app.setWindowIcon(icon)
-    apply_app_theme(app)
-    state = load_or_create_state()
+    profiling.start()
+    with profiling.phase("qapplication"):
+        app = QApplication(sys.argv)
+        icon = load_app_icon()
+        if icon is not None:
+            app.setWindowIcon(icon)
+        apply_app_theme(app)
+    with profiling.phase("load_or_create_state"):
+        state = load_or_create_state()
     if state is None:
+        profiling.finish(default_store_path().parent)
         return 0
-    state.bootstrap_admin_from_env()
-    apply_app_theme(app, accent_color=state.profile.accent_color, dark_mode=state.profile.dark_mode)
-    window = MainWindow(state)
-    window.show()
-    return app.exec()
+    started_at = time.perf_counter()
+    with profiling.phase("main_window"):
+        state.bootstrap_admin_from_env()
+        apply_app_theme(app, accent_color=state.profile.accent_color, dark_mode=state.profile.dark_mode)
+        window = MainWindow(state, started_at=started_at)
+        window.show()
+    try:
+        return app.exec()
+    finally:
+        try:
+            state.close(timeout=10)
+        except StorageError:
+            pass
+        close_connections()
 
 
 def main() -> None:
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import hashlib
+from collections import OrderedDict
+
+from PySide6.QtCore import QByteArray, Qt
+from PySide6.QtGui import QIcon, QPixmap
+
+from ..config import AVATAR_CACHE_BYTES
+
+ENTRY_OVERHEAD_BYTES = 64
+
+
+class AvatarCache:
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._pixmaps: OrderedDict[tuple[str, int], QPixmap | None] = OrderedDict()
+        self._bytes = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._pixmaps)
+
+    def pixmap(self, avatar_b64: str | None, size: int) -> QPixmap | None:
+        if not avatar_b64:
+            return None
+        key = (hashlib.sha1(avatar_b64.encode("ascii", "replace")).hexdigest(), size)
+        if key in self._pixmaps:
+            self._pixmaps.move_to_end(key)
+            return self._pixmaps[key]
+        pixmap = _decode(avatar_b64, size)
+        self._pixmaps[key] = pixmap
+        self._bytes += _cost(pixmap)
+        while self._bytes > self.max_bytes and len(self._pixmaps) > 1:
+            _key, evicted = self._pixmaps.popitem(last=False)
+            self._bytes -= _cost(evicted)
+        return pixmap
+
+    def icon(self, avatar_b64: str | None, size: int) -> QIcon | None:
+        pixmap = self.pixmap(avatar_b64, size)
+        return QIcon(pixmap) if pixmap is not None else None
+
+    def clear(self) -> None:
+        self._pixmaps.clear()
+        self._bytes = 0
+
+
+_cache = AvatarCache(AVATAR_CACHE_BYTES)
+
+
+def avatar_cache() -> AvatarCache:
+    return _cache
+
+
+def avatar_pixmap(avatar_b64: str | None, size: int) -> QPixmap | None:
+    return _cache.pixmap(avatar_b64, size)
+
+
+def avatar_icon(avatar_b64: str | None, size: int) -> QIcon | None:
+    return _cache.icon(avatar_b64, size)
+
+
+def _decode(avatar_b64: str, size: int) -> QPixmap | None:
+    try:
+        data = QByteArray.fromBase64(avatar_b64.encode("ascii"))
+    except Exception:
+        return None
+    pixmap = QPixmap()
+    if not pixmap.loadFromData(data):
+        return None
+    return pixmap.scaled(size, size, Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
+
+
+def _cost(pixmap: QPixmap | None) -> int:
+    if pixmap is None:
+        return ENTRY_OVERHEAD_BYTES
+    return ENTRY_OVERHEAD_BYTES + pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
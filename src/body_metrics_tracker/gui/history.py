@@ -1,11 +1,25 @@
 from __future__ import annotations
 
 import csv
+from bisect import bisect_left, bisect_right
 from datetime import date
-from functools import partial
-
+from operator import itemgetter
+from typing import Iterable
+from uuid import UUID
+
+from PySide6.QtCore import (
+    QAbstractTableModel,
+    QEvent,
+    QModelIndex,
+    QRect,
+    QSize,
+    QSortFilterProxyModel,
+    Qt,
+    Signal,
+)
 from PySide6.QtWidgets import (
     QAbstractItemView,
+    QApplication,
     QCheckBox,
     QDateEdit,
     QFileDialog,
@@ -15,27 +29,325 @@ from PySide6.QtWidgets import (
     QLabel,
     QLineEdit,
     QPushButton,
-    QTableWidget,
-    QTableWidgetItem,
+    QStyle,
+    QStyledItemDelegate,
+    QStyleOptionButton,
+    QTableView,
     QVBoxLayout,
     QWidget,
 )
 
-from body_metrics_tracker.core import LengthUnit, WeightUnit, waist_from_cm, weight_from_kg
+from body_metrics_tracker.core import EntryTimeline, LengthUnit, WeightUnit, waist_from_cm, weight_from_kg
 from body_metrics_tracker.core.models import MeasurementEntry
 
 from .dialogs import edit_entry_dialog
-from .state import AppState
+from .state import ENTRIES, PROFILE, AppState, StateChange
+
+FETCH_BATCH = 200
+ENTRY_ROLE = Qt.UserRole
+
+DATE = "date"
+WEIGHT = "weight"
+WAIST = "waist"
+NOTE = "note"
+UPDATED = "updated"
+ACTIONS = "actions"
+COLUMN_TITLES = {
+    DATE: "Date",
+    WEIGHT: "Weight",
+    WAIST: "Waist",
+    NOTE: "Note",
+    UPDATED: "Updated",
+    ACTIONS: "Actions",
+}
+ACTION_LABELS = ("Edit", "Delete")
+
+
+class EntryTableModel(QAbstractTableModel):
+    def __init__(self, parent: QWidget | None = None) -> None:
+        super().__init__(parent)
+        self._entries: list[MeasurementEntry] = []
+        self._keys: list[tuple] = []
+        self._key_by_id: dict[UUID, tuple] = {}
+        self._loaded = 0
+        self._columns: tuple[str, ...] = ()
+        self._sort_column = DATE
+        self._descending = True
+        self._weight_unit = WeightUnit.KG
+        self._waist_unit = LengthUnit.CM
+
+    @property
+    def columns(self) -> tuple[str, ...]:
+        return self._columns
+
+    @property
+    def sort_order(self) -> tuple[int, Qt.SortOrder]:
+        order = Qt.DescendingOrder if self._descending else Qt.AscendingOrder
+        return self._columns.index(self._sort_column), order
+
+    def reset(
+        self,
+        entries: Iterable[MeasurementEntry] | EntryTimeline[MeasurementEntry],
+        show_waist: bool,
+        weight_unit: WeightUnit,
+        waist_unit: LengthUnit,
+    ) -> None:
+        self.beginResetModel()
+        if show_waist:
+            self._columns = (DATE, WEIGHT, WAIST, NOTE, UPDATED, ACTIONS)
+        else:
+            self._columns = (DATE, WEIGHT, NOTE, UPDATED, ACTIONS)
+        if self._sort_column not in self._columns:
+            self._sort_column, self._descending = DATE, True
+        self._weight_unit = weight_unit
+        self._waist_unit = waist_unit
+        self._order(entries, presorted=isinstance(entries, EntryTimeline) and self._sort_column == DATE)
+        self._loaded = min(FETCH_BATCH, len(self._entries))
+        self.endResetModel()
+
+    def set_units(self, weight_unit: WeightUnit, waist_unit: LengthUnit) -> None:
+        if (weight_unit, waist_unit) == (self._weight_unit, self._waist_unit):
+            return
+        self._weight_unit = weight_unit
+        self._waist_unit = waist_unit
+        if self._loaded:
+            self.dataChanged.emit(self.index(0, 0), self.index(self._loaded - 1, len(self._columns) - 1))
+
+    def entry_at(self, row: int) -> MeasurementEntry:
+        return self._entries[self._position(row, len(self._entries))]
+
+    def apply(self, entry_id: UUID, entry: MeasurementEntry | None) -> None:
+        old_key = self._key_by_id.get(entry_id)
+        live = entry is not None and not entry.is_deleted
+        new_key = self._sort_key(entry) if live else None
+        if old_key is not None:
+            position = bisect_left(self._keys, old_key)
+            if live:
+                target = bisect_left(self._keys, new_key)
+                if target > position:
+                    target -= 1
+                if target == position:
+                    self._entries[position] = entry
+                    self._keys[position] = new_key
+                    self._key_by_id[entry_id] = new_key
+                    row = self._position(position, len(self._entries))
+                    if row < self._loaded:
+                        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self._columns) - 1))
+                    return
+            self._remove(position)
+        if live:
+            self._insert(bisect_right(self._keys, new_key), entry, new_key)
+
+    def fetch_all(self) -> None:
+        self._fetch(len(self._entries) - self._loaded)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._loaded
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._columns)
+
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        return not parent.isValid() and self._loaded < len(self._entries)
+
+    def fetchMore(self, parent: QModelIndex) -> None:
+        if not parent.isValid():
+            self._fetch(min(FETCH_BATCH, len(self._entries) - self._loaded))
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.AscendingOrder) -> None:
+        if not 0 <= column < len(self._columns) or self._columns[column] == ACTIONS:
+            return
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        tracked = [(self.entry_at(index.row()).entry_id, index.column()) for index in persistent]
+        self._sort_column = self._columns[column]
+        self._descending = order == Qt.DescendingOrder
+        self._order(self._entries)
+        moved = []
+        for entry_id, section in tracked:
+            row = self._position(bisect_left(self._keys, self._key_by_id[entry_id]), len(self._entries))
+            moved.append(self.index(row, section) if row < self._loaded else QModelIndex())
+        self.changePersistentIndexList(persistent, moved)
+        self.layoutChanged.emit()
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole and 0 <= section < len(self._columns):
+            return COLUMN_TITLES[self._columns[section]]
+        return None
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if role != Qt.DisplayRole and role != ENTRY_ROLE:
+            return None
+        if not index.isValid() or index.row() >= self._loaded:
+            return None
+        entry = self.entry_at(index.row())
+        if role == Qt.DisplayRole:
+            return self._display(entry, self._columns[index.column()])
+        if role == ENTRY_ROLE:
+            return entry
+        return None
+
+    def _position(self, index: int, count: int) -> int:
+        return count - 1 - index if self._descending else index
+
+    def _order(self, entries: Iterable[MeasurementEntry], presorted: bool = False) -> None:
+        ranked = [(self._sort_key(entry), entry) for entry in entries]
+        if not presorted:
+            ranked.sort(key=itemgetter(0))
+        self._keys = [key for key, _entry in ranked]
+        self._entries = [entry for _key, entry in ranked]
+        self._key_by_id = {entry.entry_id: key for key, entry in ranked}
+
+    def _remove(self, position: int) -> None:
+        count = len(self._entries)
+        row = self._position(position, count)
+        visible = row < self._loaded
+        if visible:
+            self.beginRemoveRows(QModelIndex(), row, row)
+        del self._key_by_id[self._entries[position].entry_id]
+        del self._entries[position]
+        del self._keys[position]
+        if visible:
+            self._loaded -= 1
+            self.endRemoveRows()
+
+    def _insert(self, position: int, entry: MeasurementEntry, key: tuple) -> None:
+        count = len(self._entries)
+        row = self._position(position, count + 1)
+        visible = row < self._loaded or self._loaded == count
+        if visible:
+            self.beginInsertRows(QModelIndex(), row, row)
+        self._entries.insert(position, entry)
+        self._keys.insert(position, key)
+        self._key_by_id[entry.entry_id] = key
+        if visible:
+            self._loaded += 1
+            self.endInsertRows()
+
+    def _fetch(self, count: int) -> None:
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def _display(self, entry: MeasurementEntry, column: str) -> str | None:
+        if column == DATE:
+            return entry.measured_at.date().isoformat()
+        if column == WEIGHT:
+            return f"{weight_from_kg(entry.weight_kg, self._weight_unit):.1f} {self._weight_unit.value}"
+        if column == WAIST:
+            if entry.waist_cm is None:
+                return "--"
+            return f"{waist_from_cm(entry.waist_cm, self._waist_unit):.1f} {self._waist_unit.value}"
+        if column == NOTE:
+            return entry.note or ""
+        if column == UPDATED:
+            return entry.updated_at.astimezone().strftime("%Y-%m-%d %H:%M")
+        return None
+
+    def _sort_key(self, entry: MeasurementEntry) -> tuple:
+        column = self._sort_column
+        if column == WEIGHT:
+            value = entry.weight_kg
+        elif column == WAIST:
+            value = entry.waist_cm if entry.waist_cm is not None else float("-inf")
+        elif column == NOTE:
+            value = (entry.note or "").lower()
+        elif column == UPDATED:
+            value = entry.updated_at
+        else:
+            return (entry.measured_at, entry.entry_id)
+        return (value, entry.measured_at, entry.entry_id)
+
+
+class EntryFilterProxy(QSortFilterProxyModel):
+    def __init__(self, parent: QWidget | None = None) -> None:
+        super().__init__(parent)
+        self._search = ""
+        self._from_date: date | None = None
+        self._to_date: date | None = None
+
+    @property
+    def filtering(self) -> bool:
+        return bool(self._search) or self._from_date is not None or self._to_date is not None
+
+    def set_filters(self, search: str, from_date: date | None, to_date: date | None) -> None:
+        filters = (search.strip().lower(), from_date, to_date)
+        if filters == (self._search, self._from_date, self._to_date):
+            return
+        self._search, self._from_date, self._to_date = filters
+        self.invalidateFilter()
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.AscendingOrder) -> None:
+        # Sorting in the source keeps order for rows that are not fetched yet
+        # and avoids a Python lessThan call per comparison.
+        self.sourceModel().sort(column, order)
+
+    def filterAcceptsRow(self, source_row: int, source_parent: QModelIndex) -> bool:
+        entry = self.sourceModel().entry_at(source_row)
+        measured_date = entry.measured_at.date()
+        if self._from_date is not None and measured_date < self._from_date:
+            return False
+        if self._to_date is not None and measured_date > self._to_date:
+            return False
+        if self._search:
+            return self._search in (entry.note or "").lower() or self._search in measured_date.isoformat()
+        return True
+
+
+class EntryActionDelegate(QStyledItemDelegate):
+    edit_requested = Signal(object)
+    delete_requested = Signal(object)
+
+    def paint(self, painter, option, index: QModelIndex) -> None:
+        style = option.widget.style() if option.widget is not None else QApplication.style()
+        for label, rect in zip(ACTION_LABELS, self._button_rects(option)):
+            button = QStyleOptionButton()
+            button.rect = rect
+            button.text = label
+            button.state = QStyle.State_Enabled | QStyle.State_Raised
+            style.drawControl(QStyle.CE_PushButton, button, painter, option.widget)
+
+    def sizeHint(self, option, index: QModelIndex) -> QSize:
+        rects = self._button_rects(option)
+        return QSize(rects[-1].right() - option.rect.left() + 6, option.fontMetrics.height() + 12)
+
+    def editorEvent(self, event, model, option, index: QModelIndex) -> bool:
+        if event.type() != QEvent.MouseButtonRelease or event.button() != Qt.LeftButton:
+            return False
+        entry = index.data(ENTRY_ROLE)
+        if entry is None:
+            return False
+        edit_rect, delete_rect = self._button_rects(option)
+        position = event.position().toPoint()
+        if edit_rect.contains(position):
+            self.edit_requested.emit(entry)
+            return True
+        if delete_rect.contains(position):
+            self.delete_requested.emit(entry)
+            return True
+        return False
+
+    def _button_rects(self, option) -> tuple[QRect, QRect]:
+        cell = option.rect
+        left = cell.left()
+        rects = []
+        for label in ACTION_LABELS:
+            width = option.fontMetrics.horizontalAdvance(label) + 24
+            rects.append(QRect(left, cell.top() + 2, width, cell.height() - 4))
+            left += width + 6
+        return rects[0], rects[1]
 
 
 class HistoryWidget(QWidget):
     def __init__(self, state: AppState) -> None:
         super().__init__()
         self.state = state
-        self._show_waist = None
+        self._view_key = None
         self._build_ui()
-        self.state.subscribe(self._refresh_table)
-        self._refresh_table()
+        self.state.subscribe(self._on_state_changed, (ENTRIES, PROFILE), widget=self)
+        self._reset_model()
 
     def _build_ui(self) -> None:
         layout = QVBoxLayout(self)
@@ -50,7 +362,7 @@ class HistoryWidget(QWidget):
 
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Search notes or dates...")
-        self.search_input.textChanged.connect(self._refresh_table)
+        self.search_input.textChanged.connect(self._apply_filters)
 
         self.from_check = QCheckBox("From")
         self.from_date = QDateEdit()
@@ -58,7 +370,7 @@ class HistoryWidget(QWidget):
         self.from_date.setDate(date.today())
         self.from_date.setEnabled(False)
         self.from_check.toggled.connect(self._on_from_toggled)
-        self.from_date.dateChanged.connect(self._refresh_table)
+        self.from_date.dateChanged.connect(self._apply_filters)
 
         self.to_check = QCheckBox("To")
         self.to_date = QDateEdit()
@@ -66,7 +378,7 @@ class HistoryWidget(QWidget):
         self.to_date.setDate(date.today())
         self.to_date.setEnabled(False)
         self.to_check.toggled.connect(self._on_to_toggled)
-        self.to_date.dateChanged.connect(self._refresh_table)
+        self.to_date.dateChanged.connect(self._apply_filters)
 
         self.clear_button = QPushButton("Clear")
         self.clear_button.clicked.connect(self._on_clear_filters)
@@ -87,14 +399,22 @@ class HistoryWidget(QWidget):
         group = QGroupBox("Entries")
         group_layout = QVBoxLayout(group)
 
-        self.table = QTableWidget(0, 6)
-        self.table.setHorizontalHeaderLabels(
-            ["Date", "Weight", "Waist", "Note", "Updated", "Actions"]
-        )
+        self.model = EntryTableModel(self)
+        self.proxy = EntryFilterProxy(self)
+        self.proxy.setSourceModel(self.model)
+        self.actions = EntryActionDelegate(self)
+        self.actions.edit_requested.connect(self._on_edit_entry)
+        self.actions.delete_requested.connect(self._on_delete_entry)
+
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
         self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.table.verticalHeader().setVisible(False)
         self.table.horizontalHeader().setStretchLastSection(False)
+        self.table.horizontalHeader().setResizeContentsPrecision(0)
+        self.table.sortByColumn(0, Qt.DescendingOrder)
+        self.table.setSortingEnabled(True)
         group_layout.addWidget(self.table)
 
         layout.addWidget(group)
@@ -103,7 +423,9 @@ class HistoryWidget(QWidget):
         layout.addWidget(self.status_label)
 
     def _filtered_entries(self) -> list[MeasurementEntry]:
-        entries = [entry for entry in self.state.entries if not entry.is_deleted]
+        from_date = self.from_date.date().toPython() if self.from_check.isChecked() else None
+        to_date = self.to_date.date().toPython() if self.to_check.isChecked() else None
+        entries = self.state.timeline.between_dates(from_date, to_date)
         search_text = self.search_input.text().strip().lower()
         if search_text:
             entries = [
@@ -112,102 +434,41 @@ class HistoryWidget(QWidget):
                 if search_text in (entry.note or "").lower()
                 or search_text in entry.measured_at.date().isoformat()
             ]
+        entries.reverse()
+        return entries
 
-        if self.from_check.isChecked():
-            from_date = self.from_date.date().toPython()
-            entries = [entry for entry in entries if entry.measured_at.date() >= from_date]
-
-        if self.to_check.isChecked():
-            to_date = self.to_date.date().toPython()
-            entries = [entry for entry in entries if entry.measured_at.date() <= to_date]
-
-        return sorted(entries, key=lambda entry: entry.measured_at, reverse=True)
-
-    def _refresh_table(self) -> None:
-        show_waist = self.state.profile.track_waist
-        if show_waist != self._show_waist:
-            self._configure_columns(show_waist)
-            self._show_waist = show_waist
-        entries = self._filtered_entries()
-        weight_unit = self.state.profile.weight_unit
-        waist_unit = self.state.profile.waist_unit
-
-        self.table.setRowCount(0)
-        self.table.setRowCount(len(entries))
-        for row, entry in enumerate(entries):
-            self._populate_row(row, entry, weight_unit, waist_unit)
-
+    def _on_state_changed(self, change: StateChange) -> None:
+        profile = self.state.profile
+        if (profile.user_id, profile.track_waist) != self._view_key or len(change.entries) > FETCH_BATCH:
+            self._reset_model()
+            return
+        self.model.set_units(profile.weight_unit, profile.waist_unit)
+        for entry_id in change.entries:
+            entry = self.state.data.get_entry(entry_id)
+            self.model.apply(entry_id, entry if entry is not None and entry.user_id == profile.user_id else None)
+
+    def _reset_model(self) -> None:
+        profile = self.state.profile
+        self._view_key = (profile.user_id, profile.track_waist)
+        self.model.reset(self.state.timeline, profile.track_waist, profile.weight_unit, profile.waist_unit)
+        self._apply_filters()
+        self._configure_columns()
+
+    def _apply_filters(self) -> None:
+        from_date = self.from_date.date().toPython() if self.from_check.isChecked() else None
+        to_date = self.to_date.date().toPython() if self.to_check.isChecked() else None
+        self.proxy.set_filters(self.search_input.text(), from_date, to_date)
+        if self.proxy.filtering:
+            self.model.fetch_all()
+
+    def _configure_columns(self) -> None:
+        columns = self.model.columns
         header = self.table.horizontalHeader()
-        header.setSectionResizeMode(0, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(1, QHeaderView.ResizeToContents)
-        if show_waist:
-            header.setSectionResizeMode(2, QHeaderView.ResizeToContents)
-            header.setSectionResizeMode(3, QHeaderView.Stretch)
-            header.setSectionResizeMode(4, QHeaderView.ResizeToContents)
-            header.setSectionResizeMode(5, QHeaderView.ResizeToContents)
-        else:
-            header.setSectionResizeMode(2, QHeaderView.Stretch)
-            header.setSectionResizeMode(3, QHeaderView.ResizeToContents)
-            header.setSectionResizeMode(4, QHeaderView.ResizeToContents)
-
-    def _populate_row(
-        self,
-        row: int,
-        entry: MeasurementEntry,
-        weight_unit: WeightUnit,
-        waist_unit: LengthUnit,
-    ) -> None:
-        measured_date = entry.measured_at.date().isoformat()
-        weight_display = weight_from_kg(entry.weight_kg, weight_unit)
-        waist_display = waist_from_cm(entry.waist_cm, waist_unit) if entry.waist_cm is not None else None
-        updated_label = entry.updated_at.astimezone().strftime("%Y-%m-%d %H:%M")
-
-        self.table.setItem(row, 0, QTableWidgetItem(measured_date))
-        self.table.setItem(
-            row,
-            1,
-            QTableWidgetItem(f"{weight_display:.1f} {weight_unit.value}"),
-        )
-        if self._show_waist:
-            self.table.setItem(
-                row,
-                2,
-                QTableWidgetItem(f"{waist_display:.1f} {waist_unit.value}" if waist_display is not None else "--"),
-            )
-            self.table.setItem(row, 3, QTableWidgetItem(entry.note or ""))
-            self.table.setItem(row, 4, QTableWidgetItem(updated_label))
-            action_column = 5
-        else:
-            self.table.setItem(row, 2, QTableWidgetItem(entry.note or ""))
-            self.table.setItem(row, 3, QTableWidgetItem(updated_label))
-            action_column = 4
-
-        edit_button = QPushButton("Edit")
-        edit_button.clicked.connect(partial(self._on_edit_entry, entry))
-        delete_button = QPushButton("Delete")
-        delete_button.clicked.connect(partial(self._on_delete_entry, entry))
-
-        action_widget = QWidget()
-        action_layout = QHBoxLayout(action_widget)
-        action_layout.setContentsMargins(0, 0, 0, 0)
-        action_layout.setSpacing(6)
-        action_layout.addWidget(edit_button)
-        action_layout.addWidget(delete_button)
-        action_layout.addStretch(1)
-
-        self.table.setCellWidget(row, action_column, action_widget)
-
-    def _configure_columns(self, show_waist: bool) -> None:
-        if show_waist:
-            self.table.setColumnCount(6)
-            self.table.setHorizontalHeaderLabels(
-                ["Date", "Weight", "Waist", "Note", "Updated", "Actions"]
-            )
-        else:
-            self.table.setColumnCount(5)
-            self.table.setHorizontalHeaderLabels(
-                ["Date", "Weight", "Note", "Updated", "Actions"]
-            )
+        for section, column in enumerate(columns):
+            mode = QHeaderView.Stretch if column == NOTE else QHeaderView.ResizeToContents
+            header.setSectionResizeMode(section, mode)
+            self.table.setItemDelegateForColumn(section, self.actions if column == ACTIONS else None)
+        header.setSortIndicator(*self.model.sort_order)
 
     def _on_edit_entry(self, entry: MeasurementEntry) -> None:
         result = edit_entry_dialog(
@@ -226,18 +487,18 @@ class HistoryWidget(QWidget):
 
     def _on_from_toggled(self, checked: bool) -> None:
         self.from_date.setEnabled(checked)
-        self._refresh_table()
+        self._apply_filters()
 
     def _on_to_toggled(self, checked: bool) -> None:
         self.to_date.setEnabled(checked)
-        self._refresh_table()
+        self._apply_filters()
 
     def _on_clear_filters(self) -> None:
         self.search_input.clear()
         self.from_check.setChecked(False)
         self.to_check.setChecked(False)
         self.status_label.setText("")
-        self._refresh_table()
+        self._apply_filters()
 
     def _on_export_csv(self) -> None:
         entries = self._filtered_entries()
@@ -36,7 +36,8 @@ from body_metrics_tracker.core.link_code import encode_link_code
 from body_metrics_tracker.core.models import ReminderRule, UserProfile, utc_now
 from body_metrics_tracker.relay import RelayConfig, update_profile
 
-from .state import AppState
+from .avatars import avatar_pixmap
+from .state import PROFILE, REMINDERS, AppState, StateChange
 from .theme import apply_app_theme
 
 MAX_AVATAR_B64 = 60000
@@ -57,7 +58,7 @@ class ProfileWidget(QWidget):
         self._reminders_changed: set = set()
         self._build_ui()
         self._load_profile()
-        self.state.subscribe(self._on_state_changed)
+        self.state.subscribe(self._on_state_changed, (PROFILE, REMINDERS), widget=self)
 
     def _build_ui(self) -> None:
         layout = QVBoxLayout(self)
@@ -374,13 +375,11 @@ class ProfileWidget(QWidget):
             self.avatar_label.setPixmap(QPixmap())
             self.avatar_label.setText("No photo")
             return
-        data = QByteArray.fromBase64(avatar_b64.encode("ascii"))
-        pixmap = QPixmap()
-        if not pixmap.loadFromData(data):
+        pixmap = avatar_pixmap(avatar_b64, 64)
+        if pixmap is None:
             self.avatar_label.setPixmap(QPixmap())
             self.avatar_label.setText("No photo")
             return
-        pixmap = pixmap.scaled(64, 64, Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
         self.avatar_label.setPixmap(pixmap)
         self.avatar_label.setText("")
 
@@ -609,7 +608,7 @@ class ProfileWidget(QWidget):
                 combo.setCurrentIndex(index)
                 return
 
-    def _on_state_changed(self) -> None:
+    def _on_state_changed(self, _change: StateChange) -> None:
         if self._loading:
             return
         if self._active_profile_id and self._active_profile_id != self.state.profile.user_id:
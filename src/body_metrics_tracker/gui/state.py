@@ -1,25 +1,161 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+import queue
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field, fields, is_dataclass
 import os
 from pathlib import Path
-from typing import Callable, Optional
+from typing import Any, Callable, Iterable, Iterator, Optional
+from uuid import UUID
 
-from PySide6.QtCore import QStandardPaths
-from PySide6.QtWidgets import QMessageBox, QWidget
+from PySide6.QtCore import QCoreApplication, QEvent, QEventLoop, QObject, QStandardPaths, Qt, QTimer, Signal
+from PySide6.QtWidgets import QMessageBox, QProgressDialog, QWidget
 
-from body_metrics_tracker.core.models import AdminConfig, LengthUnit, MeasurementEntry, UserProfile, WeightUnit, utc_now
-from body_metrics_tracker.storage import LocalStore, LocalStoreData, StorageError
+from body_metrics_tracker import profiling
+from body_metrics_tracker.config import SAVE_DELAY_MS
+from body_metrics_tracker.core.aggregation import AggregateEngine
+from body_metrics_tracker.core.models import (
+    AdminConfig,
+    FriendLink,
+    LengthUnit,
+    MeasurementEntry,
+    UserProfile,
+    WeightUnit,
+    utc_now,
+)
+from body_metrics_tracker.core.timeline import EntryTimeline
+from body_metrics_tracker.storage import (
+    PROFILE_OPS,
+    DeferredLoad,
+    EntryView,
+    JournalRecord,
+    LoadChunk,
+    LocalStore,
+    LocalStoreData,
+    ProfileJournal,
+    SessionKey,
+    StorageError,
+    WriteBehindWriter,
+)
 
 from .dialogs import request_passphrase
 
+ENTRIES = "entries"
+PROFILE = "profile"
+FRIENDS = "friends"
+REMINDERS = "reminders"
+SYNC = "sync"
+ADMIN = "admin"
+LOADING = "loading"
+
+_FIELD_CATEGORIES = {
+    "friends": FRIENDS,
+    "self_reminders": REMINDERS,
+    "last_reminder_seen_at": REMINDERS,
+}
+
+
+@dataclass
+class StateChange:
+    entries_added: set[UUID] = field(default_factory=set)
+    entries_updated: set[UUID] = field(default_factory=set)
+    entries_deleted: set[UUID] = field(default_factory=set)
+    profiles: set[UUID] = field(default_factory=set)
+    profile_fields: set[str] = field(default_factory=set)
+    friends: set[UUID] = field(default_factory=set)
+    active_profile: bool = False
+    admin_config: bool = False
+    loaded: bool = False
+
+    def __bool__(self) -> bool:
+        return bool(
+            self.entries_added
+            or self.entries_updated
+            or self.entries_deleted
+            or self.profiles
+            or self.active_profile
+            or self.admin_config
+            or self.loaded
+        )
+
+    @property
+    def entries(self) -> set[UUID]:
+        return self.entries_added | self.entries_updated | self.entries_deleted
+
+    @property
+    def categories(self) -> set[str]:
+        categories = {_field_category(name) for name in self.profile_fields}
+        if self.entries_added or self.entries_updated or self.entries_deleted:
+            categories.add(ENTRIES)
+        if self.friends:
+            categories.add(FRIENDS)
+        if self.active_profile:
+            categories.update((ENTRIES, PROFILE, FRIENDS, REMINDERS))
+        if self.admin_config:
+            categories.add(ADMIN)
+        if self.loaded:
+            categories.add(LOADING)
+        return categories
+
+    def merge(self, other: "StateChange") -> None:
+        for entry_id in other.entries_added:
+            self.entry_added(entry_id)
+        for entry_id in other.entries_updated:
+            self.entry_updated(entry_id)
+        for entry_id in other.entries_deleted:
+            self.entry_updated(entry_id, deleted=True)
+        self.profiles |= other.profiles
+        self.profile_fields |= other.profile_fields
+        self.friends |= other.friends
+        self.active_profile = self.active_profile or other.active_profile
+        self.admin_config = self.admin_config or other.admin_config
+        self.loaded = self.loaded or other.loaded
+
+    def entry_added(self, entry_id: UUID) -> None:
+        self.entries_deleted.discard(entry_id)
+        self.entries_added.add(entry_id)
+
+    def entry_updated(self, entry_id: UUID, deleted: bool = False) -> None:
+        if entry_id in self.entries_added:
+            if deleted:
+                self.entries_added.discard(entry_id)
+                self.entries_deleted.add(entry_id)
+            return
+        if deleted:
+            self.entries_updated.discard(entry_id)
+            self.entries_deleted.add(entry_id)
+        else:
+            self.entries_deleted.discard(entry_id)
+            self.entries_updated.add(entry_id)
+
 
 @dataclass
 class AppState:
     store: LocalStore
     data: LocalStoreData
-    passphrase: str
-    _listeners: list[Callable[[], None]] = field(default_factory=list, init=False)
+    session: SessionKey
+    save_delay: float = SAVE_DELAY_MS / 1000
+    last_change: StateChange = field(default_factory=StateChange, init=False)
+    _listeners: list["_Subscription"] = field(default_factory=list, init=False)
+    _writer: WriteBehindWriter = field(init=False, repr=False)
+    _batch_depth: int = field(default=0, init=False, repr=False)
+    _pending: dict[tuple[str, object], JournalRecord] = field(default_factory=dict, init=False, repr=False)
+    _pending_profiles: set[UUID] = field(default_factory=set, init=False, repr=False)
+    _profile_journal: ProfileJournal = field(init=False, repr=False)
+    _change: StateChange = field(default_factory=StateChange, init=False, repr=False)
+    _outgoing: StateChange | None = field(default=None, init=False, repr=False)
+    _profile_marks: dict[UUID, dict[str, Any]] = field(default_factory=dict, init=False, repr=False)
+    load_error: str | None = field(default=None, init=False)
+    _deferred: DeferredLoad | None = field(default=None, init=False, repr=False)
+    _loader: "_StoreLoader | None" = field(default=None, init=False, repr=False)
+    _save_after_load: bool = field(default=False, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._writer = WriteBehindWriter(self.store, self.session, self.save_delay)
+        self._profile_journal = ProfileJournal(self.data.profiles)
+        for profile in self.data.profiles:
+            self._profile_marks[profile.user_id] = _profile_mark(profile)
 
     @property
     def profile(self) -> UserProfile:
@@ -45,12 +181,23 @@ class AppState:
         return list(self.data.profiles)
 
     @property
-    def entries(self) -> list[MeasurementEntry]:
-        active_id = self.profile.user_id
-        return [entry for entry in self.data.entries if entry.user_id == active_id]
+    def entries(self) -> EntryView:
+        return self.data.entries_for(self.profile.user_id)
+
+    def entries_for_profile(self, user_id) -> EntryView:
+        return self.data.entries_for(user_id)
 
-    def entries_for_profile(self, user_id) -> list[MeasurementEntry]:
-        return [entry for entry in self.data.entries if entry.user_id == user_id]
+    @property
+    def timeline(self) -> EntryTimeline[MeasurementEntry]:
+        return self.data.timeline_for(self.profile.user_id)
+
+    @property
+    def aggregates(self) -> AggregateEngine:
+        return self.data.aggregates_for(self.profile.user_id)
+
+    @property
+    def entries_revision(self) -> int:
+        return self.data.revision_for(self.profile.user_id)
 
     @property
     def admin_config(self) -> AdminConfig | None:
@@ -64,14 +211,17 @@ class AppState:
         if self.data.admin_config is None:
             self.data.admin_config = AdminConfig(owner_user_id=self.profile.user_id)
             self.data.last_modified = utc_now()
-            self.save()
+            self._change.admin_config = True
+            self._stage(JournalRecord.admin_config(self.data.admin_config))
+            self._commit(notify=False)
         return self.data.admin_config
 
     def update_admin_config(self, config: AdminConfig) -> None:
         self.data.admin_config = config
         self.data.last_modified = utc_now()
-        self.save()
-        self._notify()
+        self._change.admin_config = True
+        self._stage(JournalRecord.admin_config(config))
+        self._commit()
 
     def bootstrap_admin_from_env(self) -> None:
         flag = os.getenv("BMT_ADMIN_BOOTSTRAP", "").strip().lower()
@@ -80,26 +230,81 @@ class AppState:
         if self.data.admin_config is None:
             self.data.admin_config = AdminConfig(owner_user_id=self.profile.user_id)
             self.data.last_modified = utc_now()
-            self.save()
+            self._change.admin_config = True
+            self._stage(JournalRecord.admin_config(self.data.admin_config))
+            self._commit(notify=False)
+
+    def subscribe(
+        self,
+        callback: Callable[[StateChange], None],
+        categories: Iterable[str] | None = None,
+        widget: QWidget | None = None,
+    ) -> None:
+        subscription = _Subscription(callback, categories, widget)
+        self._listeners.append(subscription)
+        if widget is not None:
+            widget.destroyed.connect(lambda *_args: self._unsubscribe(subscription))
 
-    def subscribe(self, callback: Callable[[], None]) -> None:
-        self._listeners.append(callback)
+    def _unsubscribe(self, subscription: "_Subscription") -> None:
+        if subscription in self._listeners:
+            self._listeners.remove(subscription)
+
+    @contextmanager
+    def batch(self) -> Iterator[StateChange]:
+        checkpoint = self.data.snapshot()
+        pending, pending_profiles = dict(self._pending), set(self._pending_profiles)
+        change = StateChange()
+        change.merge(self._change)
+        marks = dict(self._profile_marks)
+        self._batch_depth += 1
+        try:
+            yield self._change
+        except BaseException:
+            self._batch_depth -= 1
+            # Roll memory back to where this scope began and drop only what it staged.
+            self.data.restore(checkpoint)
+            self._pending, self._pending_profiles = pending, pending_profiles
+            self._change = change
+            self._profile_marks = marks
+            raise
+        self._batch_depth -= 1
+        self._commit()
+
+    def _notify(self, change: StateChange) -> None:
+        if self._outgoing is not None:
+            self._outgoing.merge(change)
+            return
+        self._outgoing = change
+        if QCoreApplication.instance() is None:
+            self._dispatch()
+        else:
+            QTimer.singleShot(0, self._dispatch)
 
-    def _notify(self) -> None:
-        for callback in list(self._listeners):
-            callback()
+    def _dispatch(self) -> None:
+        change, self._outgoing = self._outgoing, None
+        if not change:
+            return
+        self.last_change = change
+        categories = change.categories
+        for subscription in list(self._listeners):
+            subscription.deliver(change, categories)
 
     def add_entry(self, entry: MeasurementEntry) -> None:
         self.data.add_entry(entry)
-        self.save()
-        self._notify()
+        self._change.entry_added(entry.entry_id)
+        self._stage(JournalRecord.entry(entry))
+        self._commit()
 
     def add_profile(self, profile: UserProfile) -> None:
         self.data.profiles.append(profile)
         self.data.active_profile_id = profile.user_id
         self.data.last_modified = utc_now()
-        self.save()
-        self._notify()
+        self._change.profiles.add(profile.user_id)
+        self._change.active_profile = True
+        self._mark_profile(profile)
+        self._pending_profiles.add(profile.user_id)
+        self._stage(JournalRecord.active_profile(profile.user_id))
+        self._commit()
 
     def set_active_profile(self, user_id) -> None:
         if self.data.active_profile_id == user_id:
@@ -108,8 +313,9 @@ class AppState:
             return
         self.data.active_profile_id = user_id
         self.data.last_modified = utc_now()
-        self.save()
-        self._notify()
+        self._change.active_profile = True
+        self._stage(JournalRecord.active_profile(user_id))
+        self._commit()
 
     def update_profile(self, profile: UserProfile) -> None:
         updated = False
@@ -121,27 +327,164 @@ class AppState:
         if not updated:
             self.data.profiles.append(profile)
         self.data.last_modified = utc_now()
+        self._change.profiles.add(profile.user_id)
+        self._mark_profile(profile)
+        self._pending_profiles.add(profile.user_id)
         if self.data.active_profile_id is None:
             self.data.active_profile_id = profile.user_id
-        self.save()
-        self._notify()
+            self._change.active_profile = True
+            self._stage(JournalRecord.active_profile(profile.user_id))
+        self._commit()
 
     def update_entry(self, entry: MeasurementEntry) -> bool:
         updated = self.data.update_entry(entry)
         if updated:
-            self.save()
-            self._notify()
+            self._change.entry_updated(entry.entry_id, deleted=entry.is_deleted)
+            self._stage(JournalRecord.entry(entry))
+            self._commit()
         return updated
 
     def soft_delete_entry(self, entry_id) -> bool:
         deleted = self.data.soft_delete_entry(entry_id)
         if deleted:
-            self.save()
-            self._notify()
+            entry = self.data.get_entry(entry_id)
+            if entry is not None:
+                self._stage(JournalRecord.entry(entry))
+            self._change.entry_updated(entry_id, deleted=True)
+            self._commit()
         return deleted
 
+    @property
+    def loading(self) -> bool:
+        return self._deferred is not None
+
+    def defer_load(self, deferred: DeferredLoad) -> None:
+        if deferred and self._deferred is None:
+            self._deferred = deferred
+
+    def start_loading(self) -> None:
+        if self._deferred is None or self._loader is not None:
+            return
+        self._loader = _StoreLoader(self._deferred, self._merge_loaded, self._finish_loading)
+        self._loader.start()
+
+    def finish_loading(self) -> None:
+        if self._deferred is None:
+            return
+        self.start_loading()
+        self._loader.join()
+        self._finish_loading()
+
     def save(self) -> None:
-        self.store.save(self.data, self.passphrase)
+        if self._deferred is not None or self.load_error:
+            self._save_after_load = True
+            return
+        self._writer.submit_snapshot(self.data.snapshot())
+
+    def flush(self, timeout: float | None = None) -> None:
+        self.finish_loading()
+        self._writer.flush(timeout)
+        if self._save_after_load and self.load_error:
+            raise StorageError(f"Profile changes were not saved; the store did not fully load: {self.load_error}")
+
+    def close(self, timeout: float | None = None) -> None:
+        self.finish_loading()
+        self._writer.close(timeout)
+
+    def _merge_loaded(self) -> None:
+        if self._loader is None:
+            return
+        for chunk in self._loader.drain():
+            result = self.data.merge(chunk)
+            for entry_id in result.added:
+                self._change.entry_added(entry_id)
+            for entry_id in result.updated:
+                entry = self.data.get_entry(entry_id)
+                self._change.entry_updated(entry_id, deleted=bool(entry and entry.is_deleted))
+            for user_id in result.profiles:
+                profile = self._profile_by_id(user_id)
+                if profile is not None:
+                    self._change.profiles.add(user_id)
+                    self._mark_profile(profile)
+                    self._profile_journal.reset(profile)
+        self._commit()
+
+    def _finish_loading(self) -> None:
+        if self._loader is None:
+            return
+        self._merge_loaded()
+        loader, self._loader = self._loader, None
+        self._deferred = None
+        if loader.error is not None:
+            self.load_error = str(loader.error)
+        elif self._save_after_load:
+            self._save_after_load = False
+            self.save()
+        self._change.loaded = True
+        self._commit()
+
+    def _stage(self, *records: JournalRecord) -> None:
+        for record in records:
+            key = (record.op, record.identity)
+            self._pending.pop(key, None)
+            self._pending[key] = record
+
+    def _commit(self, notify: bool = True) -> None:
+        if self._batch_depth:
+            return
+        records = self._profile_records()
+        records.extend(self._pending.values())
+        self._pending.clear()
+        change, self._change = self._change, StateChange()
+        if records:
+            self._persist(*records)
+        if notify and change:
+            self._notify(change)
+
+    def _persist(self, *records: JournalRecord) -> None:
+        if self._deferred is not None or self.load_error:
+            # Profile records and snapshots written now would drop the parts still loading.
+            journal = [record for record in records if record.op not in PROFILE_OPS]
+            if len(journal) != len(records):
+                self._save_after_load = True
+            if journal:
+                self._writer.submit(journal, self.data.last_modified)
+            return
+        if self._writer.needs_snapshot():
+            self.save()
+        else:
+            self._writer.submit(records, self.data.last_modified)
+
+    def _profile_records(self) -> list[JournalRecord]:
+        # Diffed at commit time so a batch that raises leaves the journaled baseline untouched.
+        records = []
+        for user_id in self._pending_profiles:
+            profile = self._profile_by_id(user_id)
+            if profile is not None:
+                records.extend(self._profile_journal.records(profile))
+        self._pending_profiles.clear()
+        return records
+
+    def _mark_profile(self, profile: UserProfile) -> None:
+        self.data.touch_profile(profile.user_id)
+        previous = self._profile_marks.get(profile.user_id)
+        current = _profile_mark(profile)
+        self._profile_marks[profile.user_id] = current
+        if previous is None:
+            self._change.profile_fields.update(current)
+            self._change.friends.update(current["friends"])
+            return
+        for name, value in current.items():
+            if previous.get(name) == value:
+                continue
+            self._change.profile_fields.add(name)
+            if name == "friends":
+                before = previous.get(name, {})
+                self._change.friends.update(
+                    friend_id
+                    for friend_id in before.keys() | value.keys()
+                    if before.get(friend_id) != value.get(friend_id)
+                )
 
     def _profile_by_id(self, user_id) -> Optional[UserProfile]:
         for profile in self.data.profiles:
@@ -150,6 +493,112 @@ class AppState:
         return None
 
 
+class _Subscription(QObject):
+    def __init__(
+        self,
+        callback: Callable[[StateChange], None],
+        categories: Iterable[str] | None,
+        widget: QWidget | None,
+    ) -> None:
+        super().__init__(widget)
+        self.callback = callback
+        self.categories = frozenset(categories) if categories is not None else None
+        self.widget = widget
+        self.pending: StateChange | None = None
+        if widget is not None:
+            widget.installEventFilter(self)
+
+    def deliver(self, change: StateChange, categories: set[str]) -> None:
+        if self.categories is not None and self.categories.isdisjoint(categories):
+            return
+        if self.widget is not None and not self.widget.isVisible():
+            if self.pending is None:
+                self.pending = StateChange()
+            self.pending.merge(change)
+            return
+        self.callback(change)
+
+    def eventFilter(self, watched: QObject, event: QEvent) -> bool:
+        if event.type() == QEvent.Show and self.pending is not None:
+            change, self.pending = self.pending, None
+            self.callback(change)
+        return False
+
+
+class _StoreLoader(QObject):
+    progressed = Signal()
+    done = Signal()
+
+    def __init__(self, deferred: DeferredLoad, on_progress: Callable[[], None], on_done: Callable[[], None]) -> None:
+        super().__init__()
+        self.error: Exception | None = None
+        self._deferred = deferred
+        self._chunks: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="store-load", daemon=True)
+        self._on_progress = on_progress
+        self._on_done = on_done
+        self.progressed.connect(self._progress)
+        self.done.connect(self._done)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def join(self) -> None:
+        self._thread.join()
+
+    def drain(self) -> list[LoadChunk]:
+        chunks = []
+        while True:
+            try:
+                chunks.append(self._chunks.get_nowait())
+            except queue.Empty:
+                return chunks
+
+    def _progress(self) -> None:
+        self._on_progress()
+
+    def _done(self) -> None:
+        self._on_done()
+
+    def _run(self) -> None:
+        try:
+            with profiling.phase("load deferred"):
+                for chunk in self._deferred.chunks():
+                    self._chunks.put(chunk)
+                    self.progressed.emit()
+        except Exception as exc:
+            self.error = exc
+        self.done.emit()
+
+
+def _field_category(name: str) -> str:
+    if name.startswith("relay_last_"):
+        return SYNC
+    return _FIELD_CATEGORIES.get(name, PROFILE)
+
+
+def _profile_mark(profile: UserProfile) -> dict[str, Any]:
+    mark = {item.name: _freeze(getattr(profile, item.name)) for item in fields(profile) if item.name != "friends"}
+    mark["friends"] = {friend.friend_id: _friend_mark(friend) for friend in profile.friends}
+    return mark
+
+
+def _friend_mark(friend: FriendLink) -> tuple:
+    # shared_entries is only ever replaced, never edited in place, so identity is enough.
+    return tuple(
+        friend.shared_entries if item.name == "shared_entries" else _freeze(getattr(friend, item.name))
+        for item in fields(friend)
+    )
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if is_dataclass(value) and not isinstance(value, type):
+        return tuple(_freeze(getattr(value, item.name)) for item in fields(value))
+    return value
+
+
 def default_store_path() -> Path:
     location = QStandardPaths.writableLocation(QStandardPaths.AppDataLocation)
     if not location:
@@ -163,22 +612,87 @@ def load_or_create_state(parent: QWidget | None = None) -> Optional[AppState]:
     store = LocalStore(default_store_path())
     if store.exists():
         while True:
-            passphrase = request_passphrase(parent, mode="unlock")
+            with profiling.phase("passphrase prompt"):
+                passphrase = request_passphrase(parent, mode="unlock")
             if passphrase is None:
                 return None
             try:
-                data = store.load(passphrase)
-                if not data.profiles:
-                    data.profiles.append(UserProfile())
-                    store.save(data, passphrase)
+                with profiling.phase("unlock"):
+                    session, data, deferred = _run_with_progress(
+                        parent, "Unlocking…", lambda progress: _unlock(store, passphrase, progress)
+                    )
                 break
             except StorageError as exc:
                 QMessageBox.warning(parent, "Unlock Failed", str(exc))
-        return AppState(store=store, data=data, passphrase=passphrase)
+        state = AppState(store=store, data=data, session=session)
+        state.defer_load(deferred)
+        return state
 
-    passphrase = request_passphrase(parent, mode="create")
+    with profiling.phase("passphrase prompt"):
+        passphrase = request_passphrase(parent, mode="create")
     if passphrase is None:
         return None
-    profile = UserProfile()
-    data = store.initialize(passphrase, profile)
-    return AppState(store=store, data=data, passphrase=passphrase)
+    with profiling.phase("unlock"):
+        session, data = _run_with_progress(
+            parent, "Creating encrypted store…", lambda _progress: _create(store, passphrase)
+        )
+    return AppState(store=store, data=data, session=session)
+
+
+def _unlock(
+    store: LocalStore, passphrase: str, progress: Callable[[str], None]
+) -> tuple[SessionKey, LocalStoreData, DeferredLoad]:
+    with profiling.phase("kdf"):
+        session = store.unlock(passphrase)
+    progress("Decrypting…")
+    with profiling.phase("load store"):
+        data, deferred = store.load_staged(session)
+    if not data.profiles:
+        for chunk in deferred.chunks():
+            data.merge(chunk)
+        deferred = DeferredLoad()
+        data.profiles.append(UserProfile())
+        store.save(data, session)
+    return session, data, deferred
+
+
+def _create(store: LocalStore, passphrase: str) -> tuple[SessionKey, LocalStoreData]:
+    with profiling.phase("kdf"):
+        session = SessionKey.derive(passphrase)
+    return session, store.initialize(session, UserProfile())
+
+
+class _ProgressRelay(QObject):
+    changed = Signal(str)
+    finished = Signal()
+
+
+def _run_with_progress(parent: QWidget | None, label: str, task: Callable[[Callable[[str], None]], Any]) -> Any:
+    dialog = QProgressDialog(label, "", 0, 0, parent)
+    dialog.setWindowTitle("Body Metrics Tracker")
+    dialog.setCancelButton(None)
+    dialog.setWindowModality(Qt.ApplicationModal)
+    dialog.setMinimumDuration(0)
+    relay = _ProgressRelay()
+    relay.changed.connect(dialog.setLabelText)
+    loop = QEventLoop()
+    relay.finished.connect(loop.quit)
+    outcome: dict[str, Any] = {}
+
+    def run() -> None:
+        try:
+            outcome["result"] = task(relay.changed.emit)
+        except BaseException as exc:
+            outcome["error"] = exc
+        relay.finished.emit()
+
+    worker = threading.Thread(target=run, name="store-unlock", daemon=True)
+    dialog.show()
+    worker.start()
+    loop.exec()
+    worker.join()
+    dialog.close()
+    dialog.deleteLater()
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
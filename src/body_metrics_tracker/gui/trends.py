@@ -3,9 +3,9 @@ from __future__ import annotations
 from datetime import date, datetime, time, timedelta
 from uuid import uuid4
 
+import numpy as np
 import pyqtgraph as pg
-from PySide6.QtCore import QByteArray, Qt
-from PySide6.QtGui import QIcon, QPixmap
+from PySide6.QtCore import QTimer
 from PySide6.QtWidgets import (
     QCheckBox,
     QComboBox,
@@ -17,16 +17,29 @@ from PySide6.QtWidgets import (
 )
 
 from body_metrics_tracker.core import (
+    AggregateEngine,
+    EntryTimeline,
     LengthUnit,
-    MeasurementEntry,
     WeightUnit,
-    compute_weekly_summaries,
     waist_from_cm,
     weight_from_kg,
 )
+from body_metrics_tracker.core.aggregation import WAIST, WEIGHT, week_start_date
+from body_metrics_tracker.core.analytics import (
+    WEEK,
+    EntryColumns,
+    downsample,
+    nearest_index,
+    period_stats,
+    waists_from_cm,
+    weights_from_kg,
+    within_goal_band,
+)
 from body_metrics_tracker.core.models import FriendLink, SharedEntry
+from body_metrics_tracker.core.smoothing import DAYS, EWMA, POINTS, Smoother, SmoothingSpec
 
-from .state import AppState
+from .avatars import avatar_icon
+from .state import ENTRIES, FRIENDS, PROFILE, AppState, StateChange
 
 try:
     from pyqtgraph.graphicsItems.DateAxisItem import DateAxisItem
@@ -34,16 +47,55 @@ except Exception:  # pragma: no cover - optional import
     DateAxisItem = None
 
 
+MAX_RAW_POINTS = 4000
+REFINE_DELAY_MS = 60
+
+EMPTY_ARRAY = np.empty(0, dtype=np.float64)
+
+SELF_SERIES = "self"
+RAW = "raw"
+WEEKLY = "weekly"
+SMOOTHED = "smoothed"
+
+WEIGHT_PALETTE = (
+    (91, 163, 255),
+    (255, 99, 132),
+    (255, 183, 77),
+    (178, 102, 255),
+    (102, 204, 255),
+)
+WAIST_PALETTE = (
+    (125, 215, 165),
+    (255, 159, 64),
+    (255, 204, 128),
+    (102, 204, 180),
+    (153, 214, 255),
+)
+
+SMOOTHING_OPTIONS = (
+    SmoothingSpec(POINTS, 7),
+    SmoothingSpec(POINTS, 14),
+    SmoothingSpec(POINTS, 28),
+    SmoothingSpec(DAYS, 7),
+    SmoothingSpec(DAYS, 14),
+    SmoothingSpec(DAYS, 28),
+    SmoothingSpec(EWMA, 7),
+    SmoothingSpec(EWMA, 14),
+)
+
+
 class TrendsWidget(QWidget):
     def __init__(self, state: AppState) -> None:
         super().__init__()
         self.state = state
         self._friend_checks: dict[object, QCheckBox] = {}
+        self._friend_signature: tuple | None = None
+        self._friend_series: dict[object, tuple[list[SharedEntry], tuple, EntryTimeline, EntryColumns]] = {}
         self._build_ui()
         self._install_interactions()
         self._apply_profile_defaults()
         self._refresh_charts()
-        self.state.subscribe(self._on_state_changed)
+        self.state.subscribe(self._on_state_changed, (ENTRIES, PROFILE, FRIENDS), widget=self)
 
     def _build_ui(self) -> None:
         layout = QVBoxLayout(self)
@@ -82,7 +134,8 @@ class TrendsWidget(QWidget):
         self.show_smoothing.toggled.connect(self._refresh_charts)
 
         self.smoothing_window = QComboBox()
-        self.smoothing_window.addItems(["7 points", "14 points", "28 points"])
+        for spec in SMOOTHING_OPTIONS:
+            self.smoothing_window.addItem(spec.label, spec)
         self.smoothing_window.currentIndexChanged.connect(self._refresh_charts)
 
         self.show_goals = QCheckBox("Goals")
@@ -138,8 +191,9 @@ class TrendsWidget(QWidget):
         self._refresh_friend_list()
         self._apply_tracking_visibility()
 
-    def _on_state_changed(self) -> None:
-        self._apply_profile_defaults()
+    def _on_state_changed(self, change: StateChange) -> None:
+        if not change.categories.isdisjoint((PROFILE, FRIENDS)):
+            self._apply_profile_defaults()
         self._refresh_charts()
 
     def _selected_weight_unit(self) -> WeightUnit:
@@ -154,6 +208,23 @@ class TrendsWidget(QWidget):
         self._update_axis_visibility(track_waist)
 
     def _refresh_friend_list(self) -> None:
+        friends = sorted(
+            (friend for friend in self.state.profile.friends if friend.status == "connected"),
+            key=lambda item: item.display_name.lower(),
+        )
+        signature = tuple(
+            (
+                friend.friend_id,
+                friend.display_name,
+                friend.received_share_weight,
+                friend.received_share_waist,
+                friend.avatar_b64,
+            )
+            for friend in friends
+        )
+        if signature == self._friend_signature:
+            return
+        self._friend_signature = signature
         selected = {user_id for user_id, box in self._friend_checks.items() if box.isChecked()}
         while self.compare_layout.count():
             item = self.compare_layout.takeAt(0)
@@ -161,18 +232,17 @@ class TrendsWidget(QWidget):
             if widget is not None:
                 widget.setParent(None)
         self._friend_checks = {}
-        friends = [friend for friend in self.state.profile.friends if friend.status == "connected"]
         if not friends:
             placeholder = QLabel("No friends available.")
             placeholder.setStyleSheet("color: #9aa4af;")
             self.compare_layout.addWidget(placeholder)
             return
-        for friend in sorted(friends, key=lambda item: item.display_name.lower()):
+        for friend in friends:
             label = friend.display_name + self._friend_share_suffix(friend)
             checkbox = QCheckBox(label)
             checkbox.setChecked(friend.friend_id in selected)
             checkbox.setEnabled(friend.received_share_weight or friend.received_share_waist)
-            icon = self._avatar_icon(friend.avatar_b64)
+            icon = avatar_icon(friend.avatar_b64, 20)
             if icon is not None:
                 checkbox.setIcon(icon)
             checkbox.toggled.connect(self._refresh_charts)
@@ -184,48 +254,78 @@ class TrendsWidget(QWidget):
         return [friend for friend in self.state.profile.friends if friend.friend_id in selected_ids]
 
     def _refresh_charts(self) -> None:
-        entries = [entry for entry in self.state.entries if not entry.is_deleted]
         weight_unit = self._selected_weight_unit()
         waist_unit = self._selected_waist_unit()
+        profile = self.state.profile
+        goals = {
+            WEIGHT: (profile.goal_weight_kg, profile.goal_weight_band_kg),
+            WAIST: (profile.goal_waist_cm, profile.goal_waist_band_cm),
+        }
 
         series = [
             {
-                "label": self.state.profile.display_name,
-                "entries": self._apply_range(entries),
+                "key": SELF_SERIES,
+                "label": profile.display_name,
+                "version": (profile.user_id, self.state.entries_revision),
+                "timeline": self.state.timeline,
+                "aggregates": self.state.aggregates,
+                "goals": goals,
+                "share_weight": True,
+                "share_waist": True,
             }
         ]
-        for friend in self._selected_friends():
-            friend_entries = [entry for entry in friend.shared_entries if not entry.is_deleted]
-            if not friend_entries:
-                fallback = self._fallback_status_entry(friend)
-                if fallback is not None:
-                    friend_entries = [fallback]
+        selected = self._selected_friends()
+        for friend in selected:
+            timeline, columns = self._friend_entries(friend)
             series.append(
                 {
+                    "key": friend.friend_id,
                     "label": friend.display_name,
-                    "entries": self._apply_range(friend_entries),
+                    "version": timeline,
+                    "timeline": timeline,
+                    "columns": columns,
                     "share_weight": friend.received_share_weight,
                     "share_waist": friend.received_share_waist,
                 }
             )
+        selected_ids = {friend.friend_id for friend in selected}
+        for friend_id in list(self._friend_series):
+            if friend_id not in selected_ids:
+                del self._friend_series[friend_id]
 
         self._refresh_plots(series, weight_unit, waist_unit)
 
-    def _apply_range(self, entries: list[MeasurementEntry | SharedEntry]) -> list[MeasurementEntry | SharedEntry]:
+    def _friend_entries(self, friend: FriendLink) -> tuple[EntryTimeline, EntryColumns]:
+        source = (
+            len(friend.shared_entries),
+            friend.last_entry_date,
+            friend.last_weight_kg,
+            friend.last_waist_cm,
+        )
+        cached = self._friend_series.get(friend.friend_id)
+        if cached is not None and cached[0] is friend.shared_entries and cached[1] == source:
+            return cached[2], cached[3]
+        entries = [entry for entry in friend.shared_entries if not entry.is_deleted]
+        if not entries:
+            fallback = self._fallback_status_entry(friend)
+            if fallback is not None:
+                entries = [fallback]
+        timeline = EntryTimeline(entries)
+        # Friend history is replaced wholesale on sync, so its weeks are bucketed in one vectorized pass.
+        columns = EntryColumns.from_entries(entries)
+        self._friend_series[friend.friend_id] = (friend.shared_entries, source, timeline, columns)
+        return timeline, columns
+
+    def _range_start(self) -> date | None:
         selection = self.range_combo.currentText()
         if selection == "All":
-            return sorted(entries, key=lambda entry: entry.measured_at)
+            return None
         today = date.today()
         if selection == "4 weeks":
-            start_date = today - timedelta(weeks=4)
-        elif selection == "12 weeks":
-            start_date = today - timedelta(weeks=12)
-        else:
-            start_date = date(today.year, 1, 1)
-        return sorted(
-            [entry for entry in entries if entry.measured_at.date() >= start_date],
-            key=lambda entry: entry.measured_at,
-        )
+            return today - timedelta(weeks=4)
+        if selection == "12 weeks":
+            return today - timedelta(weeks=12)
+        return date(today.year, 1, 1)
 
     def _refresh_plots(
         self,
@@ -233,150 +333,202 @@ class TrendsWidget(QWidget):
         weight_unit: WeightUnit,
         waist_unit: LengthUnit,
     ) -> None:
-        self.weight_plot.clear()
-        self.waist_plot.clear()
-        self._reset_plot(self.weight_plot, self._weight_crosshair)
-        if self.state.profile.track_waist:
-            self._reset_plot(self.waist_plot, self._waist_crosshair)
+        track_waist = self.state.profile.track_waist
         self._apply_goal_lines(weight_unit, waist_unit)
+        options = (
+            self._range_start(),
+            self.show_raw.isChecked(),
+            self.show_weekly.isChecked(),
+            self._smoothing_spec() if self.show_smoothing.isChecked() else None,
+        )
 
-        weight_palette = [
-            (91, 163, 255),
-            (255, 99, 132),
-            (255, 183, 77),
-            (178, 102, 255),
-            (102, 204, 255),
-        ]
-        waist_palette = [
-            (125, 215, 165),
-            (255, 159, 64),
-            (255, 204, 128),
-            (102, 204, 180),
-            (153, 214, 255),
-        ]
-
-        weight_series_data: list[dict[str, object]] = []
-        waist_series_data: list[dict[str, object]] = []
-
+        changed = False
+        active: list[tuple[object, str]] = []
         for idx, series in enumerate(series_list):
-            label = str(series["label"])
-            entries = list(series["entries"]) if series.get("entries") else []
-            entries = sorted([entry for entry in entries if not entry.is_deleted], key=lambda entry: entry.measured_at)
-            color_weight = weight_palette[idx % len(weight_palette)]
-            color_waist = waist_palette[idx % len(waist_palette)]
-            share_weight = bool(series.get("share_weight", True))
-            share_waist = bool(series.get("share_waist", True))
-
-            if entries and share_weight:
-                weight_entries = [entry for entry in entries if entry.weight_kg is not None]
-                if weight_entries:
-                    timestamps = [entry.measured_at.timestamp() for entry in weight_entries]
-                    weight_values = [weight_from_kg(entry.weight_kg, weight_unit) for entry in weight_entries]
-                    weight_series_data.append(
-                        {"label": label, "timestamps": timestamps, "values": weight_values}
-                    )
-
-                    if self.show_raw.isChecked():
-                        self.weight_plot.plot(
-                            timestamps,
-                            weight_values,
-                            pen=None,
-                            symbol="o",
-                            symbolSize=6,
-                            symbolBrush=color_weight,
-                            symbolPen=None,
-                            name=f"{label} raw",
-                        )
-
-                    if self.show_weekly.isChecked():
-                        summaries = compute_weekly_summaries(weight_entries)
-                        if summaries:
-                            tzinfo = datetime.now().astimezone().tzinfo
-                            week_x = [
-                                datetime.combine(summary.week_start_date_local, time(12, 0), tzinfo=tzinfo).timestamp()
-                                for summary in summaries
-                            ]
-                            weekly_weight = [weight_from_kg(summary.avg_weight_kg, weight_unit) for summary in summaries]
-                            self.weight_plot.plot(
-                                week_x,
-                                weekly_weight,
-                                pen=pg.mkPen(color=color_weight, width=2),
-                                name=f"{label} weekly",
-                            )
-
-                    if self.show_smoothing.isChecked():
-                        window = self._smoothing_window_points()
-                        if window >= 2 and len(weight_values) >= window:
-                            smoothed_weight = _moving_average(weight_values, window)
-                            smoothed_x = timestamps[window - 1 :]
-                            self.weight_plot.plot(
-                                smoothed_x,
-                                smoothed_weight,
-                                pen=pg.mkPen(color=color_weight, width=2),
-                                name=f"{label} smoothed",
-                            )
-
-            if self.state.profile.track_waist and share_waist:
-                waist_entries = [entry for entry in entries if entry.waist_cm is not None]
-                if waist_entries:
-                    waist_timestamps = [entry.measured_at.timestamp() for entry in waist_entries]
-                    waist_values = [waist_from_cm(entry.waist_cm, waist_unit) for entry in waist_entries]
-                    waist_series_data.append(
-                        {"label": label, "timestamps": waist_timestamps, "values": waist_values}
-                    )
-
-                    if self.show_raw.isChecked():
-                        self.waist_plot.plot(
-                            waist_timestamps,
-                            waist_values,
-                            pen=None,
-                            symbol="o",
-                            symbolSize=6,
-                            symbolBrush=color_waist,
-                            symbolPen=None,
-                            name=f"{label} raw",
-                        )
-
-                    if self.show_weekly.isChecked():
-                        summaries = _weekly_waist_summaries(waist_entries)
-                        if summaries:
-                            tzinfo = datetime.now().astimezone().tzinfo
-                            week_x = [
-                                datetime.combine(summary[0], time(12, 0), tzinfo=tzinfo).timestamp()
-                                for summary in summaries
-                            ]
-                            weekly_waist = [waist_from_cm(summary[1], waist_unit) for summary in summaries]
-                            self.waist_plot.plot(
-                                week_x,
-                                weekly_waist,
-                                pen=pg.mkPen(color=color_waist, width=2),
-                                name=f"{label} weekly",
-                            )
-
-                    if self.show_smoothing.isChecked():
-                        window = self._smoothing_window_points()
-                        if window >= 2 and len(waist_values) >= window:
-                            smoothed_waist = _moving_average(waist_values, window)
-                            smoothed_x = waist_timestamps[window - 1 :]
-                            self.waist_plot.plot(
-                                smoothed_x,
-                                smoothed_waist,
-                                pen=pg.mkPen(color=color_waist, width=2),
-                                name=f"{label} smoothed",
-                            )
-
-        self.weight_plot.setLabel("left", f"Weight ({weight_unit.value})")
-        if self.state.profile.track_waist:
-            self.waist_plot.setLabel("left", f"Waist ({waist_unit.value})")
+            metrics = (
+                (WEIGHT, self.weight_plot, weight_unit, WEIGHT_PALETTE, bool(series["share_weight"])),
+                (WAIST, self.waist_plot, waist_unit, WAIST_PALETTE, track_waist and bool(series["share_waist"])),
+            )
+            for metric, plot, unit, palette, enabled in metrics:
+                if not enabled:
+                    continue
+                slot = (series["key"], metric)
+                active.append(slot)
+                color = palette[idx % len(palette)]
+                fingerprint = (series["version"], series["label"], color, unit, options, series.get("goals"))
+                previous = self._fingerprints.get(slot)
+                if previous == fingerprint:
+                    continue
+                self._fingerprints[slot] = fingerprint
+                restyled = previous is None or previous[1:] != fingerprint[1:]
+                changed |= self._update_series(plot, slot, series, metric, unit, color, options, restyled)
+        for slot in [slot for slot in self._fingerprints if slot not in active]:
+            self._drop_series(slot)
+            changed = True
+
+        axes = (weight_unit, waist_unit, track_waist)
+        if axes != self._axis_state:
+            self._axis_state = axes
+            self.weight_plot.setLabel("left", f"Weight ({weight_unit.value})")
+            if track_waist:
+                self.waist_plot.setLabel("left", f"Waist ({waist_unit.value})")
+
+        if changed or not self._latest_plot_data:
+            hover = [(slot[1], self._hover_series[slot]) for slot in active if slot in self._hover_series]
+            self._latest_plot_data = {
+                "weight": [data for metric, data in hover if metric == WEIGHT],
+                "waist": [data for metric, data in hover if metric == WAIST],
+                "weight_unit": weight_unit,
+                "waist_unit": waist_unit,
+            }
+        view = (self.range_combo.currentText(), track_waist)
+        if view != self._centered_view:
+            self._centered_view = view
+            self._center_on_today()
 
-        self._latest_plot_data = {
-            "weight": weight_series_data,
-            "waist": waist_series_data,
-            "weight_unit": weight_unit,
-            "waist_unit": waist_unit,
+    def _update_series(
+        self,
+        plot: pg.PlotWidget,
+        slot: tuple[object, str],
+        series: dict[str, object],
+        metric: str,
+        unit: WeightUnit | LengthUnit,
+        color: tuple[int, int, int],
+        options: tuple[date | None, bool, bool, SmoothingSpec | None],
+        restyled: bool,
+    ) -> bool:
+        since, show_raw, show_weekly, spec = options
+        label = str(series["label"])
+        columns = self._columns_for(slot, series["timeline"], since)
+        mask = columns.present(metric)
+        timestamps = columns.timestamps[mask]
+        if metric == WEIGHT:
+            values = weights_from_kg(columns.weight_kg[mask], unit)
+        else:
+            values = waists_from_cm(columns.waist_cm[mask], unit)
+        if not timestamps.size:
+            had_series = slot in self._hover_series
+            self._clear_series(slot)
+            return had_series
+        current = self._hover_series.get(slot)
+        if (
+            not restyled
+            and current is not None
+            and np.array_equal(current["timestamps"], timestamps)
+            and np.array_equal(current["values"], values)
+        ):
+            return False
+        appended = _appended_from(current, timestamps, values) if not restyled else 0
+        hover = {
+            "label": label,
+            "timestamps": timestamps,
+            "values": values,
+            "week_timestamps": EMPTY_ARRAY,
+            "week_values": EMPTY_ARRAY,
+            "week_in_goal": EMPTY_ARRAY,
         }
-        self._update_axis_visibility(self.state.profile.track_waist)
-        self._center_on_today()
+        self._hover_series[slot] = hover
+
+        raw_key = (*slot, RAW)
+        if show_raw:
+            item = self._curve(
+                plot,
+                raw_key,
+                f"{label} raw",
+                color,
+                pen=None,
+                symbol="o",
+                symbolSize=6,
+                symbolBrush=color,
+                symbolPen=None,
+            )
+            self._raw_series[raw_key] = (plot, item, timestamps, values)
+            self._refine_item(plot, item, timestamps, values)
+        else:
+            self._remove_curve(raw_key)
+
+        weekly_key = (*slot, WEEKLY)
+        week_starts, week_means = _weekly_means(series, metric, since) if show_weekly else ([], EMPTY_ARRAY)
+        if week_starts:
+            tzinfo = datetime.now().astimezone().tzinfo
+            week_x = np.array(
+                [datetime.combine(start, time(12, 0), tzinfo=tzinfo).timestamp() for start in week_starts]
+            )
+            week_y = weights_from_kg(week_means, unit) if metric == WEIGHT else waists_from_cm(week_means, unit)
+            hover["week_timestamps"] = week_x
+            hover["week_values"] = week_y
+            goal, band = series.get("goals", {}).get(metric, (None, None))
+            hover["week_in_goal"] = within_goal_band(week_means, goal, band)
+            item = self._curve(plot, weekly_key, f"{label} weekly", color, pen=pg.mkPen(color=color, width=2))
+            item.setData(week_x, week_y)
+        else:
+            self._remove_curve(weekly_key)
+
+        smoothed_key = (*slot, SMOOTHED)
+        smoother = self._smoothers.get(slot)
+        if spec is None or len(values) < 2:
+            smoother = None
+            self._smoothers.pop(slot, None)
+        elif appended and smoother is not None and smoother.spec == spec:
+            # A newly logged entry only pushes the new points through the running window.
+            smoother.append(timestamps[appended:], values[appended:])
+        else:
+            smoother = self._smoothers[slot] = Smoother.over(timestamps, values, spec)
+        if smoother is not None and smoother.values.size:
+            item = self._curve(plot, smoothed_key, f"{label} smoothed", color, pen=pg.mkPen(color=color, width=2))
+            item.setData(smoother.timestamps, smoother.values)
+        else:
+            self._remove_curve(smoothed_key)
+        return True
+
+    def _curve(
+        self,
+        plot: pg.PlotWidget,
+        key: tuple[object, str, str],
+        name: str,
+        color: tuple[int, int, int],
+        **style,
+    ) -> pg.PlotDataItem:
+        current = self._curves.get(key)
+        if current is not None and current[2] == (name, color):
+            return current[1]
+        self._remove_curve(key)
+        item = plot.plot([], [], name=name, **style)
+        self._curves[key] = (plot, item, (name, color))
+        return item
+
+    def _remove_curve(self, key: tuple[object, str, str]) -> None:
+        self._raw_series.pop(key, None)
+        current = self._curves.pop(key, None)
+        if current is not None:
+            current[0].removeItem(current[1])
+
+    def _columns_for(self, slot: tuple[object, str], timeline: EntryTimeline, since: date | None) -> EntryColumns:
+        entries = timeline.between_dates(since)
+        cached = self._range_columns.get(slot)
+        if cached is not None and cached[0] is timeline and cached[1] == since:
+            previous, columns = cached[2], cached[3]
+            count = len(previous)
+            # Entries are replaced rather than edited, so an untouched prefix means only the tail is new.
+            if len(entries) >= count and entries[:count] == previous:
+                if len(entries) > count:
+                    columns = columns.extended(entries[count:])
+                self._range_columns[slot] = (timeline, since, entries, columns)
+                return columns
+        columns = EntryColumns.from_entries(entries)
+        self._range_columns[slot] = (timeline, since, entries, columns)
+        return columns
+
+    def _clear_series(self, slot: tuple[object, str]) -> None:
+        self._hover_series.pop(slot, None)
+        self._smoothers.pop(slot, None)
+        self._range_columns.pop(slot, None)
+        for kind in (RAW, WEEKLY, SMOOTHED):
+            self._remove_curve((*slot, kind))
+
+    def _drop_series(self, slot: tuple[object, str]) -> None:
+        self._fingerprints.pop(slot, None)
+        self._clear_series(slot)
 
     def _update_axis_visibility(self, track_waist: bool) -> None:
         weight_axis = self.weight_plot.getAxis("bottom")
@@ -411,14 +563,59 @@ class TrendsWidget(QWidget):
 
     def _install_interactions(self) -> None:
         self._latest_plot_data = {}
+        self._curves: dict[tuple[object, str, str], tuple[pg.PlotWidget, pg.PlotDataItem, tuple]] = {}
+        self._fingerprints: dict[tuple[object, str], tuple] = {}
+        self._hover_series: dict[tuple[object, str], dict[str, object]] = {}
+        self._smoothers: dict[tuple[object, str], Smoother] = {}
+        self._range_columns: dict[tuple[object, str], tuple[EntryTimeline, date | None, list, EntryColumns]] = {}
+        self._raw_series: dict[tuple[object, str, str], tuple[pg.PlotWidget, pg.PlotDataItem, np.ndarray, np.ndarray]]
+        self._raw_series = {}
+        self._axis_state: tuple | None = None
+        self._centered_view: tuple | None = None
+        self._refine_timer = QTimer(self)
+        self._refine_timer.setSingleShot(True)
+        self._refine_timer.setInterval(REFINE_DELAY_MS)
+        self._refine_timer.timeout.connect(self._refine_raw_points)
+        self.weight_plot.getViewBox().sigXRangeChanged.connect(self._schedule_refine)
+        self.waist_plot.getViewBox().sigXRangeChanged.connect(self._schedule_refine)
         self._weight_crosshair = pg.InfiniteLine(angle=90, movable=False, pen=pg.mkPen(color=(80, 80, 80)))
         self._waist_crosshair = pg.InfiniteLine(angle=90, movable=False, pen=pg.mkPen(color=(80, 80, 80)))
         self.weight_plot.addItem(self._weight_crosshair, ignoreBounds=True)
         self.waist_plot.addItem(self._waist_crosshair, ignoreBounds=True)
+        self._weight_goal = pg.InfiniteLine(angle=0, movable=False, pen=pg.mkPen(color=(255, 99, 132), width=2))
+        self._waist_goal = pg.InfiniteLine(angle=0, movable=False, pen=pg.mkPen(color=(255, 159, 64), width=2))
+        self.weight_plot.addItem(self._weight_goal, ignoreBounds=True)
+        self.waist_plot.addItem(self._waist_goal, ignoreBounds=True)
+        self._weight_goal.setVisible(False)
+        self._waist_goal.setVisible(False)
 
         self._weight_proxy = pg.SignalProxy(self.weight_plot.scene().sigMouseMoved, rateLimit=60, slot=self._on_mouse_move)
         self._waist_proxy = pg.SignalProxy(self.waist_plot.scene().sigMouseMoved, rateLimit=60, slot=self._on_mouse_move)
 
+    def _schedule_refine(self, *_args) -> None:
+        self._refine_timer.start()
+
+    def _refine_raw_points(self) -> None:
+        self._refine_timer.stop()
+        for plot, item, timestamps, values in self._raw_series.values():
+            self._refine_item(plot, item, timestamps, values)
+
+    def _refine_item(
+        self,
+        plot: pg.PlotWidget,
+        item: pg.PlotDataItem,
+        timestamps: np.ndarray,
+        values: np.ndarray,
+    ) -> None:
+        view_box = plot.getViewBox()
+        (x_min, x_max), _ = view_box.viewRange()
+        span = max(x_max - x_min, 0.0)
+        lo = int(np.searchsorted(timestamps, x_min - span, side="left"))
+        hi = int(np.searchsorted(timestamps, x_max + span, side="right"))
+        budget = min(MAX_RAW_POINTS, max(200, int(view_box.width())) * 3)
+        x, y = downsample(timestamps[lo:hi], values[lo:hi], budget)
+        item.setData(x, y)
+
     def _on_mouse_move(self, event) -> None:
         if not self._latest_plot_data:
             return
@@ -430,55 +627,44 @@ class TrendsWidget(QWidget):
                 continue
             mouse_point = plot.plotItem.vb.mapSceneToView(pos)
             x = mouse_point.x()
+            metric = "weight" if plot is self.weight_plot else "waist"
+            snapped = self._update_hover_label(x, metric)
+            if snapped is not None:
+                x = snapped
             self._weight_crosshair.setPos(x)
             self._waist_crosshair.setPos(x)
-            metric = "weight" if plot is self.weight_plot else "waist"
-            self._update_hover_label(x, metric)
             break
 
-    def _update_hover_label(self, timestamp: float, metric: str) -> None:
+    def _update_hover_label(self, timestamp: float, metric: str) -> float | None:
         data = self._latest_plot_data
         series_list = data.get(metric, [])
-        if not series_list:
-            self.hover_label.setText("")
-            return
         best = None
         for series in series_list:
-            timestamps = series.get("timestamps", [])
-            values = series.get("values", [])
-            if not timestamps:
-                continue
-            index = min(range(len(timestamps)), key=lambda i: abs(timestamps[i] - timestamp))
-            distance = abs(timestamps[index] - timestamp)
-            if best is None or distance < best["distance"]:
-                best = {
-                    "distance": distance,
-                    "timestamp": timestamps[index],
-                    "value": values[index],
-                    "label": series.get("label", ""),
-                }
-        if not best:
+            for times_key, values_key, suffix in (
+                ("timestamps", "values", ""),
+                ("week_timestamps", "week_values", " (weekly avg)"),
+            ):
+                timestamps = series[times_key]
+                index = nearest_index(timestamps, timestamp)
+                if index < 0:
+                    continue
+                distance = abs(timestamps[index] - timestamp)
+                if best is None or distance < best[0]:
+                    if values_key == "week_values" and series["week_in_goal"][index]:
+                        suffix = " (weekly avg, within goal)"
+                    best = (distance, timestamps[index], series[values_key][index], series["label"] + suffix)
+        if best is None:
             self.hover_label.setText("")
-            return
-        ts = datetime.fromtimestamp(best["timestamp"]).astimezone()
+            return None
+        _distance, point_ts, value, label = best
+        ts = datetime.fromtimestamp(point_ts).astimezone()
         unit = data["weight_unit"] if metric == "weight" else data["waist_unit"]
-        label = best["label"]
-        self.hover_label.setText(
-            f"{ts.strftime('%Y-%m-%d')} · {label}: {best['value']:.1f} {unit.value}"
-        )
+        self.hover_label.setText(f"{ts.strftime('%Y-%m-%d')} · {label}: {value:.1f} {unit.value}")
+        return float(point_ts)
 
-    def _reset_plot(self, plot: pg.PlotWidget, crosshair: pg.InfiniteLine) -> None:
-        if crosshair is not None:
-            plot.addItem(crosshair, ignoreBounds=True)
-        plot.addLegend(offset=(10, 10))
-
-    def _smoothing_window_points(self) -> int:
-        selection = self.smoothing_window.currentText()
-        if selection.startswith("7"):
-            return 7
-        if selection.startswith("14"):
-            return 14
-        return 28
+    def _smoothing_spec(self) -> SmoothingSpec:
+        spec = self.smoothing_window.currentData()
+        return spec if isinstance(spec, SmoothingSpec) else SMOOTHING_OPTIONS[0]
 
     def _apply_goal_toggle(self) -> None:
         profile = self.state.profile
@@ -488,18 +674,16 @@ class TrendsWidget(QWidget):
             self.show_goals.setChecked(False)
 
     def _apply_goal_lines(self, weight_unit: WeightUnit, waist_unit: LengthUnit) -> None:
-        if not self.show_goals.isChecked():
-            return
         profile = self.state.profile
-        if profile.goal_weight_kg is not None:
-            goal = weight_from_kg(profile.goal_weight_kg, weight_unit)
-            line = pg.InfiniteLine(pos=goal, angle=0, pen=pg.mkPen(color=(255, 99, 132), width=2))
-            self.weight_plot.addItem(line, ignoreBounds=True)
-
-        if profile.track_waist and profile.goal_waist_cm is not None:
-            goal = waist_from_cm(profile.goal_waist_cm, waist_unit)
-            line = pg.InfiniteLine(pos=goal, angle=0, pen=pg.mkPen(color=(255, 159, 64), width=2))
-            self.waist_plot.addItem(line, ignoreBounds=True)
+        show = self.show_goals.isChecked()
+        weight_goal = profile.goal_weight_kg if show else None
+        waist_goal = profile.goal_waist_cm if show and profile.track_waist else None
+        if weight_goal is not None:
+            self._weight_goal.setPos(weight_from_kg(weight_goal, weight_unit))
+        self._weight_goal.setVisible(weight_goal is not None)
+        if waist_goal is not None:
+            self._waist_goal.setPos(waist_from_cm(waist_goal, waist_unit))
+        self._waist_goal.setVisible(waist_goal is not None)
 
     def _fallback_status_entry(self, friend: FriendLink) -> SharedEntry | None:
         if friend.last_entry_date is None:
@@ -528,46 +712,27 @@ class TrendsWidget(QWidget):
             return " (waist only)"
         return " (not sharing)"
 
-    def _avatar_icon(self, avatar_b64: str | None) -> QIcon | None:
-        if not avatar_b64:
-            return None
-        try:
-            data = QByteArray.fromBase64(avatar_b64.encode("ascii"))
-        except Exception:
-            return None
-        pixmap = QPixmap()
-        if not pixmap.loadFromData(data):
-            return None
-        pixmap = pixmap.scaled(20, 20, Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
-        return QIcon(pixmap)
-
-
-def _moving_average(values: list[float], window: int) -> list[float]:
-    if window <= 1:
-        return values[:]
-    result = []
-    for idx in range(window - 1, len(values)):
-        subset = values[idx - window + 1 : idx + 1]
-        result.append(sum(subset) / window)
-    return result
-
-
-def _weekly_waist_summaries(entries: list[MeasurementEntry | SharedEntry]) -> list[tuple[date, float]]:
-    buckets: dict[date, list[float]] = {}
-    for entry in entries:
-        if entry.is_deleted:
-            continue
-        if entry.date_local is None or entry.waist_cm is None:
-            continue
-        start = _week_start_date(entry.date_local)
-        buckets.setdefault(start, []).append(entry.waist_cm)
-    summaries: list[tuple[date, float]] = []
-    for start_date, values in buckets.items():
-        summaries.append((start_date, sum(values) / len(values)))
-    summaries.sort(key=lambda item: item[0])
-    return summaries
-
-
-def _week_start_date(local_date: date) -> date:
-    days_since_sunday = (local_date.weekday() + 1) % 7
-    return local_date - timedelta(days=days_since_sunday)
+
+def _appended_from(current: dict[str, object] | None, timestamps: np.ndarray, values: np.ndarray) -> int:
+    if current is None:
+        return 0
+    previous_times = current["timestamps"]
+    count = len(previous_times)
+    if not 0 < count < timestamps.size:
+        return 0
+    if not np.array_equal(timestamps[:count], previous_times) or not np.array_equal(values[:count], current["values"]):
+        return 0
+    return count
+
+
+def _weekly_means(series: dict[str, object], metric: str, since: date | None) -> tuple[list[date], np.ndarray]:
+    aggregates = series.get("aggregates")
+    if isinstance(aggregates, AggregateEngine):
+        weeks = aggregates.weeks(metric, since)
+        return [week.period_start for week in weeks], np.array([week.mean for week in weeks], dtype=np.float64)
+    columns = series.get("columns")
+    if not isinstance(columns, EntryColumns):
+        return [], EMPTY_ARRAY
+    stats = period_stats(columns, metric, WEEK)
+    first = int(np.searchsorted(stats.starts, week_start_date(since).toordinal())) if since is not None else 0
+    return stats.start_dates()[first:], stats.mean[first:]
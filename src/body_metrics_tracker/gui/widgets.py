@@ -1,11 +1,10 @@
 from __future__ import annotations
 
-import base64
 from datetime import date, datetime, time, timedelta
 import threading
 
 from PySide6.QtCore import QEvent, Qt, QTimer
-from PySide6.QtGui import QFont, QPixmap
+from PySide6.QtGui import QFont
 from PySide6.QtWidgets import (
     QDateEdit,
     QDoubleSpinBox,
@@ -22,11 +21,10 @@ from PySide6.QtWidgets import (
 )
 
 from body_metrics_tracker.core import (
+    AggregateEngine,
     LengthUnit,
     MeasurementEntry,
     WeightUnit,
-    compute_weekly_deltas,
-    compute_weekly_summaries,
     normalize_waist,
     normalize_weight,
     waist_from_cm,
@@ -35,7 +33,8 @@ from body_metrics_tracker.core import (
 from body_metrics_tracker.relay import RelayConfig, post_status
 from body_metrics_tracker.core.aggregation import week_start_date
 
-from .state import AppState
+from .avatars import avatar_pixmap
+from .state import ENTRIES, FRIENDS, PROFILE, REMINDERS, AppState, StateChange
 
 WEIGHT_RANGE_KG = (20.0, 300.0)
 WAIST_RANGE_CM = (30.0, 200.0)
@@ -55,7 +54,8 @@ class DashboardWidget(QWidget):
         self._build_ui()
         self._apply_profile_defaults()
         self._refresh_stats()
-        self.state.subscribe(self._on_state_changed)
+        self.state.subscribe(self._on_state_changed, (ENTRIES, PROFILE, FRIENDS), widget=self)
+        self.state.subscribe(self._on_reminders_changed, (REMINDERS,))
         self._start_reminder_timer()
 
     def _build_ui(self) -> None:
@@ -267,9 +267,11 @@ class DashboardWidget(QWidget):
             return None
         return max(candidates, key=lambda item: item.last_sent_at or now)
 
-    def _on_state_changed(self) -> None:
+    def _on_state_changed(self, _change: StateChange) -> None:
         self._apply_profile_defaults()
         self._refresh_stats()
+
+    def _on_reminders_changed(self, _change: StateChange) -> None:
         self._check_self_reminder()
 
     def _selected_weight_unit(self) -> WeightUnit:
@@ -314,10 +316,9 @@ class DashboardWidget(QWidget):
         self.waist_input.setEnabled(track_waist)
 
     def _reset_inputs_from_last_entry(self) -> None:
-        entries = [entry for entry in self.state.entries if not entry.is_deleted]
+        last = self.state.timeline.latest()
         track_waist = self.state.profile.track_waist
-        if entries:
-            last = entries[-1]
+        if last is not None:
             weight_display = weight_from_kg(last.weight_kg, self._selected_weight_unit())
             self.weight_input.setValue(weight_display)
             if track_waist:
@@ -398,15 +399,14 @@ class DashboardWidget(QWidget):
         return result == QMessageBox.Yes
 
     def _refresh_stats(self) -> None:
-        entries = [entry for entry in self.state.entries if not entry.is_deleted]
+        timeline = self.state.timeline
         weight_unit = self._selected_weight_unit()
         waist_unit = self._selected_waist_unit()
         track_waist = self.state.profile.track_waist
-        today = date.today()
-        today_entries = [entry for entry in entries if entry.measured_at.date() == today]
+        today_entries = timeline.on_date(date.today())
 
-        if entries:
-            last = entries[-1]
+        last = timeline.latest()
+        if last is not None:
             last_weight = weight_from_kg(last.weight_kg, weight_unit)
             if track_waist and last.waist_cm is not None:
                 last_waist = waist_from_cm(last.waist_cm, waist_unit)
@@ -434,26 +434,24 @@ class DashboardWidget(QWidget):
             self.today_status_label.setStyleSheet("font-size: 14px; font-weight: 600; color: #6b7785;")
             self.today_detail_label.setText("Add today's weight to keep your streak.")
 
-        summaries = compute_weekly_summaries(entries)
-        self._update_weekly_summary(summaries, weight_unit, waist_unit, track_waist)
+        self._update_weekly_summary(self.state.aggregates, weight_unit, waist_unit, track_waist)
         self._refresh_friend_status(weight_unit, waist_unit)
 
     def _post_status_update(self) -> None:
         profile = self.state.profile
         if not profile.relay_url or not profile.relay_token:
             return
-        entries = [entry for entry in self.state.entries if not entry.is_deleted]
-        today = date.today()
-        logged_today = any(entry.measured_at.date() == today for entry in entries)
-        last_entry_date = entries[-1].date_local if entries else None
+        timeline = self.state.timeline
+        logged_today = bool(timeline.on_date(date.today()))
+        last = timeline.latest()
+        last_entry_date = last.date_local if last else None
         share_weight = any(
             friend.share_weight for friend in profile.friends if friend.status == "connected"
         )
         share_waist = any(
             friend.share_waist for friend in profile.friends if friend.status == "connected"
         )
-        if entries:
-            last = entries[-1]
+        if last:
             weight_kg = last.weight_kg if share_weight else None
             waist_cm = last.waist_cm if share_waist else None
         else:
@@ -583,7 +581,7 @@ class DashboardWidget(QWidget):
         label = QLabel()
         label.setFixedSize(24, 24)
         label.setAlignment(Qt.AlignCenter)
-        pixmap = self._avatar_pixmap(friend.avatar_b64, 24)
+        pixmap = avatar_pixmap(friend.avatar_b64, 24)
         if pixmap is not None:
             label.setPixmap(pixmap)
         else:
@@ -594,18 +592,6 @@ class DashboardWidget(QWidget):
             )
         return label
 
-    def _avatar_pixmap(self, avatar_b64: str | None, size: int) -> QPixmap | None:
-        if not avatar_b64:
-            return None
-        try:
-            data = base64.b64decode(avatar_b64)
-        except Exception:
-            return None
-        pixmap = QPixmap()
-        if not pixmap.loadFromData(data):
-            return None
-        return pixmap.scaled(size, size, Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
-
     def _clear_layout(self, layout: QVBoxLayout) -> None:
         while layout.count():
             item = layout.takeAt(0)
@@ -615,20 +601,19 @@ class DashboardWidget(QWidget):
 
     def _update_weekly_summary(
         self,
-        summaries: list,
+        aggregates: AggregateEngine,
         weight_unit: WeightUnit,
         waist_unit: LengthUnit,
         track_waist: bool,
     ) -> None:
-        if not summaries:
+        if not aggregates:
             self.summary_label.setText("This week: no entries yet")
             self.delta_label.setText("Last completed week: --")
             return
 
         today = date.today()
         current_week = week_start_date(today)
-        summary_by_week = {summary.week_start_date_local: summary for summary in summaries}
-        current_summary = summary_by_week.get(current_week)
+        current_summary = aggregates.weekly_summary(current_week)
         if current_summary:
             avg_weight = weight_from_kg(current_summary.avg_weight_kg, weight_unit)
             if track_waist and current_summary.avg_waist_cm is not None:
@@ -641,14 +626,12 @@ class DashboardWidget(QWidget):
         else:
             self.summary_label.setText("This week: no entries yet")
 
-        last_completed_weeks = [week for week in summary_by_week if week < current_week]
-        if not last_completed_weeks:
+        last_week = aggregates.previous_week(current_week)
+        if last_week is None:
             self.delta_label.setText("Last completed week: --")
             return
-        last_week = max(last_completed_weeks)
-        last_summary = summary_by_week[last_week]
-        deltas = {delta.week_start_date_local: delta for delta in compute_weekly_deltas(summaries)}
-        delta = deltas.get(last_week)
+        last_summary = aggregates.weekly_summary(last_week)
+        delta = aggregates.weekly_delta(last_week)
         delta_weight_kg = delta.delta_weight_kg if delta else None
         avg_weight = weight_from_kg(last_summary.avg_weight_kg, weight_unit)
         avg_waist = (
@@ -693,9 +676,8 @@ class DashboardWidget(QWidget):
         tolerance_minutes = 5
         weight_tol = 0.1
         waist_tol = 0.1
-        for entry in self.state.entries:
-            if entry.is_deleted:
-                continue
+        window = timedelta(minutes=tolerance_minutes)
+        for entry in self.state.timeline.range(measured_at - window, measured_at + window + timedelta(microseconds=1)):
             delta = abs((entry.measured_at - measured_at).total_seconds())
             if delta <= tolerance_minutes * 60:
                 if abs(entry.weight_kg - weight_kg) > weight_tol:
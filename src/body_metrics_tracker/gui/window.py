@@ -1,20 +1,54 @@
 from __future__ import annotations
 
-from PySide6.QtWidgets import QMainWindow, QTabWidget
+import logging
+import time
+from typing import Callable
 
-from .state import AppState
+from PySide6.QtCore import QTimer
+from PySide6.QtWidgets import QMainWindow, QMessageBox, QTabWidget, QVBoxLayout, QWidget
+
+from body_metrics_tracker import profiling
+from body_metrics_tracker.config import STARTUP_BUDGET_MS
+from body_metrics_tracker.storage import StorageError
+
+from .state import LOADING, AppState, StateChange, default_store_path
 from .history import HistoryWidget
 from .admin import AdminWidget
 from .friends import FriendsWidget
 from .profile import ProfileWidget
-from .trends import TrendsWidget
 from .widgets import DashboardWidget
 from ..resources import load_app_icon
 
+logger = logging.getLogger(__name__)
+
+
+class LazyTab(QWidget):
+    def __init__(self, factory: Callable[[], QWidget]) -> None:
+        super().__init__()
+        self._factory: Callable[[], QWidget] | None = factory
+        self._content: QWidget | None = None
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+    @property
+    def content(self) -> QWidget | None:
+        return self._content
+
+    def ensure_built(self) -> QWidget:
+        if self._content is None and self._factory is not None:
+            factory, self._factory = self._factory, None
+            self._content = factory()
+            self.layout().addWidget(self._content)
+        return self._content
+
 
 class MainWindow(QMainWindow):
-    def __init__(self, state: AppState) -> None:
+    def __init__(self, state: AppState, started_at: float | None = None) -> None:
         super().__init__()
+        self.state = state
+        self.startup_ms: float | None = None
+        self._started_at = started_at if started_at is not None else time.perf_counter()
+        self._shown = False
         self.setWindowTitle("Body Metrics Tracker")
         icon = load_app_icon()
         if icon is not None:
@@ -23,21 +57,72 @@ class MainWindow(QMainWindow):
         self.statusBar().showMessage("")
         tabs = QTabWidget()
         tabs.addTab(DashboardWidget(state), "Dashboard")
-        self._trends = TrendsWidget(state)
+        self._trends = LazyTab(self._build_trends)
         tabs.addTab(self._trends, "Trends")
-        tabs.addTab(HistoryWidget(state), "History")
-        tabs.addTab(FriendsWidget(state), "Friends")
-        tabs.addTab(ProfileWidget(state), "Profile")
+        tabs.addTab(LazyTab(lambda: HistoryWidget(state)), "History")
+        self._friends = LazyTab(lambda: FriendsWidget(state))
+        tabs.addTab(self._friends, "Friends")
+        tabs.addTab(LazyTab(lambda: ProfileWidget(state)), "Profile")
         if state.is_admin_profile():
-            tabs.addTab(AdminWidget(state), "Admin")
+            tabs.addTab(LazyTab(lambda: AdminWidget(state)), "Admin")
         tabs.currentChanged.connect(self._on_tab_changed)
         self.setCentralWidget(tabs)
+        state.subscribe(self._on_state_loaded, (LOADING,))
+
+    def showEvent(self, event) -> None:
+        super().showEvent(event)
+        if not self._shown:
+            self._shown = True
+            QTimer.singleShot(0, self._on_first_paint)
 
     def closeEvent(self, event) -> None:
+        try:
+            self.state.flush()
+        except StorageError as exc:
+            answer = QMessageBox.warning(
+                self,
+                "Save Failed",
+                f"Recent changes could not be saved: {exc}\n\nQuit anyway?",
+                QMessageBox.Yes | QMessageBox.No,
+                QMessageBox.No,
+            )
+            if answer != QMessageBox.Yes:
+                event.ignore()
+                return
         super().closeEvent(event)
 
+    def _build_trends(self) -> QWidget:
+        from .trends import TrendsWidget
+
+        return TrendsWidget(self.state)
+
+    def _on_first_paint(self) -> None:
+        self.startup_ms = (time.perf_counter() - self._started_at) * 1000.0
+        if STARTUP_BUDGET_MS and self.startup_ms > STARTUP_BUDGET_MS:
+            logger.warning("Startup took %.0f ms (budget %d ms)", self.startup_ms, STARTUP_BUDGET_MS)
+        if self.state.loading:
+            self.statusBar().showMessage("Loading history…")
+            self.state.start_loading()
+        with profiling.phase("friends tab"):
+            self._friends.ensure_built()
+        if not self.state.loading:
+            profiling.finish(default_store_path().parent)
+
+    def _on_state_loaded(self, _change: StateChange) -> None:
+        self.statusBar().clearMessage()
+        profiling.finish(default_store_path().parent)
+        if self.state.load_error:
+            QMessageBox.warning(
+                self,
+                "Load Incomplete",
+                f"Some stored data could not be loaded: {self.state.load_error}\n\n"
+                "Profile changes will not be saved until the app is restarted.",
+            )
+
     def _on_tab_changed(self, index: int) -> None:
-        if not hasattr(self, "_trends"):
+        page = self.centralWidget().widget(index)
+        if not isinstance(page, LazyTab):
             return
-        if self.centralWidget().widget(index) is self._trends:
-            self._trends.focus_today()
+        content = page.ensure_built()
+        if page is self._trends:
+            content.focus_today()
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import builtins
+import json
+import platform
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from importlib.util import resolve_name
+from pathlib import Path
+from typing import Any, ContextManager, Iterator
+
+from . import __version__
+from .config import PROFILE_STARTUP
+
+PHASE = "phase"
+IMPORT = "import"
+REPORT_NAME = "startup_profile.json"
+COLLAPSED_NAME = "startup_profile.folded"
+
+
+@dataclass
+class _Frame:
+    name: str
+    kind: str
+    wall_start: float
+    cpu_start: float
+    child_wall: float = 0.0
+    child_cpu: float = 0.0
+
+
+@dataclass
+class ProfileRecord:
+    name: str
+    kind: str
+    path: tuple[str, ...]
+    wall_ms: float
+    cpu_ms: float
+    self_wall_ms: float
+    self_cpu_ms: float
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "path": ";".join(self.path),
+            "wall_ms": round(self.wall_ms, 3),
+            "cpu_ms": round(self.cpu_ms, 3),
+            "self_wall_ms": round(self.self_wall_ms, 3),
+            "self_cpu_ms": round(self.self_cpu_ms, 3),
+        }
+
+
+@dataclass
+class StartupProfiler:
+    records: list[ProfileRecord] = field(default_factory=list)
+    _stacks: dict[int, list[_Frame]] = field(default_factory=dict)
+    _thread_id: int = field(default_factory=threading.get_ident)
+    _original_import: Any = None
+    _started_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    _process_cpu_start: float = 0.0
+    _process_cpu: float | None = None
+
+    def start(self) -> None:
+        self._process_cpu_start = time.process_time()
+        self._open("startup", PHASE)
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._import
+
+    def stop(self) -> None:
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+        for stack in self._stacks.values():
+            while stack:
+                self._close(stack)
+        if self._process_cpu is None:
+            self._process_cpu = time.process_time() - self._process_cpu_start
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        stack = self._stacks.setdefault(threading.get_ident(), [])
+        self._open(name, PHASE)
+        try:
+            yield
+        finally:
+            self._close(stack)
+
+    def report(self) -> dict[str, Any]:
+        root = next((record for record in self.records if len(record.path) == 1), None)
+        imports = sorted((r for r in self.records if r.kind == IMPORT), key=lambda r: r.wall_ms, reverse=True)
+        return {
+            "created_at": self._started_at.isoformat(),
+            "version": __version__,
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "frozen": bool(getattr(sys, "frozen", False)),
+            "total_wall_ms": round(root.wall_ms, 3) if root else None,
+            "total_cpu_ms": round(root.cpu_ms, 3) if root else None,
+            "process_cpu_ms": round(self._process_cpu * 1000.0, 3) if self._process_cpu is not None else None,
+            "phases": [record.to_dict() for record in self.records if record.kind == PHASE],
+            "imports": [record.to_dict() for record in imports],
+        }
+
+    def collapsed(self) -> list[str]:
+        totals: dict[str, int] = {}
+        for record in self.records:
+            key = ";".join(record.path)
+            totals[key] = totals.get(key, 0) + int(round(record.self_wall_ms * 1000))
+        return [f"{stack} {micros}" for stack, micros in sorted(totals.items()) if micros > 0]
+
+    def write(self, directory: Path) -> Path:
+        directory.mkdir(parents=True, exist_ok=True)
+        report_path = directory / REPORT_NAME
+        report_path.write_text(json.dumps(self.report(), indent=2), encoding="utf-8")
+        (directory / COLLAPSED_NAME).write_text("\n".join(self.collapsed()) + "\n", encoding="utf-8")
+        return report_path
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original_import
+        if threading.get_ident() != self._thread_id or original is None:
+            return original(name, globals, locals, fromlist, level)
+        module_name = _module_name(name, globals, level)
+        if module_name is None or _loaded(module_name, fromlist):
+            return original(name, globals, locals, fromlist, level)
+        self._open(module_name, IMPORT)
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            self._close(self._stacks[self._thread_id])
+
+    def _open(self, name: str, kind: str) -> None:
+        stack = self._stacks.setdefault(threading.get_ident(), [])
+        stack.append(_Frame(name, kind, time.perf_counter(), time.thread_time()))
+
+    def _close(self, stack: list[_Frame]) -> None:
+        frame = stack.pop()
+        wall = time.perf_counter() - frame.wall_start
+        cpu = time.thread_time() - frame.cpu_start
+        path = tuple(_label(item) for item in stack) + (_label(frame),)
+        if stack is not self._stacks.get(self._thread_id):
+            path = (threading.current_thread().name,) + path
+        self.records.append(
+            ProfileRecord(
+                name=frame.name,
+                kind=frame.kind,
+                path=path,
+                wall_ms=wall * 1000.0,
+                cpu_ms=cpu * 1000.0,
+                self_wall_ms=max(0.0, wall - frame.child_wall) * 1000.0,
+                self_cpu_ms=max(0.0, cpu - frame.child_cpu) * 1000.0,
+            )
+        )
+        if stack:
+            stack[-1].child_wall += wall
+            stack[-1].child_cpu += cpu
+
+
+_profiler: StartupProfiler | None = None
+
+
+def start() -> StartupProfiler | None:
+    global _profiler
+    if _profiler is None and PROFILE_STARTUP:
+        _profiler = StartupProfiler()
+        _profiler.start()
+    return _profiler
+
+
+def phase(name: str) -> ContextManager[None]:
+    if _profiler is None:
+        return nullcontext()
+    return _profiler.phase(name)
+
+
+def finish(directory: Path) -> Path | None:
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler is None:
+        return None
+    profiler.stop()
+    try:
+        return profiler.write(directory)
+    except OSError:
+        return None
+
+
+def _module_name(name: str, globals: dict[str, Any] | None, level: int) -> str | None:
+    if level == 0:
+        return name
+    package = (globals or {}).get("__package__")
+    if not package:
+        return None
+    try:
+        return resolve_name("." * level + name, package)
+    except (ImportError, ValueError):
+        return None
+
+
+def _loaded(module_name: str, fromlist) -> bool:
+    if module_name not in sys.modules:
+        return False
+    for item in fromlist or ():
+        if item != "*" and f"{module_name}.{item}" not in sys.modules and not hasattr(sys.modules[module_name], item):
+            return False
+    return True
+
+
+def _label(frame: _Frame) -> str:
+    return frame.name if frame.kind == PHASE else f"import {frame.name}"
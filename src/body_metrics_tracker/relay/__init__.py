@@ -10,6 +10,7 @@ from .client import (
     admin_merge_user,
     admin_delete_user,
     admin_restore_user,
+    close_connections,
     delete_reminder_schedule,
     fetch_inbox,
     fetch_history,
@@ -42,6 +43,7 @@ __all__ = [
     "admin_merge_user",
     "admin_delete_user",
     "admin_restore_user",
+    "close_connections",
     "delete_reminder_schedule",
     "fetch_inbox",
     "fetch_history",
@@ -0,0 +1,323 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import ssl
+import threading
+import time
+from typing import Any, Awaitable, Callable, Coroutine, TypeVar
+from urllib.parse import urlsplit
+from urllib.request import getproxies, proxy_bypass
+
+from . import client
+from .client import RelayError, RelayRequest, parse_response, prepare_request
+from .pool import IDEMPOTENT_METHODS, IDLE_TIMEOUT_SECONDS, MAX_IDLE_PER_HOST, REQUEST_TIMEOUT_SECONDS, HttpResponse
+
+MAX_CONCURRENCY = 8
+MAX_HEADER_BYTES = 64 * 1024
+
+T = TypeVar("T")
+
+_Key = tuple[str, str, int]
+_Stream = tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class StreamPool:
+    def __init__(self, max_idle_per_host: int = MAX_IDLE_PER_HOST, idle_timeout: float = IDLE_TIMEOUT_SECONDS) -> None:
+        self.max_idle_per_host = max_idle_per_host
+        self.idle_timeout = idle_timeout
+        self._idle: dict[_Key, list[tuple[_Stream, float]]] = {}
+        self._context: ssl.SSLContext | None = None
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        body: bytes | None = None,
+        headers: dict[str, str] | None = None,
+    ) -> HttpResponse:
+        parsed = urlsplit(url)
+        if parsed.scheme not in {"http", "https"} or not parsed.hostname:
+            raise ValueError(f"Unsupported URL: {url}")
+        key = (parsed.scheme, parsed.hostname, parsed.port or (443 if parsed.scheme == "https" else 80))
+        target = parsed.path or "/"
+        if parsed.query:
+            target = f"{target}?{parsed.query}"
+        head = {"Host": parsed.netloc, "Connection": "keep-alive", **(headers or {})}
+        if body is not None:
+            head["Content-Length"] = str(len(body))
+        stream, reused = await self._acquire(key)
+        while True:
+            sent = False
+            try:
+                await _send_request(stream, method, target, head, body)
+                sent = True
+                response, keep_alive = await _read_response(stream, method)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                _close(stream)
+                # A pooled stream the server already closed: retry once on a fresh one, but only
+                # when the server cannot have acted on the request or repeating it is harmless.
+                if reused and (not sent or method in IDEMPOTENT_METHODS):
+                    stream, reused = await self._connect(key), False
+                    continue
+                raise
+            except BaseException:
+                _close(stream)
+                raise
+            if keep_alive:
+                self._release(key, stream)
+            else:
+                _close(stream)
+            return response
+
+    def close(self) -> None:
+        idle, self._idle = self._idle, {}
+        for streams in idle.values():
+            for stream, _since in streams:
+                _close(stream)
+
+    def idle_count(self) -> int:
+        return sum(len(streams) for streams in self._idle.values())
+
+    async def _acquire(self, key: _Key) -> tuple[_Stream, bool]:
+        now = time.monotonic()
+        for pool_key, streams in list(self._idle.items()):
+            fresh = []
+            for stream, since in streams:
+                if now - since >= self.idle_timeout or stream[0].at_eof():
+                    _close(stream)
+                else:
+                    fresh.append((stream, since))
+            if fresh:
+                self._idle[pool_key] = fresh
+            else:
+                del self._idle[pool_key]
+        streams = self._idle.get(key)
+        if streams:
+            stream, _since = streams.pop()
+            return stream, True
+        return await self._connect(key), False
+
+    def _release(self, key: _Key, stream: _Stream) -> None:
+        streams = self._idle.setdefault(key, [])
+        if len(streams) < self.max_idle_per_host:
+            streams.append((stream, time.monotonic()))
+        else:
+            _close(stream)
+
+    async def _connect(self, key: _Key) -> _Stream:
+        scheme, host, port = key
+        context = self._ssl_context() if scheme == "https" else None
+        proxy = getproxies().get(scheme)
+        if not proxy or proxy_bypass(host):
+            return await asyncio.open_connection(host, port, ssl=context, server_hostname=host if context else None)
+        proxy_url = urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+        reader, writer = await asyncio.open_connection(proxy_url.hostname, proxy_url.port or 80)
+        try:
+            authority = f"{host}:{port}"
+            writer.write(f"CONNECT {authority} HTTP/1.1\r\nHost: {authority}\r\n\r\n".encode("latin-1"))
+            await writer.drain()
+            _version, status, reason, _headers = await _read_head(reader)
+            if status != 200:
+                raise OSError(f"Tunnel connection failed: {status} {reason}")
+            if context is not None:
+                await writer.start_tls(context, server_hostname=host)
+        except BaseException:
+            _close((reader, writer))
+            raise
+        return reader, writer
+
+    def _ssl_context(self) -> ssl.SSLContext:
+        if self._context is None:
+            self._context = ssl.create_default_context()
+        return self._context
+
+
+class AsyncRelayClient:
+    def __init__(
+        self,
+        max_concurrency: int = MAX_CONCURRENCY,
+        timeout: float = REQUEST_TIMEOUT_SECONDS,
+        pool: StreamPool | None = None,
+    ) -> None:
+        self.timeout = timeout
+        self._pool = pool or StreamPool()
+        self._slots = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def __aenter__(self) -> AsyncRelayClient:
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        self.close()
+
+    async def call(
+        self,
+        function: Callable[..., dict[str, Any]],
+        *args: Any,
+        timeout: float | None = None,
+        **kwargs: Any,
+    ) -> dict[str, Any]:
+        request = prepare_request(function, *args, **kwargs)
+        limit = self.timeout if timeout is None else timeout
+        async with self._slots:
+            try:
+                response = await asyncio.wait_for(self._send(request), limit)
+            except asyncio.TimeoutError as exc:
+                raise RelayError(f"Relay request timed out after {limit:g}s.") from exc
+        return parse_response(response)
+
+    def close(self) -> None:
+        self._pool.close()
+
+    async def _send(self, request: RelayRequest) -> HttpResponse:
+        try:
+            compressed = request.compressed()
+            if compressed is None:
+                return await self._pool.request(request.method, request.url, request.body, request.headers)
+            response = await self._pool.request(compressed.method, compressed.url, compressed.body, compressed.headers)
+            if request.plain_retry_needed(response):
+                response = await self._pool.request(request.method, request.url, request.body, request.headers)
+                request.plain_succeeded(response)
+            return response
+        except Exception as exc:
+            raise RelayError(str(exc)) from exc
+
+
+class RelayClient:
+    def __init__(self, max_concurrency: int = MAX_CONCURRENCY, timeout: float = REQUEST_TIMEOUT_SECONDS) -> None:
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="relay-aio", daemon=True)
+        self._thread.start()
+        self.client = self.run(_create_client(max_concurrency, timeout))
+
+    def __enter__(self) -> RelayClient:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def run(self, coroutine: Coroutine[Any, Any, T]) -> T:
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def call(
+        self,
+        function: Callable[..., dict[str, Any]],
+        *args: Any,
+        timeout: float | None = None,
+        **kwargs: Any,
+    ) -> dict[str, Any]:
+        return self.run(self.client.call(function, *args, timeout=timeout, **kwargs))
+
+    def close(self) -> None:
+        if self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(self.client.close)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+def _async_call(function: Callable[..., dict[str, Any]]) -> Callable[..., Awaitable[dict[str, Any]]]:
+    @functools.wraps(function)
+    async def method(self: AsyncRelayClient, *args: Any, timeout: float | None = None, **kwargs: Any) -> dict[str, Any]:
+        return await self.call(function, *args, timeout=timeout, **kwargs)
+
+    return method
+
+
+def _blocking_call(function: Callable[..., dict[str, Any]]) -> Callable[..., dict[str, Any]]:
+    @functools.wraps(function)
+    def method(self: RelayClient, *args: Any, timeout: float | None = None, **kwargs: Any) -> dict[str, Any]:
+        return self.call(function, *args, timeout=timeout, **kwargs)
+
+    return method
+
+
+for _name in client.RELAY_CALLS:
+    setattr(AsyncRelayClient, _name, _async_call(getattr(client, _name)))
+    setattr(RelayClient, _name, _blocking_call(getattr(client, _name)))
+del _name
+
+
+async def _create_client(max_concurrency: int, timeout: float) -> AsyncRelayClient:
+    return AsyncRelayClient(max_concurrency=max_concurrency, timeout=timeout)
+
+
+async def _send_request(
+    stream: _Stream,
+    method: str,
+    target: str,
+    headers: dict[str, str],
+    body: bytes | None,
+) -> None:
+    writer = stream[1]
+    lines = [f"{method} {target} HTTP/1.1"] + [f"{name}: {value}" for name, value in headers.items()]
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+    if body:
+        writer.write(body)
+    await writer.drain()
+
+
+async def _read_response(stream: _Stream, method: str) -> tuple[HttpResponse, bool]:
+    reader = stream[0]
+    while True:
+        version, status, reason, response_headers = await _read_head(reader)
+        if status >= 200:
+            break
+    tokens = {token.strip() for token in response_headers.get("connection", "").lower().split(",")}
+    # HTTP/1.1 connections persist unless closed; anything older only when it opts in.
+    keep_alive = "close" not in tokens if version == "HTTP/1.1" else "keep-alive" in tokens
+    if method == "HEAD" or status in {204, 304}:
+        payload = b""
+    elif "chunked" in response_headers.get("transfer-encoding", "").lower():
+        payload = await _read_chunked(reader)
+    elif "content-length" in response_headers:
+        payload = await reader.readexactly(int(response_headers["content-length"]))
+    else:
+        payload = await reader.read()
+        keep_alive = False
+    response = HttpResponse(status=status, reason=reason, body=payload, headers=response_headers)
+    return response, keep_alive
+
+
+async def _read_head(reader: asyncio.StreamReader) -> tuple[str, int, str, dict[str, str]]:
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as exc:
+        if not exc.partial:
+            raise ConnectionResetError("Remote end closed connection without response") from exc
+        raise
+    except asyncio.LimitOverrunError as exc:
+        raise OSError("Response headers too large") from exc
+    if len(head) > MAX_HEADER_BYTES:
+        raise OSError("Response headers too large")
+    status_line, *lines = head.decode("latin-1").split("\r\n")
+    parts = status_line.split(" ", 2)
+    if len(parts) < 2 or not parts[0].startswith("HTTP/") or not parts[1].isdigit():
+        raise OSError(f"Malformed status line: {status_line!r}")
+    headers: dict[str, str] = {}
+    for line in lines:
+        if not line:
+            continue
+        name, _, value = line.partition(":")
+        key = name.strip().lower()
+        value = value.strip()
+        headers[key] = f"{headers[key]}, {value}" if key in headers else value
+    return parts[0], int(parts[1]), parts[2] if len(parts) > 2 else "", headers
+
+
+async def _read_chunked(reader: asyncio.StreamReader) -> bytes:
+    chunks = []
+    while True:
+        size_line = await reader.readuntil(b"\r\n")
+        size = int(size_line.split(b";", 1)[0].strip(), 16)
+        if size == 0:
+            while (await reader.readuntil(b"\r\n")) != b"\r\n":
+                pass
+            return b"".join(chunks)
+        chunks.append(await reader.readexactly(size))
+        await reader.readexactly(2)
+
+
+def _close(stream: _Stream) -> None:
+    stream[1].close()
@@ -1,19 +1,29 @@
 from __future__ import annotations
 
+import gzip
 import json
 import os
-from dataclasses import dataclass
+import zlib
+from contextvars import ContextVar
+from dataclasses import dataclass, replace
 from datetime import date, datetime
-from typing import Any
-from urllib.error import HTTPError
+from typing import Any, Callable
 from urllib.parse import urlencode, urljoin, urlparse
-from urllib.request import Request, urlopen
+
+from .pool import ConnectionPool, HttpResponse
 
 
 class RelayError(RuntimeError):
     pass
 
 
+GZIP_MIN_BYTES = 1024
+
+_pool = ConnectionPool()
+_gzip_unsupported: set[str] = set()
+_prepared: ContextVar[list[RelayRequest] | None] = ContextVar("relay_prepared", default=None)
+
+
 @dataclass(frozen=True)
 class RelayConfig:
     base_url: str
@@ -225,6 +235,93 @@ def admin_merge_user(config: AdminRelayConfig, target_user_id: str, source_user_
     )
 
 
+RELAY_CALLS = (
+    "register",
+    "update_profile",
+    "fetch_profile_settings",
+    "update_profile_settings",
+    "send_invite",
+    "accept_invite",
+    "fetch_inbox",
+    "update_share_settings",
+    "push_history",
+    "fetch_history",
+    "fetch_self_history",
+    "remove_friend",
+    "post_status",
+    "send_reminder",
+    "list_reminder_schedules",
+    "upsert_reminder_schedule",
+    "delete_reminder_schedule",
+    "admin_list_users",
+    "admin_fetch_user",
+    "admin_fetch_entries",
+    "admin_restore_user",
+    "admin_generate_recovery",
+    "admin_delete_user",
+    "admin_merge_user",
+)
+
+
+@dataclass(frozen=True)
+class RelayRequest:
+    method: str
+    url: str
+    headers: dict[str, str]
+    body: bytes | None = None
+
+    @property
+    def origin(self) -> str:
+        parsed = urlparse(self.url)
+        return f"{parsed.scheme}://{parsed.netloc}"
+
+    def compressed(self) -> RelayRequest | None:
+        if self.body is None or len(self.body) < GZIP_MIN_BYTES or self.origin in _gzip_unsupported:
+            return None
+        headers = {**self.headers, "Content-Encoding": "gzip"}
+        return replace(self, headers=headers, body=gzip.compress(self.body, mtime=0))
+
+    def plain_retry_needed(self, response: HttpResponse) -> bool:
+        # Relays deployed before request compression reject the body; it is resent plain.
+        return response.status in {400, 415}
+
+    def plain_succeeded(self, response: HttpResponse) -> None:
+        if response.status < 400:
+            _gzip_unsupported.add(self.origin)
+
+
+def prepare_request(function: Callable[..., dict[str, Any]], *args: Any, **kwargs: Any) -> RelayRequest:
+    sink: list[RelayRequest] = []
+    token = _prepared.set(sink)
+    try:
+        function(*args, **kwargs)
+    finally:
+        _prepared.reset(token)
+    if len(sink) != 1:
+        raise RelayError(f"{getattr(function, '__name__', function)} is not a relay call.")
+    return sink[0]
+
+
+def parse_response(response: HttpResponse) -> dict[str, Any]:
+    try:
+        body = _decode_body(response)
+    except Exception as exc:
+        raise RelayError(str(exc)) from exc
+    if response.status >= 400:
+        raise RelayError(_error_message(response, body))
+    try:
+        raw = body.decode("utf-8")
+        if not raw:
+            return {}
+        return json.loads(raw)
+    except Exception as exc:
+        raise RelayError(str(exc)) from exc
+
+
+def close_connections() -> None:
+    _pool.close()
+
+
 def _request_json(
     base_url: str,
     path: str,
@@ -236,42 +333,69 @@ def _request_json(
 ) -> dict[str, Any]:
     url = _join_url(base_url, path)
     _ensure_https(url)
-    headers = {"Accept": "application/json"}
+    headers = {"Accept": "application/json", "Accept-Encoding": "gzip, deflate"}
     data = None
     if payload is not None:
-        data = json.dumps(payload).encode("utf-8")
+        data = json.dumps(payload, separators=(",", ":")).encode("utf-8")
         headers["Content-Type"] = "application/json"
     if token:
         headers["Authorization"] = f"Bearer {token}"
     if extra_headers:
         headers.update(extra_headers)
-    request = Request(url, method=method, headers=headers, data=data)
+    request = RelayRequest(method, url, headers, data)
+    sink = _prepared.get()
+    if sink is not None:
+        sink.append(request)
+        return {}
+    return parse_response(_send(request))
+
+
+def _send(request: RelayRequest) -> HttpResponse:
     try:
-        with urlopen(request, timeout=10) as response:
-            raw = response.read().decode("utf-8")
-            if not raw:
-                return {}
-            return json.loads(raw)
-    except HTTPError as exc:
-        detail = ""
-        try:
-            raw = exc.read().decode("utf-8")
-            if raw:
-                payload = json.loads(raw)
-                if isinstance(payload, dict) and payload.get("error"):
-                    detail = str(payload["error"])
-                else:
-                    detail = raw.strip()
-        except Exception:
-            detail = ""
-        message = f"HTTP {exc.code}: {exc.reason}"
-        if detail:
-            message = f"{message} ({detail})"
-        raise RelayError(message) from exc
+        compressed = request.compressed()
+        if compressed is None:
+            return _pool.request(request.method, request.url, body=request.body, headers=request.headers)
+        response = _pool.request(compressed.method, compressed.url, body=compressed.body, headers=compressed.headers)
+        if request.plain_retry_needed(response):
+            response = _pool.request(request.method, request.url, body=request.body, headers=request.headers)
+            request.plain_succeeded(response)
+        return response
     except Exception as exc:
         raise RelayError(str(exc)) from exc
 
 
+def _decode_body(response: HttpResponse) -> bytes:
+    encoding = response.headers.get("content-encoding", "").strip().lower()
+    if not encoding or encoding == "identity" or not response.body:
+        return response.body
+    if encoding in {"gzip", "x-gzip"}:
+        return gzip.decompress(response.body)
+    if encoding == "deflate":
+        try:
+            return zlib.decompress(response.body)
+        except zlib.error:
+            return zlib.decompress(response.body, -zlib.MAX_WBITS)
+    raise RelayError(f"Unsupported response encoding: {encoding}")
+
+
+def _error_message(response: HttpResponse, body: bytes) -> str:
+    detail = ""
+    try:
+        raw = body.decode("utf-8")
+        if raw:
+            payload = json.loads(raw)
+            if isinstance(payload, dict) and payload.get("error"):
+                detail = str(payload["error"])
+            else:
+                detail = raw.strip()
+    except Exception:
+        detail = ""
+    message = f"HTTP {response.status}: {response.reason}"
+    if detail:
+        message = f"{message} ({detail})"
+    return message
+
+
 def _join_url(base_url: str, path: str) -> str:
     if not base_url:
         raise RelayError("Relay URL is required.")
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import http.client
+import select
+import ssl
+import threading
+import time
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+from urllib.request import getproxies, proxy_bypass
+
+IDLE_TIMEOUT_SECONDS = 60.0
+MAX_IDLE_PER_HOST = 4
+REQUEST_TIMEOUT_SECONDS = 10.0
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+_STALE_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, ConnectionAbortedError, BrokenPipeError)
+
+
+@dataclass(frozen=True)
+class HttpResponse:
+    status: int
+    reason: str
+    body: bytes
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+class ConnectionPool:
+    def __init__(
+        self,
+        max_idle_per_host: int = MAX_IDLE_PER_HOST,
+        idle_timeout: float = IDLE_TIMEOUT_SECONDS,
+        timeout: float = REQUEST_TIMEOUT_SECONDS,
+    ) -> None:
+        self.max_idle_per_host = max_idle_per_host
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._idle: dict[tuple[str, str, int], list[tuple[http.client.HTTPConnection, float]]] = {}
+        self._context: ssl.SSLContext | None = None
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        body: bytes | None = None,
+        headers: dict[str, str] | None = None,
+    ) -> HttpResponse:
+        parsed = urlsplit(url)
+        if parsed.scheme not in {"http", "https"} or not parsed.hostname:
+            raise ValueError(f"Unsupported URL: {url}")
+        key = (parsed.scheme, parsed.hostname, parsed.port or (443 if parsed.scheme == "https" else 80))
+        target = parsed.path or "/"
+        if parsed.query:
+            target = f"{target}?{parsed.query}"
+        connection, reused = self._acquire(key)
+        while True:
+            sent = False
+            try:
+                connection.request(method, target, body=body, headers=headers or {})
+                sent = True
+                response = connection.getresponse()
+                payload = response.read()
+            except _STALE_ERRORS:
+                connection.close()
+                # A pooled connection the server already closed: retry once on a fresh one, but only
+                # when the server cannot have acted on the request or repeating it is harmless.
+                if reused and (not sent or method in IDEMPOTENT_METHODS):
+                    connection, reused = self._connect(key), False
+                    continue
+                raise
+            except BaseException:
+                connection.close()
+                raise
+            if response.will_close:
+                connection.close()
+            else:
+                self._release(key, connection)
+            return HttpResponse(
+                status=response.status,
+                reason=response.reason,
+                body=payload,
+                headers={name.lower(): value for name, value in response.getheaders()},
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection, _since in connections:
+                connection.close()
+
+    def idle_count(self) -> int:
+        with self._lock:
+            return sum(len(connections) for connections in self._idle.values())
+
+    def _acquire(self, key: tuple[str, str, int]) -> tuple[http.client.HTTPConnection, bool]:
+        now = time.monotonic()
+        expired = []
+        connection = None
+        with self._lock:
+            for pool_key, connections in list(self._idle.items()):
+                fresh = []
+                for item, since in connections:
+                    if now - since >= self.idle_timeout or _dropped(item):
+                        expired.append(item)
+                    else:
+                        fresh.append((item, since))
+                if fresh:
+                    self._idle[pool_key] = fresh
+                else:
+                    del self._idle[pool_key]
+            connections = self._idle.get(key)
+            if connections:
+                connection, _since = connections.pop()
+        for item in expired:
+            item.close()
+        if connection is not None:
+            return connection, True
+        return self._connect(key), False
+
+    def _release(self, key: tuple[str, str, int], connection: http.client.HTTPConnection) -> None:
+        with self._lock:
+            connections = self._idle.setdefault(key, [])
+            if len(connections) < self.max_idle_per_host:
+                connections.append((connection, time.monotonic()))
+                return
+        connection.close()
+
+    def _connect(self, key: tuple[str, str, int]) -> http.client.HTTPConnection:
+        scheme, host, port = key
+        proxy = getproxies().get(scheme)
+        if proxy and not proxy_bypass(host):
+            proxy_url = urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+            connect_host, connect_port = proxy_url.hostname, proxy_url.port or 80
+        else:
+            proxy_url = None
+            connect_host, connect_port = host, port
+        if scheme == "https":
+            connection: http.client.HTTPConnection = http.client.HTTPSConnection(
+                connect_host, connect_port, timeout=self.timeout, context=self._ssl_context()
+            )
+        else:
+            connection = http.client.HTTPConnection(connect_host, connect_port, timeout=self.timeout)
+        if proxy_url is not None:
+            connection.set_tunnel(host, port)
+        return connection
+
+    def _ssl_context(self) -> ssl.SSLContext:
+        with self._lock:
+            if self._context is None:
+                self._context = ssl.create_default_context()
+            return self._context
+
+
+def _dropped(connection: http.client.HTTPConnection) -> bool:
+    # An idle keep-alive socket only becomes readable when the server has closed it.
+    if connection.sock is None:
+        return True
+    try:
+        readable, _writable, _errors = select.select([connection.sock], [], [], 0)
+    except (OSError, ValueError):
+        return True
+    return bool(readable)
@@ -1,4 +1,28 @@
-from .crypto import StorageError
-from .store import LocalStore, LocalStoreData
+from .crypto import SessionKey, StorageError
+from .store import (
+    PROFILE_OPS,
+    DeferredLoad,
+    EntryView,
+    JournalRecord,
+    LoadChunk,
+    LocalStore,
+    LocalStoreData,
+    ProfileJournal,
+)
+from .snapshot import StoreSnapshot
+from .writer import WriteBehindWriter
 
-__all__ = ["LocalStore", "LocalStoreData", "StorageError"]
+__all__ = [
+    "PROFILE_OPS",
+    "DeferredLoad",
+    "EntryView",
+    "JournalRecord",
+    "LoadChunk",
+    "LocalStore",
+    "LocalStoreData",
+    "ProfileJournal",
+    "SessionKey",
+    "StorageError",
+    "StoreSnapshot",
+    "WriteBehindWriter",
+]
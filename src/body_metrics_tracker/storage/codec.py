@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from dataclasses import replace
 from datetime import date, datetime
 from typing import Any
 from uuid import UUID, uuid4
@@ -95,6 +96,14 @@ def encode_admin_config(config: AdminConfig) -> dict[str, Any]:
     }
 
 
+def encode_profile_fields(profile: UserProfile) -> dict[str, Any]:
+    # Avatars and shared entries are journaled on their own; see ProfileJournal.
+    payload = encode_profile(replace(profile, avatar_b64=None, friends=[]))
+    del payload["avatar_b64"]
+    payload["friends"] = [encode_friend_fields(friend) for friend in profile.friends]
+    return payload
+
+
 def decode_profile(payload: dict[str, Any]) -> UserProfile:
     reminders_payload = payload.get("self_reminders")
     if isinstance(reminders_payload, list):
@@ -251,6 +260,12 @@ def encode_friend(friend: FriendLink) -> dict[str, Any]:
     }
 
 
+def encode_friend_fields(friend: FriendLink) -> dict[str, Any]:
+    payload = encode_friend(replace(friend, avatar_b64=None, shared_entries=[]))
+    del payload["avatar_b64"], payload["shared_entries"]
+    return payload
+
+
 def decode_friend(payload: dict[str, Any]) -> FriendLink:
     created_at = payload.get("created_at")
     status = payload.get("status", "invited")
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
 import base64
+import json
 import secrets
+import struct
+from dataclasses import dataclass, field
 from typing import Any
 
 from cryptography.exceptions import InvalidTag
@@ -13,12 +16,78 @@ AAD = b"body-metrics-tracker"
 DEFAULT_KDF_ITERATIONS = 310_000
 SALT_BYTES = 16
 NONCE_BYTES = 12
+CONTAINER_VERSION = 3
+SUPPORTED_CONTAINER_VERSIONS = {1, 2, 3}
+CONTAINER_MAGIC = b"BMTS"
+KDF_PBKDF2_SHA256 = 1
+CIPHER_AES_256_GCM = 1
+TAG_BYTES = 16
+CONTAINER_HEADER = struct.Struct(">4sBBBBIBQ")
 
 
 class StorageError(RuntimeError):
     pass
 
 
+@dataclass(frozen=True)
+class Container:
+    version: int
+    salt: bytes
+    iterations: int
+    nonce: bytes
+    ciphertext: bytes | memoryview = field(repr=False)
+    aad: bytes = AAD
+
+    def header(self) -> bytes:
+        return container_header(self.salt, self.iterations, self.nonce, len(self.ciphertext))
+
+    def chunks(self) -> tuple[bytes, bytes, bytes, bytes | memoryview]:
+        if self.version != CONTAINER_VERSION:
+            raise StorageError(f"Cannot write container version {self.version}")
+        return self.header(), self.salt, self.nonce, self.ciphertext
+
+
+@dataclass(frozen=True)
+class SessionKey:
+    key: bytes = field(repr=False)
+    salt: bytes
+    iterations: int
+
+    @classmethod
+    def derive(
+        cls,
+        passphrase: str,
+        salt: bytes | None = None,
+        iterations: int = DEFAULT_KDF_ITERATIONS,
+    ) -> "SessionKey":
+        if salt is None:
+            salt = secrets.token_bytes(SALT_BYTES)
+        return cls(key=derive_key(passphrase, salt, iterations), salt=salt, iterations=iterations)
+
+    def encrypt(self, plaintext: bytes) -> Container:
+        nonce = secrets.token_bytes(NONCE_BYTES)
+        aad = AAD + container_header(self.salt, self.iterations, nonce, len(plaintext) + TAG_BYTES)
+        ciphertext = AESGCM(self.key).encrypt(nonce, plaintext, aad)
+        return Container(CONTAINER_VERSION, self.salt, self.iterations, nonce, ciphertext, aad)
+
+    def seal(self, plaintext: bytes, aad: bytes) -> bytes:
+        nonce = secrets.token_bytes(NONCE_BYTES)
+        return nonce + AESGCM(self.key).encrypt(nonce, plaintext, AAD + aad)
+
+    def unseal(self, sealed: bytes, aad: bytes) -> bytes:
+        if len(sealed) <= NONCE_BYTES:
+            raise StorageError("Sealed record is truncated")
+        try:
+            return AESGCM(self.key).decrypt(sealed[:NONCE_BYTES], sealed[NONCE_BYTES:], AAD + aad)
+        except InvalidTag as exc:
+            raise StorageError("Sealed record failed authentication") from exc
+
+    def decrypt(self, container: Container) -> bytes:
+        if container.salt != self.salt or container.iterations != self.iterations:
+            raise StorageError("Encrypted store was sealed with a different key")
+        return _open(self.key, container.nonce, container.ciphertext, container.aad)
+
+
 def _b64encode(raw: bytes) -> str:
     return base64.b64encode(raw).decode("ascii")
 
@@ -60,6 +129,62 @@ def encrypt_bytes(plaintext: bytes, passphrase: str, iterations: int = DEFAULT_K
 
 
 def decrypt_bytes(container: dict[str, Any], passphrase: str) -> bytes:
+    parsed = _parse_container(container)
+    key = derive_key(passphrase, parsed.salt, parsed.iterations)
+    return _open(key, parsed.nonce, parsed.ciphertext, parsed.aad)
+
+
+def unlock_container(container: Container, passphrase: str) -> SessionKey:
+    return SessionKey.derive(passphrase, salt=container.salt, iterations=container.iterations)
+
+
+def container_header(salt: bytes, iterations: int, nonce: bytes, ciphertext_size: int) -> bytes:
+    return CONTAINER_HEADER.pack(
+        CONTAINER_MAGIC,
+        CONTAINER_VERSION,
+        KDF_PBKDF2_SHA256,
+        CIPHER_AES_256_GCM,
+        len(salt),
+        iterations,
+        len(nonce),
+        ciphertext_size,
+    )
+
+
+def container_size(header: bytes | memoryview) -> int:
+    _magic, _version, _kdf, _cipher, salt_size, _iterations, nonce_size, ciphertext_size = CONTAINER_HEADER.unpack(
+        header
+    )
+    return CONTAINER_HEADER.size + salt_size + nonce_size + ciphertext_size
+
+
+def parse_container(raw: bytes | memoryview) -> Container:
+    view = memoryview(raw)
+    if view[: len(CONTAINER_MAGIC)] != CONTAINER_MAGIC:
+        try:
+            return _parse_container(json.loads(bytes(view)))
+        except (ValueError, UnicodeDecodeError) as exc:
+            raise StorageError("Encrypted store is not a recognised container") from exc
+    if len(view) < CONTAINER_HEADER.size:
+        raise StorageError("Encrypted store is truncated")
+    header = view[: CONTAINER_HEADER.size]
+    _magic, version, kdf, cipher, salt_size, iterations, nonce_size, ciphertext_size = CONTAINER_HEADER.unpack(header)
+    if version != CONTAINER_VERSION:
+        raise StorageError(f"Unsupported container version: {version}")
+    if kdf != KDF_PBKDF2_SHA256 or cipher != CIPHER_AES_256_GCM:
+        raise StorageError("Unsupported encryption parameters")
+    offset = CONTAINER_HEADER.size
+    salt = bytes(view[offset : offset + salt_size])
+    offset += salt_size
+    nonce = bytes(view[offset : offset + nonce_size])
+    offset += nonce_size
+    ciphertext = view[offset : offset + ciphertext_size]
+    if len(ciphertext) != ciphertext_size:
+        raise StorageError("Encrypted store is truncated")
+    return Container(version, salt, iterations, nonce, ciphertext, AAD + bytes(header))
+
+
+def _parse_container(container: dict[str, Any]) -> Container:
     try:
         version = int(container["version"])
         kdf = container["kdf"]
@@ -67,7 +192,7 @@ def decrypt_bytes(container: dict[str, Any], passphrase: str) -> bytes:
     except (KeyError, TypeError, ValueError) as exc:
         raise StorageError("Invalid encrypted container format") from exc
 
-    if version != 1:
+    if version not in SUPPORTED_CONTAINER_VERSIONS or version == CONTAINER_VERSION:
         raise StorageError(f"Unsupported container version: {version}")
 
     kdf_name = kdf.get("name")
@@ -82,10 +207,11 @@ def decrypt_bytes(container: dict[str, Any], passphrase: str) -> bytes:
         ciphertext = _b64decode(cipher["ciphertext"])
     except (KeyError, ValueError, TypeError) as exc:
         raise StorageError("Invalid encryption parameters") from exc
+    return Container(version, salt, iterations, nonce, ciphertext)
 
-    key = derive_key(passphrase, salt, iterations)
+
+def _open(key: bytes, nonce: bytes, ciphertext: bytes | memoryview, aad: bytes) -> bytes:
     try:
-        return AESGCM(key).decrypt(nonce, ciphertext, AAD)
+        return AESGCM(key).decrypt(nonce, ciphertext, aad)
     except InvalidTag as exc:
         raise StorageError("Incorrect passphrase or corrupted data") from exc
-
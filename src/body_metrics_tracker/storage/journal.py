@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import os
+import secrets
+import struct
+import tempfile
+import time
+from pathlib import Path
+
+from .crypto import SessionKey, StorageError
+
+JOURNAL_MAGIC = b"BMTJ"
+JOURNAL_VERSION = 1
+JOURNAL_ID_BYTES = 16
+_HEADER = struct.Struct(">4sB16sd")
+_LENGTH = struct.Struct(">I")
+_SEQUENCE = struct.Struct(">Q")
+
+
+def new_journal_id() -> bytes:
+    return secrets.token_bytes(JOURNAL_ID_BYTES)
+
+
+class Journal:
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.journal_id: bytes | None = None
+        self.created_at = 0.0
+        self.size = 0
+        self.count = 0
+
+    def reset(self, journal_id: bytes) -> None:
+        created_at = time.time()
+        header = _HEADER.pack(JOURNAL_MAGIC, JOURNAL_VERSION, journal_id, created_at)
+        directory = self.path.parent
+        directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=self.path.name, dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(header)
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(tmp_path, self.path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self.journal_id = journal_id
+        self.created_at = created_at
+        self.size = len(header)
+        self.count = 0
+
+    def append(self, key: SessionKey, payloads: list[bytes]) -> None:
+        if self.journal_id is None:
+            raise StorageError("Journal is not open")
+        chunks = []
+        for payload in payloads:
+            sealed = key.seal(payload, self._aad(self.count + len(chunks)))
+            chunks.append(_LENGTH.pack(len(sealed)) + sealed)
+        blob = memoryview(b"".join(chunks))
+        # Unbuffered, so nothing left in a buffer can be flushed after the truncate below.
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | getattr(os, "O_BINARY", 0))
+        try:
+            try:
+                written = 0
+                while written < len(blob):
+                    written += os.write(fd, blob[written:])
+                os.fsync(fd)
+            except BaseException:
+                # Replay stops at a torn record, so cut it off before the batch is retried.
+                os.ftruncate(fd, self.size)
+                os.fsync(fd)
+                raise
+        finally:
+            os.close(fd)
+        self.size += len(blob)
+        self.count += len(chunks)
+
+    def replay(self, key: SessionKey, journal_id: bytes) -> list[bytes]:
+        self.journal_id = None
+        self.created_at = 0.0
+        self.size = 0
+        self.count = 0
+        try:
+            raw = self.path.read_bytes()
+        except FileNotFoundError:
+            return []
+        if len(raw) < _HEADER.size:
+            return []
+        magic, version, file_id, created_at = _HEADER.unpack_from(raw, 0)
+        if magic != JOURNAL_MAGIC or version != JOURNAL_VERSION or file_id != journal_id:
+            return []
+        self.journal_id = journal_id
+        self.created_at = created_at
+        payloads: list[bytes] = []
+        offset = _HEADER.size
+        while offset + _LENGTH.size <= len(raw):
+            (length,) = _LENGTH.unpack_from(raw, offset)
+            end = offset + _LENGTH.size + length
+            if end > len(raw):
+                break
+            try:
+                payloads.append(key.unseal(raw[offset + _LENGTH.size : end], self._aad(len(payloads))))
+            except StorageError:
+                break
+            offset = end
+        if offset != len(raw):
+            self._truncate(offset)
+        self.size = offset
+        self.count = len(payloads)
+        return payloads
+
+    def age(self) -> float:
+        if self.journal_id is None:
+            return 0.0
+        return max(0.0, time.time() - self.created_at)
+
+    def _aad(self, sequence: int) -> bytes:
+        return b"journal" + (self.journal_id or b"") + _SEQUENCE.pack(sequence)
+
+    def _truncate(self, length: int) -> None:
+        with self.path.open("r+b") as handle:
+            handle.truncate(length)
+            handle.flush()
+            os.fsync(handle.fileno())
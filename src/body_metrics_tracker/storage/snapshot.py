@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+from body_metrics_tracker.core.models import AdminConfig, FriendLink, MeasurementEntry, ReminderRule, UserProfile
+
+from .codec import encode_admin_config, encode_entry, encode_profile
+
+
+@dataclass(frozen=True)
+class StoreSnapshot:
+    schema_version: int
+    last_modified: datetime
+    profiles: tuple[UserProfile, ...]
+    entries: tuple[MeasurementEntry, ...]
+    active_profile_id: UUID | None
+    admin_config: AdminConfig | None
+
+    def to_payload(self) -> dict[str, Any]:
+        return {
+            "schema_version": self.schema_version,
+            "last_modified": self.last_modified.isoformat(),
+            "profiles": [encode_profile(profile) for profile in self.profiles],
+            "entries": [encode_entry(entry) for entry in self.entries],
+            "active_profile_id": str(self.active_profile_id) if self.active_profile_id else None,
+            "admin_config": encode_admin_config(self.admin_config) if self.admin_config else None,
+        }
+
+
+def freeze_profile(profile: UserProfile) -> UserProfile:
+    return replace(
+        profile,
+        friends=tuple(freeze_friend(friend) for friend in profile.friends),
+        self_reminders=tuple(freeze_reminder(rule) for rule in profile.self_reminders),
+    )
+
+
+def freeze_friend(friend: FriendLink) -> FriendLink:
+    # SharedEntry objects are replaced rather than edited, so the list itself is all that needs copying.
+    return replace(friend, shared_entries=tuple(friend.shared_entries))
+
+
+def freeze_reminder(rule: ReminderRule) -> ReminderRule:
+    return replace(rule, days=tuple(rule.days))
+
+
+def thaw_profile(profile: UserProfile) -> UserProfile:
+    return replace(
+        profile,
+        friends=[replace(friend, shared_entries=list(friend.shared_entries)) for friend in profile.friends],
+        self_reminders=[replace(rule, days=list(rule.days)) for rule in profile.self_reminders],
+    )
@@ -1,27 +1,197 @@
 from __future__ import annotations
 
 import json
+import mmap
 import os
 import tempfile
-from dataclasses import dataclass, field
+from collections.abc import Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Iterable
+from typing import Any, Iterable, Iterator, overload
 from uuid import UUID
 
-from body_metrics_tracker.core.models import AdminConfig, MeasurementEntry, UserProfile, utc_now
+from body_metrics_tracker import profiling
+from body_metrics_tracker.core.aggregation import AggregateEngine
+from body_metrics_tracker.core.models import (
+    AdminConfig,
+    FriendLink,
+    MeasurementEntry,
+    SharedEntry,
+    UserProfile,
+    utc_now,
+)
+from body_metrics_tracker.core.timeline import EntryTimeline
 
 from .codec import (
     decode_admin_config,
     decode_entry,
     decode_profile,
+    decode_shared_entry,
     encode_admin_config,
     encode_entry,
-    encode_profile,
+    encode_profile_fields,
+    encode_shared_entry,
 )
-from .crypto import StorageError, decrypt_bytes, encrypt_bytes
+from .crypto import CONTAINER_VERSION, Container, SessionKey, StorageError, parse_container, unlock_container
+from .journal import Journal, new_journal_id
+from .snapshot import StoreSnapshot, freeze_profile, thaw_profile
 
 SCHEMA_VERSION = 1
+JOURNAL_CHECKPOINT_BYTES = 512 * 1024
+JOURNAL_CHECKPOINT_SECONDS = 12 * 3600
+LOAD_CHUNK_SIZE = 2000
+# "profile" is the whole-profile record older journals still hold; it is replayed but no longer written.
+PROFILE_OPS = frozenset({"profile", "profile_fields", "avatar", "shared_entries"})
+# Rewritten on every inbox poll; a change to these alone is picked up by the next snapshot.
+VOLATILE_PROFILE_FIELDS = frozenset({"relay_last_checked_at"})
+
+
+@dataclass(frozen=True)
+class JournalRecord:
+    op: str
+    data: Any
+    at: datetime | None = None
+
+    @classmethod
+    def entry(cls, entry: MeasurementEntry) -> "JournalRecord":
+        return cls("entry", encode_entry(entry))
+
+    @classmethod
+    def profile_fields(cls, profile: UserProfile) -> "JournalRecord":
+        return cls("profile_fields", encode_profile_fields(profile))
+
+    @classmethod
+    def avatar(cls, user_id: UUID, friend_id: UUID | None, avatar_b64: str | None) -> "JournalRecord":
+        return cls(
+            "avatar",
+            {"user_id": str(user_id), "friend_id": str(friend_id) if friend_id else None, "avatar_b64": avatar_b64},
+        )
+
+    @classmethod
+    def shared_entries(
+        cls, user_id: UUID, friend_id: UUID, upserts: Iterable[SharedEntry], deletes: Iterable[UUID]
+    ) -> "JournalRecord":
+        return cls("shared_entries", SharedEntryDelta(user_id, friend_id, tuple(upserts), tuple(deletes)))
+
+    @classmethod
+    def active_profile(cls, user_id: UUID | None) -> "JournalRecord":
+        return cls("active_profile", str(user_id) if user_id else None)
+
+    @classmethod
+    def admin_config(cls, config: AdminConfig | None) -> "JournalRecord":
+        return cls("admin_config", encode_admin_config(config) if config else None)
+
+    @property
+    def identity(self) -> object:
+        if self.op == "entry":
+            return self.data.get("entry_id")
+        if self.op == "profile_fields":
+            return self.data["user_id"]
+        if self.op == "avatar":
+            return (self.data["user_id"], self.data["friend_id"])
+        if self.op == "shared_entries":
+            return (self.data.user_id, self.data.friend_id)
+        return None
+
+    def encoded(self) -> Any:
+        if isinstance(self.data, SharedEntryDelta):
+            return {
+                "user_id": str(self.data.user_id),
+                "friend_id": str(self.data.friend_id),
+                "upsert": [encode_shared_entry(entry) for entry in self.data.upserts],
+                "delete": [str(entry_id) for entry_id in self.data.deletes],
+            }
+        return self.data
+
+
+@dataclass(frozen=True)
+class SharedEntryDelta:
+    user_id: UUID
+    friend_id: UUID
+    upserts: tuple[SharedEntry, ...]
+    deletes: tuple[UUID, ...]
+
+
+class ProfileJournal:
+    # Remembers what was last journaled for each profile so a change writes only the parts it touched.
+    def __init__(self, profiles: Iterable[UserProfile] = ()) -> None:
+        self._fields: dict[UUID, dict[str, Any]] = {}
+        self._avatars: dict[UUID, dict[UUID | None, str | None]] = {}
+        self._shared: dict[UUID, dict[UUID, tuple[list[SharedEntry], dict[UUID, SharedEntry]]]] = {}
+        for profile in profiles:
+            self.reset(profile)
+
+    def reset(self, profile: UserProfile) -> None:
+        self.records(profile)
+
+    def records(self, profile: UserProfile) -> list[JournalRecord]:
+        user_id = profile.user_id
+        records = []
+
+        record = JournalRecord.profile_fields(profile)
+        previous = self._fields.get(user_id)
+        if previous is None or _stable_fields(previous) != _stable_fields(record.data):
+            records.append(record)
+        self._fields[user_id] = record.data
+
+        avatars: dict[UUID | None, str | None] = {None: profile.avatar_b64}
+        avatars.update((friend.friend_id, friend.avatar_b64) for friend in profile.friends)
+        known_avatars = self._avatars.get(user_id, {})
+        for owner, avatar_b64 in avatars.items():
+            if known_avatars.get(owner) != avatar_b64:
+                records.append(JournalRecord.avatar(user_id, owner, avatar_b64))
+        self._avatars[user_id] = avatars
+
+        known_shared = self._shared.get(user_id, {})
+        shared = {}
+        for friend in profile.friends:
+            baseline = known_shared.get(friend.friend_id)
+            # shared_entries is only ever replaced, never edited in place, so an unchanged list is skipped.
+            if baseline is not None and baseline[0] is friend.shared_entries:
+                shared[friend.friend_id] = baseline
+                continue
+            before = baseline[1] if baseline is not None else {}
+            current = {entry.entry_id: entry for entry in friend.shared_entries}
+            upserts = [entry for entry_id, entry in current.items() if before.get(entry_id) is not entry]
+            deletes = [entry_id for entry_id in before if entry_id not in current]
+            if upserts or deletes:
+                records.append(JournalRecord.shared_entries(user_id, friend.friend_id, upserts, deletes))
+            shared[friend.friend_id] = (friend.shared_entries, current)
+        self._shared[user_id] = shared
+        return records
+
+
+class EntryView(Sequence[MeasurementEntry]):
+    __slots__ = ("_items",)
+
+    def __init__(self, items: list[MeasurementEntry]) -> None:
+        self._items = items
+
+    @overload
+    def __getitem__(self, index: int) -> MeasurementEntry: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[MeasurementEntry]: ...
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[MeasurementEntry]:
+        return iter(self._items)
+
+    def __reversed__(self) -> Iterator[MeasurementEntry]:
+        return reversed(self._items)
+
+    def __repr__(self) -> str:
+        return f"EntryView({len(self._items)} entries)"
+
+
+_EMPTY_PARTITION: list[MeasurementEntry] = []
 
 
 @dataclass
@@ -32,6 +202,26 @@ class LocalStoreData:
     last_modified: datetime = field(default_factory=utc_now)
     active_profile_id: UUID | None = None
     admin_config: AdminConfig | None = None
+    _entry_index: dict[UUID, int] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _partitions: dict[UUID, list[MeasurementEntry]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _partition_index: dict[UUID, int] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _timelines: dict[UUID, EntryTimeline[MeasurementEntry]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _aggregates: dict[UUID, AggregateEngine] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _revisions: dict[UUID, int] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _clock: int = field(default=0, init=False, repr=False, compare=False)
+    _base_revision: int = field(default=0, init=False, repr=False, compare=False)
+    _frozen_entries: tuple[MeasurementEntry, ...] | None = field(default=None, init=False, repr=False, compare=False)
+    _frozen_profiles: dict[UUID, tuple[UserProfile, int, UserProfile]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _profile_versions: dict[UUID, int] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.reindex()
 
     @classmethod
     def new(cls, profiles: Iterable[UserProfile] | None = None) -> "LocalStoreData":
@@ -44,96 +234,475 @@ class LocalStoreData:
             active_profile_id=active_profile_id,
         )
 
+    def reindex(self) -> None:
+        self._frozen_entries = None
+        self._entry_index = {}
+        self._partitions = {}
+        self._partition_index = {}
+        self._timelines = {}
+        self._aggregates = {}
+        self._revisions = {}
+        self._clock += 1
+        self._base_revision = self._clock
+        for idx, entry in enumerate(self.entries):
+            self._index_entry(idx, entry)
+
+    def snapshot(self) -> StoreSnapshot:
+        if self._frozen_entries is None:
+            self._frozen_entries = tuple(self.entries)
+        profiles = []
+        for profile in self.profiles:
+            version = self._profile_versions.get(profile.user_id, 0)
+            cached = self._frozen_profiles.get(profile.user_id)
+            if cached is None or cached[0] is not profile or cached[1] != version:
+                cached = (profile, version, freeze_profile(profile))
+                self._frozen_profiles[profile.user_id] = cached
+            profiles.append(cached[2])
+        return StoreSnapshot(
+            schema_version=self.schema_version,
+            last_modified=self.last_modified,
+            profiles=tuple(profiles),
+            entries=self._frozen_entries,
+            active_profile_id=self.active_profile_id,
+            admin_config=replace(self.admin_config) if self.admin_config else None,
+        )
+
+    def restore(self, snapshot: StoreSnapshot) -> None:
+        profiles = []
+        for frozen in snapshot.profiles:
+            cached = self._frozen_profiles.get(frozen.user_id)
+            current = next((item for item in self.profiles if item.user_id == frozen.user_id), None)
+            # Keep profile objects the snapshot already matches so references held elsewhere stay live.
+            if (
+                cached is not None
+                and cached[2] is frozen
+                and cached[0] is current
+                and cached[1] == self._profile_versions.get(frozen.user_id, 0)
+            ):
+                profiles.append(current)
+            else:
+                profiles.append(thaw_profile(frozen))
+                self.touch_profile(frozen.user_id)
+        self.profiles[:] = profiles
+        self.entries[:] = snapshot.entries
+        self.last_modified = snapshot.last_modified
+        self.active_profile_id = snapshot.active_profile_id
+        self.admin_config = replace(snapshot.admin_config) if snapshot.admin_config else None
+        self.reindex()
+        self._frozen_entries = snapshot.entries
+
+    def touch_profile(self, user_id: UUID) -> None:
+        self._profile_versions[user_id] = self._profile_versions.get(user_id, 0) + 1
+
+    def revision_for(self, user_id: UUID | None) -> int:
+        return self._revisions.get(user_id, self._base_revision)
+
+    def entries_for(self, user_id: UUID | None) -> EntryView:
+        return EntryView(self._partitions.get(user_id, _EMPTY_PARTITION))
+
+    def timeline_for(self, user_id: UUID | None) -> EntryTimeline[MeasurementEntry]:
+        timeline = self._timelines.get(user_id)
+        if timeline is None:
+            timeline = EntryTimeline(self._partitions.get(user_id, _EMPTY_PARTITION))
+            if user_id is not None:
+                self._timelines[user_id] = timeline
+        return timeline
+
+    def aggregates_for(self, user_id: UUID | None) -> AggregateEngine:
+        aggregates = self._aggregates.get(user_id)
+        if aggregates is None:
+            aggregates = AggregateEngine(self._partitions.get(user_id, _EMPTY_PARTITION))
+            if user_id is not None:
+                self._aggregates[user_id] = aggregates
+        return aggregates
+
     def add_entry(self, entry: MeasurementEntry) -> None:
         self.entries.append(entry)
+        self._frozen_entries = None
+        self._index_entry(len(self.entries) - 1, entry)
+        self._track(entry)
         self.last_modified = utc_now()
 
     def update_entry(self, entry: MeasurementEntry) -> bool:
-        for idx, existing in enumerate(self.entries):
-            if existing.entry_id == entry.entry_id:
-                self.entries[idx] = entry
-                self.last_modified = utc_now()
-                return True
-        return False
+        idx = self._entry_index.get(entry.entry_id)
+        if idx is None:
+            return False
+        existing = self.entries[idx]
+        self.entries[idx] = entry
+        self._frozen_entries = None
+        if existing.user_id == entry.user_id:
+            self._partitions[entry.user_id][self._partition_index[entry.entry_id]] = entry
+        else:
+            self._unpartition(existing)
+            self._partition(entry)
+        if existing.user_id != entry.user_id:
+            self._untrack(existing.user_id, entry.entry_id)
+        self._track(entry)
+        self.last_modified = utc_now()
+        return True
+
+    def get_entry(self, entry_id: UUID) -> MeasurementEntry | None:
+        idx = self._entry_index.get(entry_id)
+        return self.entries[idx] if idx is not None else None
 
     def soft_delete_entry(self, entry_id: UUID, deleted_at: datetime | None = None) -> bool:
-        for entry in self.entries:
-            if entry.entry_id == entry_id:
-                entry.is_deleted = True
-                entry.deleted_at = deleted_at or utc_now()
-                entry.updated_at = utc_now()
-                entry.version += 1
-                self.last_modified = utc_now()
-                return True
-        return False
+        entry = self.get_entry(entry_id)
+        if entry is None:
+            return False
+        # Entries are replaced rather than edited so snapshots can share them.
+        return self.update_entry(
+            replace(
+                entry,
+                is_deleted=True,
+                deleted_at=deleted_at or utc_now(),
+                updated_at=utc_now(),
+                version=entry.version + 1,
+            )
+        )
+
+    def merge(self, chunk: "LoadChunk") -> "MergeResult":
+        result = MergeResult()
+        last_modified = self.last_modified
+        for (user_id, friend_id), shared in chunk.shared_entries.items():
+            profile = next((item for item in self.profiles if item.user_id == user_id), None)
+            friend = next((item for item in profile.friends if item.friend_id == friend_id), None) if profile else None
+            if friend is None:
+                continue
+            known = {entry.entry_id for entry in friend.shared_entries}
+            missing = [entry for entry in shared if entry.entry_id not in known]
+            if not missing:
+                continue
+            if known:
+                missing = sorted(friend.shared_entries + missing, key=lambda item: item.measured_at)
+            friend.shared_entries = missing
+            self.touch_profile(user_id)
+            result.profiles.add(user_id)
+        for entry in chunk.entries:
+            if entry.entry_id not in self._entry_index:
+                self.add_entry(entry)
+                result.added.append(entry.entry_id)
+        for record in chunk.records:
+            if record["op"] == "entry":
+                entry_id = UUID(record["data"]["entry_id"])
+                (result.updated if entry_id in self._entry_index else result.added).append(entry_id)
+            elif record["op"] in PROFILE_OPS:
+                result.profiles.add(UUID(record["data"]["user_id"]))
+            _apply_record(self, record)
+            last_modified = max(last_modified, self.last_modified)
+        self.last_modified = last_modified
+        return result
+
+    def _index_entry(self, idx: int, entry: MeasurementEntry) -> None:
+        previous = self._entry_index.get(entry.entry_id)
+        if previous is not None:
+            self._unpartition(self.entries[previous])
+        self._entry_index[entry.entry_id] = idx
+        self._partition(entry)
+
+    def _bump(self, user_id: UUID) -> None:
+        self._clock += 1
+        self._revisions[user_id] = self._clock
+
+    def _track(self, entry: MeasurementEntry) -> None:
+        self._bump(entry.user_id)
+        timeline = self._timelines.get(entry.user_id)
+        if timeline is not None:
+            timeline.add(entry)
+        aggregates = self._aggregates.get(entry.user_id)
+        if aggregates is not None:
+            aggregates.add(entry)
+
+    def _untrack(self, user_id: UUID, entry_id: UUID) -> None:
+        self._bump(user_id)
+        timeline = self._timelines.get(user_id)
+        if timeline is not None:
+            timeline.discard(entry_id)
+        aggregates = self._aggregates.get(user_id)
+        if aggregates is not None:
+            aggregates.discard(entry_id)
+
+    def _partition(self, entry: MeasurementEntry) -> None:
+        partition = self._partitions.setdefault(entry.user_id, [])
+        self._partition_index[entry.entry_id] = len(partition)
+        partition.append(entry)
+
+    def _unpartition(self, entry: MeasurementEntry) -> None:
+        partition = self._partitions.get(entry.user_id)
+        position = self._partition_index.pop(entry.entry_id, None)
+        if partition is None or position is None:
+            return
+        del partition[position]
+        for offset in range(position, len(partition)):
+            self._partition_index[partition[offset].entry_id] = offset
+
+
+@dataclass
+class LoadChunk:
+    entries: list[MeasurementEntry] = field(default_factory=list)
+    shared_entries: dict[tuple[UUID, UUID], list[SharedEntry]] = field(default_factory=dict)
+    records: list[dict[str, Any]] = field(default_factory=list)
+
+
+@dataclass
+class MergeResult:
+    added: list[UUID] = field(default_factory=list)
+    updated: list[UUID] = field(default_factory=list)
+    profiles: set[UUID] = field(default_factory=set)
+
+
+@dataclass
+class DeferredLoad:
+    entries: list[dict[str, Any]] = field(default_factory=list)
+    shared_entries: dict[UUID, dict[UUID, list[dict[str, Any]]]] = field(default_factory=dict)
+    records: list[dict[str, Any]] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.entries or self.shared_entries or self.records)
+
+    def chunks(self, size: int = LOAD_CHUNK_SIZE) -> Iterator[LoadChunk]:
+        try:
+            for user_id, friends in self.shared_entries.items():
+                yield LoadChunk(
+                    shared_entries={
+                        (user_id, friend_id): [decode_shared_entry(item) for item in items]
+                        for friend_id, items in friends.items()
+                    }
+                )
+            for start in range(0, len(self.entries), size):
+                yield LoadChunk(entries=[decode_entry(item) for item in self.entries[start : start + size]])
+        except (ValueError, KeyError, TypeError) as exc:
+            raise StorageError("Stored data is invalid") from exc
+        if self.records:
+            yield LoadChunk(records=self.records)
 
 
 class LocalStore:
-    def __init__(self, path: Path) -> None:
+    def __init__(
+        self,
+        path: Path,
+        *,
+        checkpoint_bytes: int = JOURNAL_CHECKPOINT_BYTES,
+        checkpoint_seconds: float = JOURNAL_CHECKPOINT_SECONDS,
+    ) -> None:
         self.path = Path(path)
+        self.journal = Journal(self.path.with_name(f"{self.path.name}.journal"))
+        self.checkpoint_bytes = checkpoint_bytes
+        self.checkpoint_seconds = checkpoint_seconds
+        self._snapshot_key: tuple[bytes, int] | None = None
+        self._container_version: int | None = None
 
     def exists(self) -> bool:
         return self.path.exists()
 
-    def initialize(self, passphrase: str, profile: UserProfile | None = None) -> LocalStoreData:
+    def initialize(self, secret: str | SessionKey, profile: UserProfile | None = None) -> LocalStoreData:
         data = LocalStoreData.new([profile] if profile else None)
-        self.save(data, passphrase)
+        self.save(data, secret)
+        return data
+
+    def unlock(self, passphrase: str) -> SessionKey:
+        if not self.path.exists():
+            raise StorageError("Encrypted store not found")
+        with self._open_container() as container:
+            return unlock_container(container, passphrase)
+
+    def load(self, secret: str | SessionKey) -> LocalStoreData:
+        data, deferred = self.load_staged(secret)
+        for chunk in deferred.chunks():
+            data.merge(chunk)
         return data
 
-    def load(self, passphrase: str) -> LocalStoreData:
+    def load_staged(self, secret: str | SessionKey) -> tuple[LocalStoreData, "DeferredLoad"]:
         if not self.path.exists():
             raise StorageError("Encrypted store not found")
-        container = self._read_container()
-        plaintext = decrypt_bytes(container, passphrase)
+        with self._open_container() as container:
+            key = secret if isinstance(secret, SessionKey) else unlock_container(container, secret)
+            with profiling.phase("decrypt"):
+                plaintext = key.decrypt(container)
+            self._container_version = container.version
         try:
-            payload = json.loads(plaintext.decode("utf-8"))
+            with profiling.phase("json decode"):
+                payload = json.loads(plaintext.decode("utf-8"))
         except json.JSONDecodeError as exc:
             raise StorageError("Decrypted payload is not valid JSON") from exc
-        return _deserialize_store(payload)
+        self._snapshot_key = (key.salt, key.iterations)
+        journal_id = _decode_journal_id(payload.get("journal_id"))
+        records: list[dict[str, Any]] = []
+        if journal_id is None:
+            self.journal.journal_id = None
+        else:
+            with profiling.phase("journal read"):
+                try:
+                    records = [json.loads(raw.decode("utf-8")) for raw in self.journal.replay(key, journal_id)]
+                except ValueError as exc:
+                    raise StorageError("Journal record is invalid") from exc
+        with profiling.phase("_deserialize_store"):
+            return _deserialize_staged(payload, records)
+
+    def save(self, data: LocalStoreData, secret: str | SessionKey) -> None:
+        if not isinstance(secret, SessionKey):
+            secret = SessionKey.derive(secret)
+        self.write_snapshot(data.snapshot(), secret)
 
-    def save(self, data: LocalStoreData, passphrase: str) -> None:
-        payload = _serialize_store(data)
+    def write_snapshot(self, snapshot: StoreSnapshot, key: SessionKey) -> None:
+        journal_id = new_journal_id()
+        payload = dict(snapshot.to_payload(), journal_id=journal_id.hex())
         plaintext = json.dumps(payload, separators=(",", ":"), sort_keys=True).encode("utf-8")
-        container = encrypt_bytes(plaintext, passphrase)
-        self._write_container(container)
+        self._write_container(key.encrypt(plaintext))
+        self._snapshot_key = (key.salt, key.iterations)
+        self.journal.reset(journal_id)
+
+    def append(self, data: LocalStoreData, key: SessionKey, records: Iterable[JournalRecord]) -> None:
+        records = list(records)
+        if not records:
+            return
+        if self.checkpoint_due(key):
+            self.save(data, key)
+            return
+        self.write_records(key, records, data.last_modified)
+        if self.checkpoint_due(key):
+            self.save(data, key)
 
-    def _read_container(self) -> dict[str, Any]:
+    def write_records(self, key: SessionKey, records: Iterable[JournalRecord], at: datetime | None = None) -> None:
+        if self.journal.journal_id is None or self._snapshot_key != (key.salt, key.iterations):
+            raise StorageError("Journal does not belong to the current snapshot")
+        payloads = []
+        for record in records:
+            stamp = record.at or at or utc_now()
+            payload = {"op": record.op, "data": record.encoded(), "at": stamp.isoformat()}
+            payloads.append(json.dumps(payload, separators=(",", ":"), sort_keys=True).encode("utf-8"))
+        if payloads:
+            self.journal.append(key, payloads)
+
+    def checkpoint_due(self, key: SessionKey | None = None) -> bool:
+        if self.journal.journal_id is None:
+            return True
+        if key is not None and self._snapshot_key != (key.salt, key.iterations):
+            return True
+        if self._container_version != CONTAINER_VERSION:
+            return True
+        return self.journal.size >= self.checkpoint_bytes or self.journal.age() >= self.checkpoint_seconds
+
+    @contextmanager
+    def _open_container(self) -> Iterator[Container]:
         try:
-            with self.path.open("r", encoding="utf-8") as handle:
-                return json.load(handle)
+            handle = self.path.open("rb")
         except FileNotFoundError as exc:
             raise StorageError("Encrypted store not found") from exc
-        except json.JSONDecodeError as exc:
-            raise StorageError("Encrypted store is not valid JSON") from exc
+        with handle:
+            size = os.fstat(handle.fileno()).st_size
+            if size == 0:
+                raise StorageError("Encrypted store is empty")
+            try:
+                buffer: mmap.mmap | bytearray = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                buffer = bytearray(size)
+                if handle.readinto(buffer) != size:
+                    raise StorageError("Encrypted store changed while reading")
+            view = memoryview(buffer)
+            container = None
+            try:
+                container = parse_container(view)
+                yield container
+            finally:
+                # The ciphertext is a view into the mapping; release it before unmapping.
+                if container is not None and isinstance(container.ciphertext, memoryview):
+                    container.ciphertext.release()
+                view.release()
+                if isinstance(buffer, mmap.mmap):
+                    try:
+                        buffer.close()
+                    except BufferError:
+                        pass
 
-    def _write_container(self, container: dict[str, Any]) -> None:
-        serialized = json.dumps(container, indent=2, sort_keys=True)
+    def _write_container(self, container: Container) -> None:
         directory = self.path.parent
         directory.mkdir(parents=True, exist_ok=True)
         fd, tmp_path = tempfile.mkstemp(prefix=self.path.name, dir=directory)
         try:
-            with os.fdopen(fd, "w", encoding="utf-8") as handle:
-                handle.write(serialized)
+            with os.fdopen(fd, "wb") as handle:
+                for chunk in container.chunks():
+                    handle.write(chunk)
                 handle.flush()
                 os.fsync(handle.fileno())
             os.replace(tmp_path, self.path)
         finally:
             if os.path.exists(tmp_path):
                 os.remove(tmp_path)
+        self._container_version = container.version
 
 
-def _serialize_store(data: LocalStoreData) -> dict[str, Any]:
-    return {
-        "schema_version": data.schema_version,
-        "last_modified": data.last_modified.isoformat(),
-        "profiles": [encode_profile(profile) for profile in data.profiles],
-        "entries": [encode_entry(entry) for entry in data.entries],
-        "active_profile_id": str(data.active_profile_id) if data.active_profile_id else None,
-        "admin_config": encode_admin_config(data.admin_config) if data.admin_config else None,
-    }
+def _decode_journal_id(value: Any) -> bytes | None:
+    if not isinstance(value, str):
+        return None
+    try:
+        return bytes.fromhex(value)
+    except ValueError:
+        return None
+
+
+def _apply_record(data: LocalStoreData, record: dict[str, Any]) -> None:
+    op = record["op"]
+    payload = record.get("data")
+    if op == "entry":
+        entry = decode_entry(payload)
+        if not data.update_entry(entry):
+            data.add_entry(entry)
+    elif op == "profile":
+        profile = decode_profile(payload)
+        for idx, existing in enumerate(data.profiles):
+            if existing.user_id == profile.user_id:
+                data.profiles[idx] = profile
+                break
+        else:
+            data.profiles.append(profile)
+    elif op == "profile_fields":
+        profile = decode_profile(payload)
+        existing, _friend = _profile_target(data, profile.user_id, None)
+        if existing is None:
+            data.profiles.append(profile)
+        else:
+            profile.avatar_b64 = existing.avatar_b64
+            carried = {friend.friend_id: friend for friend in existing.friends}
+            for friend in profile.friends:
+                previous = carried.get(friend.friend_id)
+                if previous is not None:
+                    friend.avatar_b64 = previous.avatar_b64
+                    friend.shared_entries = previous.shared_entries
+            data.profiles[data.profiles.index(existing)] = profile
+        data.touch_profile(profile.user_id)
+    elif op == "avatar":
+        user_id = UUID(payload["user_id"])
+        friend_id = UUID(payload["friend_id"]) if payload.get("friend_id") else None
+        profile, friend = _profile_target(data, user_id, friend_id)
+        target = friend if friend_id else profile
+        if target is not None:
+            target.avatar_b64 = payload.get("avatar_b64")
+            data.touch_profile(user_id)
+    elif op == "shared_entries":
+        user_id = UUID(payload["user_id"])
+        _profile, friend = _profile_target(data, user_id, UUID(payload["friend_id"]))
+        if friend is not None:
+            entries = {entry.entry_id: entry for entry in friend.shared_entries}
+            for entry_id in payload.get("delete", []):
+                entries.pop(UUID(entry_id), None)
+            for item in payload.get("upsert", []):
+                entry = decode_shared_entry(item)
+                entries[entry.entry_id] = entry
+            friend.shared_entries = sorted(entries.values(), key=lambda item: item.measured_at)
+            data.touch_profile(user_id)
+    elif op == "active_profile":
+        data.active_profile_id = UUID(payload) if payload else None
+    elif op == "admin_config":
+        data.admin_config = decode_admin_config(payload) if payload else None
+    else:
+        raise ValueError(f"Unknown journal op: {op}")
+    if record.get("at"):
+        data.last_modified = datetime.fromisoformat(record["at"])
 
 
-def _deserialize_store(payload: dict[str, Any]) -> LocalStoreData:
+def _deserialize_staged(
+    payload: dict[str, Any], records: list[dict[str, Any]]
+) -> tuple[LocalStoreData, DeferredLoad]:
     try:
         version = int(payload["schema_version"])
     except (KeyError, ValueError, TypeError) as exc:
@@ -146,12 +715,30 @@ def _deserialize_store(payload: dict[str, Any]) -> LocalStoreData:
     except (KeyError, ValueError, TypeError) as exc:
         raise StorageError("Missing or invalid last_modified") from exc
 
-    profiles = [decode_profile(profile) for profile in payload.get("profiles", [])]
-    entries = [decode_entry(entry) for entry in payload.get("entries", [])]
+    deferred = DeferredLoad()
+    profiles = []
+    for profile_payload in payload.get("profiles", []):
+        profile = decode_profile(_without_shared_entries(profile_payload))
+        shared = {
+            UUID(friend["friend_id"]): friend["shared_entries"]
+            for friend in profile_payload.get("friends", [])
+            if friend.get("shared_entries")
+        }
+        if shared:
+            deferred.shared_entries[profile.user_id] = shared
+        profiles.append(profile)
     active_profile = payload.get("active_profile_id")
     active_profile_id = UUID(active_profile) if active_profile else None
     if active_profile_id is None and profiles:
         active_profile_id = profiles[0].user_id
+    focus = _final_active_profile(active_profile_id, records)
+    focus_key = str(focus) if focus else None
+    entries = []
+    for entry_payload in payload.get("entries", []):
+        if entry_payload.get("user_id") == focus_key:
+            entries.append(decode_entry(entry_payload))
+        else:
+            deferred.entries.append(entry_payload)
     admin_payload = payload.get("admin_config")
     admin_config = None
     if isinstance(admin_payload, dict):
@@ -159,7 +746,7 @@ def _deserialize_store(payload: dict[str, Any]) -> LocalStoreData:
             admin_config = decode_admin_config(admin_payload)
         except Exception:
             admin_config = None
-    return LocalStoreData(
+    data = LocalStoreData(
         schema_version=version,
         profiles=profiles,
         entries=entries,
@@ -167,3 +754,53 @@ def _deserialize_store(payload: dict[str, Any]) -> LocalStoreData:
         active_profile_id=active_profile_id,
         admin_config=admin_config,
     )
+    held: set[str] = set()
+    try:
+        for record in records:
+            if record["op"] == "entry":
+                entry_id = record["data"]["entry_id"]
+                owner = record["data"]["user_id"]
+                if entry_id in held or (owner != focus_key and data.get_entry(UUID(entry_id)) is None):
+                    held.add(entry_id)
+                    deferred.records.append(record)
+                    continue
+            elif record["op"] == "profile":
+                deferred.shared_entries.pop(UUID(record["data"]["user_id"]), None)
+            elif record["op"] == "shared_entries" and UUID(record["data"]["user_id"]) in deferred.shared_entries:
+                # Deltas must land on top of the snapshot's shared entries, which are still deferred.
+                deferred.records.append(record)
+                continue
+            _apply_record(data, record)
+    except (ValueError, KeyError, TypeError) as exc:
+        raise StorageError("Journal record is invalid") from exc
+    return data, deferred
+
+
+def _profile_target(
+    data: LocalStoreData, user_id: UUID, friend_id: UUID | None
+) -> tuple[UserProfile | None, FriendLink | None]:
+    profile = next((item for item in data.profiles if item.user_id == user_id), None)
+    if profile is None or friend_id is None:
+        return profile, None
+    return profile, next((item for item in profile.friends if item.friend_id == friend_id), None)
+
+
+def _stable_fields(payload: dict[str, Any]) -> dict[str, Any]:
+    return {name: value for name, value in payload.items() if name not in VOLATILE_PROFILE_FIELDS}
+
+
+def _without_shared_entries(payload: dict[str, Any]) -> dict[str, Any]:
+    friends = payload.get("friends")
+    if not friends:
+        return payload
+    return dict(payload, friends=[dict(friend, shared_entries=[]) for friend in friends])
+
+
+def _final_active_profile(active_profile_id: UUID | None, records: list[dict[str, Any]]) -> UUID | None:
+    for record in records:
+        if record.get("op") == "active_profile":
+            try:
+                active_profile_id = UUID(record["data"]) if record.get("data") else None
+            except (ValueError, TypeError):
+                pass
+    return active_profile_id
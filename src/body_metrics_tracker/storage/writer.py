@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import replace
+from datetime import datetime
+from typing import Iterable
+
+from .crypto import SessionKey, StorageError
+from .snapshot import StoreSnapshot
+from .store import JournalRecord, LocalStore
+
+
+class WriteBehindWriter:
+    def __init__(self, store: LocalStore, key: SessionKey, delay: float) -> None:
+        self.store = store
+        self.key = key
+        self.delay = max(0.0, delay)
+        self.last_error: Exception | None = None
+        self._cond = threading.Condition()
+        self._records: list[JournalRecord] = []
+        self._snapshot: StoreSnapshot | None = None
+        self._due: float | None = None
+        self._busy = False
+        self._closed = False
+        self._generation = 0
+        self._thread = threading.Thread(target=self._run, name="store-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self) -> bool:
+        with self._cond:
+            return self._busy or self._snapshot is not None or bool(self._records)
+
+    def needs_snapshot(self) -> bool:
+        with self._cond:
+            if self._snapshot is not None:
+                return False
+        return self.store.checkpoint_due(self.key)
+
+    def submit(self, records: Iterable[JournalRecord], at: datetime) -> None:
+        stamped = [record if record.at else replace(record, at=at) for record in records]
+        if not stamped:
+            return
+        with self._cond:
+            self._ensure_open()
+            self._records.extend(stamped)
+            self._schedule()
+
+    def submit_snapshot(self, snapshot: StoreSnapshot) -> None:
+        with self._cond:
+            self._ensure_open()
+            self._snapshot = snapshot
+            self._records = []
+            self._schedule()
+
+    def flush(self, timeout: float | None = None) -> None:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            target = self._generation + int(self._busy)
+            if self._records or self._snapshot is not None:
+                target += 1
+            self._due = time.monotonic()
+            self._cond.notify_all()
+            while self._generation < target and self._thread.is_alive():
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise StorageError("Timed out waiting for pending saves")
+                self._cond.wait(remaining)
+            if self.last_error is not None:
+                raise StorageError(f"Saving failed: {self.last_error}") from self.last_error
+
+    def close(self, timeout: float | None = None) -> None:
+        try:
+            self.flush(timeout)
+        finally:
+            with self._cond:
+                self._closed = True
+                self._cond.notify_all()
+            self._thread.join(timeout)
+
+    def _ensure_open(self) -> None:
+        if self._closed:
+            raise StorageError("Store writer is closed")
+
+    def _schedule(self) -> None:
+        if self._due is None:
+            self._due = time.monotonic() + self.delay
+        self._cond.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    has_work = self._snapshot is not None or bool(self._records)
+                    if not has_work and self._closed:
+                        return
+                    if has_work and self._due is not None:
+                        remaining = self._due - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                    else:
+                        self._cond.wait()
+                snapshot, records = self._snapshot, self._records
+                self._snapshot, self._records = None, []
+                self._due = None
+                self._busy = True
+            error = None
+            try:
+                if snapshot is not None:
+                    self.store.write_snapshot(snapshot, self.key)
+                if records:
+                    self.store.write_records(self.key, records)
+            except Exception as exc:
+                error = exc
+            with self._cond:
+                self._busy = False
+                self.last_error = error
+                if error is not None:
+                    if self._snapshot is None:
+                        self._snapshot = snapshot
+                        self._records = records + self._records
+                    self._due = time.monotonic() + max(self.delay, 1.0)
+                self._generation += 1
+                self._cond.notify_all()
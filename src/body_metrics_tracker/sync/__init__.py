@@ -0,0 +1,14 @@
+from .engine import SyncChanges, SyncEngine, SyncStore, SyncTask, find_friend, profile_too_large
+from .scheduler import DEFAULT_POLICIES, SyncPolicy, SyncScheduler
+
+__all__ = [
+    "DEFAULT_POLICIES",
+    "SyncChanges",
+    "SyncEngine",
+    "SyncPolicy",
+    "SyncScheduler",
+    "SyncStore",
+    "SyncTask",
+    "find_friend",
+    "profile_too_large",
+]
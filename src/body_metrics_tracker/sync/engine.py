@@ -0,0 +1,802 @@
+from __future__ import annotations
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import AbstractContextManager
+from dataclasses import dataclass, field, replace
+from datetime import date, datetime, timezone
+from typing import Any, Callable, Iterable, Protocol
+from uuid import UUID
+
+from body_metrics_tracker.config import DEFAULT_RELAY_URL
+from body_metrics_tracker.core.friend_code import decode_friend_code, encode_friend_code_compact
+from body_metrics_tracker.core.models import (
+    FriendLink,
+    LengthUnit,
+    MeasurementEntry,
+    ReminderRule,
+    SharedEntry,
+    UserProfile,
+    WeightUnit,
+    utc_now,
+)
+from body_metrics_tracker.core.timeline import EntryTimeline
+from body_metrics_tracker.relay import client
+from body_metrics_tracker.relay.client import RelayConfig, RelayError
+
+MAX_AVATAR_LENGTH = 60000
+CYCLE = ("status", "inbox", "settings", "push_history", "self_history", "history", "reminders")
+
+StatusPayload = tuple[bool, date | None, float | None, float | None]
+
+
+class SyncStore(Protocol):
+    @property
+    def profile(self) -> UserProfile: ...
+
+    @property
+    def timeline(self) -> EntryTimeline[MeasurementEntry]: ...
+
+    def entries_for_profile(self, user_id: UUID) -> Iterable[MeasurementEntry]: ...
+
+    def batch(self) -> AbstractContextManager[Any]: ...
+
+    def add_entry(self, entry: MeasurementEntry) -> None: ...
+
+    def update_entry(self, entry: MeasurementEntry) -> bool: ...
+
+    def update_profile(self, profile: UserProfile) -> None: ...
+
+
+@dataclass
+class SyncChanges:
+    entries_added: set[UUID] = field(default_factory=set)
+    entries_updated: set[UUID] = field(default_factory=set)
+    profile: bool = False
+    settings: bool = False
+    follow_up: list[SyncTask] = field(default_factory=list)
+    errors: list[str] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.entries_added or self.entries_updated or self.profile or self.settings)
+
+    def merge(self, other: SyncChanges) -> None:
+        self.entries_added |= other.entries_added
+        self.entries_updated |= other.entries_updated
+        self.profile = self.profile or other.profile
+        self.settings = self.settings or other.settings
+        self.errors.extend(other.errors)
+
+
+@dataclass(frozen=True)
+class SyncTask:
+    name: str
+    fetch: Callable[[], Any]
+    apply: Callable[[Any], SyncChanges]
+
+
+class SyncEngine:
+    def __init__(
+        self,
+        store: SyncStore,
+        transport: Any = client,
+        default_url: str | None = DEFAULT_RELAY_URL,
+    ) -> None:
+        self.store = store
+        self.transport = transport
+        self.default_url = default_url
+        self._last_status: StatusPayload | None = None
+        self._last_profile_sync: tuple[str, str | None] | None = None
+
+    def reset(self) -> None:
+        self._last_status = None
+
+    def relay_url(self) -> str | None:
+        return self.store.profile.relay_url or self.default_url
+
+    def relay_config(self) -> RelayConfig | None:
+        profile = self.store.profile
+        url = profile.relay_url or self.default_url
+        if not url or not profile.relay_token:
+            return None
+        return RelayConfig(base_url=url, token=profile.relay_token)
+
+    def run(self, tasks: Iterable[SyncTask] | None = None, *, concurrency: int = 1) -> SyncChanges:
+        changes = SyncChanges()
+        if tasks is None:
+            register = self.register_task()
+            if register is not None:
+                changes.merge(self._run([register], 1))
+            tasks = self.cycle()
+        changes.merge(self._run(list(tasks), concurrency))
+        return changes
+
+    def cycle(self) -> list[SyncTask]:
+        return [task for task in (self.task(name) for name in CYCLE) if task is not None]
+
+    def task(self, name: str) -> SyncTask | None:
+        factories: dict[str, Callable[[], SyncTask | None]] = {
+            "register": self.register_task,
+            "profile": self.profile_task,
+            "status": lambda: self.status_task(only_if_changed=True),
+            "inbox": self.inbox_task,
+            "settings": self.settings_task,
+            "push_history": self.push_history_task,
+            "self_history": self.self_history_task,
+            "history": self.history_task,
+            "reminders": self.reminders_task,
+        }
+        return factories[name]()
+
+    def register_task(self) -> SyncTask | None:
+        profile = self.store.profile
+        url = self.relay_url()
+        if not url or profile.relay_token:
+            return None
+        user_id = str(profile.user_id)
+        friend_code = encode_friend_code_compact(profile.user_id)
+        display_name = profile.display_name
+        avatar_b64 = profile.avatar_b64
+
+        def fetch() -> dict:
+            return self.transport.register(url, user_id, friend_code, display_name, avatar_b64)
+
+        def apply(result: dict) -> SyncChanges:
+            token = result.get("token") if isinstance(result, dict) else None
+            if not token:
+                raise RelayError("Relay did not return a token.")
+            profile.relay_url = url
+            profile.relay_token = token
+            profile.relay_last_checked_at = datetime.now(timezone.utc)
+            self.store.update_profile(profile)
+            return SyncChanges(profile=True)
+
+        return SyncTask("register", fetch, apply)
+
+    def adopt_default_url(self) -> bool:
+        profile = self.store.profile
+        url = self.relay_url()
+        if not url or profile.relay_url == url:
+            return False
+        profile.relay_url = url
+        self.store.update_profile(profile)
+        return True
+
+    def profile_task(self) -> SyncTask | None:
+        config = self.relay_config()
+        if not config:
+            return None
+        profile = self.store.profile
+        payload = (profile.display_name, profile.avatar_b64)
+        if self._last_profile_sync == payload:
+            return None
+        if profile_too_large(profile):
+            return None
+
+        def fetch() -> dict:
+            return self.transport.update_profile(config, payload[0], payload[1])
+
+        def apply(_result: dict) -> SyncChanges:
+            self._last_profile_sync = payload
+            return SyncChanges()
+
+        return SyncTask("profile", fetch, apply)
+
+    def status_task(self, *, only_if_changed: bool = False) -> SyncTask | None:
+        config = self.relay_config()
+        if not config:
+            return None
+        payload = self.status_payload()
+        if only_if_changed and payload == self._last_status:
+            return None
+
+        def fetch() -> dict:
+            return self.transport.post_status(config, *payload)
+
+        def apply(_result: dict) -> SyncChanges:
+            self._last_status = payload
+            return SyncChanges()
+
+        return SyncTask("status", fetch, apply)
+
+    def inbox_task(self) -> SyncTask | None:
+        config = self.relay_config()
+        if not config:
+            return None
+        profile = self.store.profile
+        return SyncTask(
+            "inbox",
+            lambda: self.transport.fetch_inbox(config),
+            lambda result: self.apply_inbox(profile, result),
+        )
+
+    def settings_task(self) -> SyncTask | None:
+        config = self.relay_config()
+        if not config:
+            return None
+        profile = self.store.profile
+        return SyncTask(
+            "settings",
+            lambda: self.transport.fetch_profile_settings(config),
+            lambda result: self.reconcile_settings(config, profile, result),
+        )
+
+    def push_history_task(self) -> SyncTask | None:
+        config = self.relay_config()
+        if not config:
+            return None
+        profile = self.store.profile
+        since = profile.relay_last_history_push_at
+        entries = [
+            entry
+            for entry in self.store.entries_for_profile(profile.user_id)
+            if since is None or entry.updated_at > since
+        ]
+        if not entries:
+            return None
+        payload = [serialize_entry(entry) for entry in entries]
+        latest = max(entry.updated_at for entry in entries)
+
+        def apply(_result: dict) -> SyncChanges:
+            profile.relay_last_history_push_at = latest
+            self.store.update_profile(profile)
+            return SyncChanges(profile=True)
+
+        return SyncTask("push_history", lambda: self.transport.push_history(config, payload), apply)
+
+    def self_history_task(self) -> SyncTask | None:
+        config = self.relay_config()
+        if not config:
+            return None
+        profile = self.store.profile
+        since = profile.relay_last_self_history_pull_at
+        return SyncTask(
+            "self_history",
+            lambda: self.transport.fetch_self_history(config, since),
+            lambda result: self.apply_self_history(profile, result),
+        )
+
+    def history_task(self) -> SyncTask | None:
+        config = self.relay_config()
+        if not config:
+            return None
+        profile = self.store.profile
+        since = None if needs_full_history(profile) else profile.relay_last_history_pull_at
+        return SyncTask(
+            "history",
+            lambda: self.transport.fetch_history(config, since),
+            lambda result: self.apply_history(profile, result),
+        )
+
+    def reminders_task(self) -> SyncTask | None:
+        config = self.relay_config()
+        if not config:
+            return None
+        profile = self.store.profile
+        return SyncTask(
+            "reminders",
+            lambda: self.transport.list_reminder_schedules(config),
+            lambda result: self.merge_reminder_schedules(config, profile, result),
+        )
+
+    def status_payload(self) -> StatusPayload:
+        timeline = self.store.timeline
+        logged_today = bool(timeline.on_date(date.today()))
+        last = timeline.latest()
+        last_entry_date = last.date_local if last else None
+        friends = [friend for friend in self.store.profile.friends if friend.status == "connected"]
+        share_weight = any(friend.share_weight for friend in friends)
+        share_waist = any(friend.share_waist for friend in friends)
+        if last:
+            weight_kg = last.weight_kg if share_weight else None
+            waist_cm = last.waist_cm if share_waist else None
+        else:
+            weight_kg = None
+            waist_cm = None
+        return logged_today, last_entry_date, weight_kg, waist_cm
+
+    def apply_inbox(self, profile: UserProfile, payload: dict) -> SyncChanges:
+        incoming = payload.get("incoming_invites", [])
+        reminders = payload.get("reminders", [])
+        friends = payload.get("friends", [])
+
+        for invite in incoming:
+            friend_id = _friend_id(invite.get("from_code"))
+            if friend_id is None:
+                continue
+            name = str(invite.get("from_name", "Friend")).strip() or "Friend"
+            avatar_b64 = invite.get("from_avatar")
+            existing = find_friend(profile, friend_id)
+            if existing:
+                if not existing.name_overridden:
+                    existing.display_name = name or existing.display_name
+                if avatar_b64:
+                    existing.avatar_b64 = avatar_b64
+                if existing.status != "connected":
+                    existing.status = "incoming"
+            else:
+                profile.friends.append(
+                    FriendLink(friend_id=friend_id, display_name=name, status="incoming", avatar_b64=avatar_b64)
+                )
+
+        for reminder in reminders:
+            friend_id = _friend_id(reminder.get("from_code"))
+            if friend_id is None:
+                continue
+            name = str(reminder.get("from_name", "Friend")).strip() or "Friend"
+            avatar_b64 = reminder.get("from_avatar")
+            message = str(reminder.get("message", "")).strip() or "Time to log your weight today."
+            friend = find_friend(profile, friend_id)
+            if not friend:
+                friend = FriendLink(friend_id=friend_id, display_name=name, status="incoming", avatar_b64=avatar_b64)
+                profile.friends.append(friend)
+            if not friend.name_overridden:
+                friend.display_name = name or friend.display_name
+            if avatar_b64:
+                friend.avatar_b64 = avatar_b64
+            friend.last_reminder_at = datetime.now(timezone.utc)
+            friend.last_reminder_message = message
+
+        connected_ids = set()
+        for friend_data in friends:
+            friend_id = _friend_id(friend_data.get("friend_code"))
+            if friend_id is None:
+                continue
+            connected_ids.add(friend_id)
+            name = str(friend_data.get("display_name", "Friend")).strip() or "Friend"
+            avatar_b64 = friend_data.get("avatar_b64")
+            friend = find_friend(profile, friend_id)
+            if not friend:
+                friend = FriendLink(friend_id=friend_id, display_name=name, status="connected", avatar_b64=avatar_b64)
+                profile.friends.append(friend)
+            if not friend.name_overridden:
+                friend.display_name = name or friend.display_name
+            if avatar_b64:
+                friend.avatar_b64 = avatar_b64
+            friend.status = "connected"
+            friend.last_entry_logged_today = friend_data.get("logged_today")
+            last_entry_date = friend_data.get("last_entry_date")
+            friend.last_entry_date = date.fromisoformat(last_entry_date) if last_entry_date else None
+            weight_kg = friend_data.get("weight_kg")
+            waist_cm = friend_data.get("waist_cm")
+            friend.last_weight_kg = float(weight_kg) if weight_kg is not None else None
+            friend.last_waist_cm = float(waist_cm) if waist_cm is not None else None
+            share = friend_data.get("share_settings") or {}
+            if share:
+                friend.share_weight = bool(share.get("share_weight", friend.share_weight))
+                friend.share_waist = bool(share.get("share_waist", friend.share_waist))
+            share_from_friend = friend_data.get("share_from_friend") or {}
+            if share_from_friend:
+                friend.received_share_weight = bool(
+                    share_from_friend.get("share_weight", friend.received_share_weight)
+                )
+                friend.received_share_waist = bool(share_from_friend.get("share_waist", friend.received_share_waist))
+
+        profile.friends = [
+            friend for friend in profile.friends if friend.status != "connected" or friend.friend_id in connected_ids
+        ]
+        profile.relay_last_checked_at = datetime.now(timezone.utc)
+        self.store.update_profile(profile)
+        return SyncChanges(profile=True)
+
+    def apply_history(self, profile: UserProfile, payload: dict) -> SyncChanges:
+        friends = payload.get("friends", [])
+        newest_update = profile.relay_last_history_pull_at
+        with self.store.batch():
+            for friend_data in friends:
+                friend_id = _friend_id(friend_data.get("friend_code"))
+                if friend_id is None:
+                    continue
+                name = str(friend_data.get("display_name", "Friend")).strip() or "Friend"
+                avatar_b64 = friend_data.get("avatar_b64")
+                friend = find_friend(profile, friend_id)
+                if not friend:
+                    friend = FriendLink(
+                        friend_id=friend_id,
+                        display_name=name,
+                        status="connected",
+                        avatar_b64=avatar_b64,
+                    )
+                    profile.friends.append(friend)
+                if not friend.name_overridden:
+                    friend.display_name = name or friend.display_name
+                if avatar_b64:
+                    friend.avatar_b64 = avatar_b64
+                share_from_friend = friend_data.get("share_from_friend") or {}
+                friend.received_share_weight = bool(share_from_friend.get("share_weight", False))
+                friend.received_share_waist = bool(share_from_friend.get("share_waist", False))
+                entries_payload = friend_data.get("entries", [])
+                if entries_payload:
+                    merge_shared_entries(friend, entries_payload)
+                    last_update = _latest_shared_update(friend)
+                    if last_update and (newest_update is None or last_update > newest_update):
+                        newest_update = last_update
+            profile.relay_last_history_pull_at = newest_update or datetime.now(timezone.utc)
+            self.store.update_profile(profile)
+        return SyncChanges(profile=True)
+
+    def apply_self_history(self, profile: UserProfile, payload: dict) -> SyncChanges:
+        changes = SyncChanges(profile=True)
+        entries_payload = payload.get("entries", []) if isinstance(payload, dict) else []
+        newest_update = profile.relay_last_self_history_pull_at
+        existing = {entry.entry_id: entry for entry in self.store.entries_for_profile(profile.user_id)}
+        with self.store.batch():
+            for entry_data in entries_payload:
+                entry_id = _uuid(entry_data.get("entry_id"))
+                if entry_id is None:
+                    continue
+                updated_at = parse_timestamp(entry_data.get("updated_at"))
+                if updated_at is None:
+                    continue
+                local = existing.get(entry_id)
+                if local and local.updated_at >= updated_at:
+                    continue
+                if entry_data.get("is_deleted"):
+                    if local:
+                        deleted = replace(local, is_deleted=True, deleted_at=updated_at, updated_at=updated_at)
+                        self.store.update_entry(deleted)
+                        changes.entries_updated.add(entry_id)
+                    if newest_update is None or updated_at > newest_update:
+                        newest_update = updated_at
+                    continue
+                measured_at = parse_timestamp(entry_data.get("measured_at"))
+                if measured_at is None:
+                    continue
+                date_local_text = entry_data.get("date_local")
+                try:
+                    date_local = date.fromisoformat(date_local_text) if date_local_text else measured_at.date()
+                except ValueError:
+                    date_local = measured_at.date()
+                weight_kg = entry_data.get("weight_kg")
+                if weight_kg is None:
+                    continue
+                waist_cm = entry_data.get("waist_cm")
+                note = entry_data.get("note")
+                if local:
+                    updated = replace(
+                        local,
+                        measured_at=measured_at,
+                        date_local=date_local,
+                        weight_kg=float(weight_kg),
+                        waist_cm=float(waist_cm) if waist_cm is not None else None,
+                        note=note,
+                        updated_at=updated_at,
+                        is_deleted=False,
+                        deleted_at=None,
+                        version=local.version + 1,
+                    )
+                    self.store.update_entry(updated)
+                    changes.entries_updated.add(entry_id)
+                else:
+                    entry = MeasurementEntry(
+                        entry_id=entry_id,
+                        user_id=profile.user_id,
+                        measured_at=measured_at,
+                        date_local=date_local,
+                        weight_kg=float(weight_kg),
+                        waist_cm=float(waist_cm) if waist_cm is not None else None,
+                        note=note,
+                        created_at=updated_at,
+                        updated_at=updated_at,
+                        is_deleted=False,
+                        deleted_at=None,
+                        version=1,
+                    )
+                    self.store.add_entry(entry)
+                    changes.entries_added.add(entry_id)
+                if newest_update is None or updated_at > newest_update:
+                    newest_update = updated_at
+            profile.relay_last_self_history_pull_at = newest_update or datetime.now(timezone.utc)
+            self.store.update_profile(profile)
+        return changes
+
+    def reconcile_settings(self, config: RelayConfig, profile: UserProfile, payload: dict) -> SyncChanges:
+        remote_settings = payload.get("settings") if isinstance(payload, dict) else None
+        remote_updated = parse_timestamp(payload.get("updated_at")) if payload else None
+        local_updated = profile.settings_updated_at
+        if remote_updated and (local_updated is None or remote_updated > local_updated):
+            changed = apply_settings_payload(profile, remote_settings)
+            profile.settings_updated_at = remote_updated
+            self.store.update_profile(profile)
+            return SyncChanges(profile=True, settings=changed)
+        if (local_updated and (remote_updated is None or local_updated > remote_updated)) or (
+            local_updated is None and remote_updated is None
+        ):
+            settings_payload = build_settings_payload(profile, remote_settings)
+
+            def apply(result: dict) -> SyncChanges:
+                updated = parse_timestamp(result.get("updated_at")) if result else None
+                profile.settings_updated_at = updated or utc_now()
+                self.store.update_profile(profile)
+                return SyncChanges(profile=True)
+
+            push = SyncTask(
+                "push_settings",
+                lambda: self.transport.update_profile_settings(config, settings_payload),
+                apply,
+            )
+            return SyncChanges(follow_up=[push])
+        return SyncChanges()
+
+    def merge_reminder_schedules(self, config: RelayConfig, profile: UserProfile, payload: dict) -> SyncChanges:
+        remote = payload.get("reminders", []) if isinstance(payload, dict) else []
+        remote_by_id: dict[UUID, dict] = {}
+        for item in remote:
+            reminder_id = _uuid(item.get("id"))
+            if reminder_id is not None:
+                remote_by_id[reminder_id] = item
+        last_sync = profile.relay_last_reminder_sync_at
+        pending_upserts: list[ReminderRule] = []
+        pending_deletes: list[ReminderRule] = []
+        next_reminders: list[ReminderRule] = []
+        for rule in profile.self_reminders:
+            remote_item = remote_by_id.get(rule.reminder_id)
+            if rule.is_deleted:
+                if remote_item:
+                    pending_deletes.append(rule)
+                    next_reminders.append(rule)
+                continue
+            if remote_item:
+                remote_updated = parse_timestamp(remote_item.get("updated_at"))
+                if remote_updated and (rule.updated_at is None or remote_updated > rule.updated_at):
+                    _apply_remote_reminder(rule, remote_item, remote_updated)
+                elif rule.updated_at and (remote_updated is None or rule.updated_at > remote_updated):
+                    pending_upserts.append(rule)
+                next_reminders.append(rule)
+            elif last_sync is None or (rule.updated_at and rule.updated_at > last_sync):
+                pending_upserts.append(rule)
+                next_reminders.append(rule)
+        known = {rule.reminder_id for rule in next_reminders}
+        for reminder_id, item in remote_by_id.items():
+            if reminder_id not in known:
+                next_reminders.append(_reminder_from_payload(reminder_id, item))
+        profile.self_reminders = next_reminders
+        if not pending_upserts and not pending_deletes:
+            profile.relay_last_reminder_sync_at = utc_now()
+            self.store.update_profile(profile)
+            return SyncChanges(profile=True)
+        self.store.update_profile(profile)
+        upserts = [reminder_payload(rule) for rule in pending_upserts]
+        deletes = [str(rule.reminder_id) for rule in pending_deletes]
+
+        def fetch() -> bool:
+            for item in upserts:
+                self.transport.upsert_reminder_schedule(config, item)
+            for reminder_id in deletes:
+                self.transport.delete_reminder_schedule(config, reminder_id)
+            return True
+
+        def apply(_result: object) -> SyncChanges:
+            profile.relay_last_reminder_sync_at = utc_now()
+            profile.self_reminders = [rule for rule in profile.self_reminders if not rule.is_deleted]
+            self.store.update_profile(profile)
+            return SyncChanges(profile=True)
+
+        return SyncChanges(profile=True, follow_up=[SyncTask("push_reminders", fetch, apply)])
+
+    def _run(self, tasks: list[SyncTask], concurrency: int) -> SyncChanges:
+        changes = SyncChanges()
+        with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="sync") as pool:
+            pending: list[tuple[SyncTask, Future]] = [(task, pool.submit(task.fetch)) for task in tasks]
+            while pending:
+                task, future = pending.pop(0)
+                try:
+                    step = task.apply(future.result())
+                except RelayError as exc:
+                    changes.errors.append(f"{task.name}: {exc}")
+                    continue
+                pending.extend((follow_up, pool.submit(follow_up.fetch)) for follow_up in step.follow_up)
+                changes.merge(step)
+        return changes
+
+
+def needs_full_history(profile: UserProfile) -> bool:
+    for friend in profile.friends:
+        if friend.status != "connected":
+            continue
+        if (friend.received_share_weight or friend.received_share_waist) and not friend.shared_entries:
+            return True
+    return False
+
+
+def profile_too_large(profile: UserProfile) -> bool:
+    return bool(profile.avatar_b64 and len(profile.avatar_b64) > MAX_AVATAR_LENGTH)
+
+
+def find_friend(profile: UserProfile, friend_id: UUID) -> FriendLink | None:
+    for friend in profile.friends:
+        if friend.friend_id == friend_id:
+            return friend
+    return None
+
+
+def merge_shared_entries(friend: FriendLink, entries_payload: list[dict]) -> None:
+    existing = {entry.entry_id: entry for entry in friend.shared_entries}
+    changed = False
+    for payload in entries_payload:
+        entry_id = _uuid(payload.get("entry_id"))
+        if entry_id is None:
+            continue
+        updated_at = parse_timestamp(payload.get("updated_at"))
+        if updated_at is None:
+            continue
+        if payload.get("is_deleted", False):
+            if entry_id in existing:
+                del existing[entry_id]
+                changed = True
+            continue
+        measured_at = parse_timestamp(payload.get("measured_at"))
+        if measured_at is None:
+            continue
+        date_local_text = payload.get("date_local")
+        try:
+            date_local = date.fromisoformat(date_local_text) if date_local_text else None
+        except ValueError:
+            date_local = None
+        entry = SharedEntry(
+            entry_id=entry_id,
+            measured_at=measured_at,
+            date_local=date_local,
+            weight_kg=payload.get("weight_kg"),
+            waist_cm=payload.get("waist_cm"),
+            updated_at=updated_at,
+            is_deleted=False,
+        )
+        if existing.get(entry_id) == entry:
+            continue
+        existing[entry_id] = entry
+        changed = True
+    # Keep the list object stable when nothing changed; views key their caches on it.
+    if changed:
+        friend.shared_entries = sorted(existing.values(), key=lambda item: item.measured_at)
+
+
+def apply_settings_payload(profile: UserProfile, settings: dict | None) -> bool:
+    if not isinstance(settings, dict):
+        return False
+    changed = False
+    if isinstance(settings.get("display_name"), str) and settings["display_name"] != profile.display_name:
+        profile.display_name = settings["display_name"]
+        changed = True
+    if "avatar_b64" in settings and settings["avatar_b64"] != profile.avatar_b64:
+        profile.avatar_b64 = settings.get("avatar_b64")
+        changed = True
+    if settings.get("weight_unit") in {WeightUnit.KG.value, WeightUnit.LB.value}:
+        next_unit = WeightUnit(settings["weight_unit"])
+        if next_unit != profile.weight_unit:
+            profile.weight_unit = next_unit
+            changed = True
+    if settings.get("waist_unit") in {LengthUnit.CM.value, LengthUnit.IN.value}:
+        next_unit = LengthUnit(settings["waist_unit"])
+        if next_unit != profile.waist_unit:
+            profile.waist_unit = next_unit
+            changed = True
+    if isinstance(settings.get("track_waist"), bool) and settings["track_waist"] != profile.track_waist:
+        profile.track_waist = settings["track_waist"]
+        if not profile.track_waist:
+            profile.goal_waist_cm = None
+        changed = True
+    if isinstance(settings.get("accent_color"), str) and settings["accent_color"] != profile.accent_color:
+        profile.accent_color = settings["accent_color"]
+        changed = True
+    if isinstance(settings.get("dark_mode"), bool) and settings["dark_mode"] != profile.dark_mode:
+        profile.dark_mode = settings["dark_mode"]
+        changed = True
+    for name in ("goal_weight_kg", "goal_weight_band_kg", "goal_waist_cm", "goal_waist_band_cm"):
+        if name in settings and settings[name] != getattr(profile, name):
+            setattr(profile, name, settings.get(name))
+            changed = True
+    for name in ("waist_convention_label", "timezone"):
+        if isinstance(settings.get(name), str) and settings[name] != getattr(profile, name):
+            setattr(profile, name, settings[name])
+            changed = True
+    return changed
+
+
+def build_settings_payload(profile: UserProfile, existing: dict | None) -> dict:
+    payload = dict(existing) if isinstance(existing, dict) else {}
+    payload.update(
+        {
+            "display_name": profile.display_name,
+            "avatar_b64": profile.avatar_b64,
+            "weight_unit": profile.weight_unit.value,
+            "waist_unit": profile.waist_unit.value,
+            "track_waist": profile.track_waist,
+            "accent_color": profile.accent_color,
+            "dark_mode": profile.dark_mode,
+            "goal_weight_kg": profile.goal_weight_kg,
+            "goal_weight_band_kg": profile.goal_weight_band_kg,
+            "goal_waist_cm": profile.goal_waist_cm,
+            "goal_waist_band_cm": profile.goal_waist_band_cm,
+            "waist_convention_label": profile.waist_convention_label,
+            "timezone": profile.timezone,
+        }
+    )
+    return payload
+
+
+def serialize_entry(entry: MeasurementEntry) -> dict[str, object]:
+    return {
+        "entry_id": str(entry.entry_id),
+        "measured_at": entry.measured_at.isoformat(),
+        "date_local": entry.date_local.isoformat() if entry.date_local else None,
+        "weight_kg": entry.weight_kg,
+        "waist_cm": entry.waist_cm,
+        "note": entry.note,
+        "updated_at": entry.updated_at.isoformat(),
+        "is_deleted": entry.is_deleted,
+    }
+
+
+def reminder_payload(rule: ReminderRule) -> dict:
+    return {
+        "id": str(rule.reminder_id),
+        "message": rule.message,
+        "time": rule.time,
+        "days": list(rule.days),
+        "enabled": rule.enabled,
+        "timezone": _local_timezone(),
+    }
+
+
+def parse_timestamp(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def _apply_remote_reminder(rule: ReminderRule, data: dict, updated_at: datetime | None) -> None:
+    rule.message = data.get("message") or rule.message
+    rule.time = data.get("time") or rule.time
+    rule.days = list(data.get("days") or rule.days or [0, 1, 2, 3, 4, 5, 6])
+    rule.enabled = data.get("enabled", True) is True
+    rule.updated_at = updated_at or utc_now()
+    rule.is_deleted = False
+    rule.deleted_at = None
+
+
+def _reminder_from_payload(reminder_id: UUID, data: dict) -> ReminderRule:
+    updated_at = parse_timestamp(data.get("updated_at")) if data else None
+    return ReminderRule(
+        reminder_id=reminder_id,
+        message=data.get("message", "Time to log your weight today."),
+        time=data.get("time", "08:00"),
+        days=list(data.get("days") or [0, 1, 2, 3, 4, 5, 6]),
+        enabled=data.get("enabled", True) is True,
+        updated_at=updated_at or utc_now(),
+        is_deleted=False,
+    )
+
+
+def _latest_shared_update(friend: FriendLink) -> datetime | None:
+    if not friend.shared_entries:
+        return None
+    return max(entry.updated_at for entry in friend.shared_entries)
+
+
+def _local_timezone() -> str:
+    tzinfo = datetime.now().astimezone().tzinfo
+    if tzinfo is not None and hasattr(tzinfo, "key"):
+        return tzinfo.key  # type: ignore[return-value]
+    return "UTC"
+
+
+def _friend_id(code: object) -> UUID | None:
+    text = str(code or "").strip()
+    if not text:
+        return None
+    try:
+        return decode_friend_code(text)
+    except ValueError:
+        return None
+
+
+def _uuid(value: object) -> UUID | None:
+    if not value:
+        return None
+    try:
+        return UUID(str(value))
+    except (ValueError, TypeError):
+        return None
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import random
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable, Mapping
+
+
+@dataclass(frozen=True)
+class SyncPolicy:
+    interval: float
+    max_interval: float
+    backoff: float = 2.0
+
+
+DEFAULT_POLICIES: dict[str, SyncPolicy] = {
+    "register": SyncPolicy(30.0, 900.0),
+    "profile": SyncPolicy(60.0, 900.0),
+    "status": SyncPolicy(60.0, 900.0),
+    "push_history": SyncPolicy(30.0, 600.0),
+    "inbox": SyncPolicy(15.0, 180.0),
+    "history": SyncPolicy(30.0, 600.0),
+    "self_history": SyncPolicy(60.0, 900.0),
+    "settings": SyncPolicy(300.0, 1800.0),
+    "reminders": SyncPolicy(300.0, 1800.0),
+}
+
+
+@dataclass
+class _Resource:
+    policy: SyncPolicy
+    interval: float
+    due_at: float
+    in_flight: bool = False
+    triggered: bool = False
+    failures: int = 0
+    last_digest: str | None = None
+
+
+class SyncScheduler:
+    def __init__(
+        self,
+        policies: Mapping[str, SyncPolicy] | None = None,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        jitter: float = 0.1,
+    ) -> None:
+        self.clock = clock
+        self.jitter = jitter
+        self.paused = False
+        now = clock()
+        self._resources = {
+            name: _Resource(policy=policy, interval=policy.interval, due_at=now)
+            for name, policy in (policies or DEFAULT_POLICIES).items()
+        }
+
+    @property
+    def names(self) -> tuple[str, ...]:
+        return tuple(self._resources)
+
+    def due(self, names: Iterable[str] | None = None) -> list[str]:
+        if self.paused:
+            return []
+        now = self.clock()
+        return [
+            name
+            for name, resource in self._select(names)
+            if not resource.in_flight and resource.due_at <= now
+        ]
+
+    def next_delay(self, names: Iterable[str] | None = None) -> float | None:
+        if self.paused:
+            return None
+        pending = [resource.due_at for _name, resource in self._select(names) if not resource.in_flight]
+        if not pending:
+            return None
+        return max(0.0, min(pending) - self.clock())
+
+    def started(self, name: str) -> None:
+        self._resources[name].in_flight = True
+
+    def completed(self, name: str, result: object = None) -> bool:
+        resource = self._resources[name]
+        changed = False
+        if result is not None:
+            digest = _digest(result)
+            changed = digest != resource.last_digest
+            resource.last_digest = digest
+        resource.in_flight = False
+        resource.failures = 0
+        if changed:
+            resource.interval = resource.policy.interval
+        else:
+            resource.interval = min(resource.policy.max_interval, resource.interval * resource.policy.backoff)
+        self._schedule(resource)
+        return changed
+
+    def in_flight(self, name: str) -> bool:
+        resource = self._resources.get(name)
+        return resource is not None and resource.in_flight
+
+    def failed(self, name: str) -> None:
+        resource = self._resources[name]
+        resource.in_flight = False
+        resource.failures += 1
+        policy = resource.policy
+        resource.interval = min(policy.max_interval, policy.interval * policy.backoff**resource.failures)
+        self._schedule(resource)
+
+    def trigger(self, *names: str) -> None:
+        now = self.clock()
+        for name in names:
+            resource = self._resources[name]
+            resource.interval = resource.policy.interval
+            resource.due_at = now
+            # A trigger that lands mid-flight reruns the resource as soon as it settles.
+            resource.triggered = resource.in_flight
+
+    def pause(self) -> None:
+        self.paused = True
+
+    def resume(self) -> None:
+        self.paused = False
+
+    def _select(self, names: Iterable[str] | None) -> list[tuple[str, _Resource]]:
+        if names is None:
+            return list(self._resources.items())
+        return [(name, self._resources[name]) for name in names if name in self._resources]
+
+    def _schedule(self, resource: _Resource) -> None:
+        if resource.triggered:
+            resource.triggered = False
+            resource.interval = resource.policy.interval
+            resource.due_at = self.clock()
+            return
+        spread = resource.interval * self.jitter
+        resource.due_at = self.clock() + resource.interval + random.uniform(-spread, spread)
+
+
+def _digest(result: object) -> str:
+    # Only a fingerprint is kept: history payloads can run to megabytes per resource.
+    encoded = json.dumps(result, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import gzip
+import json
+import threading
+import zlib
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from body_metrics_tracker.relay import client
+
+
+@dataclass
+class RecordedRequest:
+    method: str
+    path: str
+    headers: dict[str, str]
+    raw_body: bytes
+    body: dict | None
+
+
+@dataclass
+class StandInRelay:
+    url: str
+    # Mimics a relay deployed before request compression: compressed bodies get this status.
+    reject_gzip_with: int | None = None
+    reject_all_with: int | None = None
+    response_encoding: str | None = None
+    response: dict = field(default_factory=lambda: {"ok": True})
+    requests: list[RecordedRequest] = field(default_factory=list)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    relay: StandInRelay
+
+    def do_GET(self) -> None:
+        self._handle()
+
+    def do_POST(self) -> None:
+        self._handle()
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+    def _handle(self) -> None:
+        raw = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        headers = {name.lower(): value for name, value in self.headers.items()}
+        compressed = headers.get("content-encoding") == "gzip"
+        if compressed and self.relay.reject_gzip_with:
+            self.relay.requests.append(RecordedRequest(self.command, self.path, headers, raw, None))
+            self._reply(self.relay.reject_gzip_with, {"error": "Invalid JSON"})
+            return
+        text = gzip.decompress(raw) if compressed else raw
+        body = json.loads(text) if text else None
+        self.relay.requests.append(RecordedRequest(self.command, self.path, headers, raw, body))
+        if self.relay.reject_all_with:
+            self._reply(self.relay.reject_all_with, {"error": "Invalid payload"})
+            return
+        self._reply(200, self.relay.response)
+
+    def _reply(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        encoding = self.relay.response_encoding
+        if encoding == "gzip":
+            body = gzip.compress(body)
+        elif encoding == "deflate":
+            body = zlib.compress(body)
+        elif encoding == "raw-deflate":
+            compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+            body = compressor.compress(body) + compressor.flush()
+            encoding = "deflate"
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def relay_client(monkeypatch):
+    monkeypatch.setenv("BMT_ALLOW_INSECURE_HTTP", "1")
+    client._gzip_unsupported.clear()
+    yield
+    client.close_connections()
+    client._gzip_unsupported.clear()
+
+
+@pytest.fixture
+def stand_in_relay(relay_client):
+    servers = []
+
+    def start(**options) -> StandInRelay:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        relay = StandInRelay(url=f"http://127.0.0.1:{server.server_address[1]}", **options)
+        server.RequestHandlerClass = type("Handler", (_Handler,), {"relay": relay})
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return relay
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import random
+from datetime import date, datetime, timedelta, timezone
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+from body_metrics_tracker.core.aggregation import (
+    WAIST,
+    WEIGHT,
+    AggregateEngine,
+    compute_weekly_deltas,
+    compute_weekly_summaries,
+    week_start_date,
+)
+from body_metrics_tracker.core.analytics import (
+    MONTH,
+    WEEK,
+    EntryColumns,
+    monthly_summaries,
+    period_stats,
+    weekly_deltas,
+    weekly_summaries,
+    within_goal_band,
+)
+from body_metrics_tracker.core.models import MeasurementEntry, SharedEntry
+
+USER = uuid4()
+
+
+def _entry(day: date | None, weight: float, waist: float | None = None, deleted: bool = False) -> MeasurementEntry:
+    measured = datetime.combine(day or date(2024, 1, 1), datetime.min.time(), tzinfo=timezone.utc)
+    entry = MeasurementEntry(user_id=USER, measured_at=measured, weight_kg=weight, waist_cm=waist, is_deleted=deleted)
+    entry.date_local = day
+    return entry
+
+
+def _random_entries(seed: int, count: int = 400) -> list[MeasurementEntry]:
+    rng = random.Random(seed)
+    start = date(2021, 3, 1)
+    entries = []
+    for _ in range(count):
+        # Sparse days over three years leave plenty of empty weeks between logged ones.
+        day = start + timedelta(days=rng.randrange(0, 3 * 365, rng.choice((1, 3, 11))))
+        waist = rng.uniform(70, 110) if rng.random() < 0.6 else None
+        entries.append(_entry(day, rng.uniform(50, 130), waist, deleted=rng.random() < 0.1))
+    return entries
+
+
+def _weekly(entries) -> tuple[list[date], list[float], list[int]]:
+    stats = period_stats(EntryColumns.from_entries(entries), WEIGHT, WEEK)
+    return stats.start_dates(), stats.mean.tolist(), stats.counts.tolist()
+
+
+def _waist_by_week(entries) -> dict[date, float]:
+    stats = period_stats(EntryColumns.from_entries(entries), WAIST, WEEK)
+    return dict(zip(stats.start_dates(), stats.mean.tolist()))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_weekly_buckets_match_compute_weekly_summaries(seed):
+    entries = _random_entries(seed)
+    expected = compute_weekly_summaries(entries)
+
+    starts, means, counts = _weekly(entries)
+    waists = _waist_by_week(entries)
+
+    assert starts == [summary.week_start_date_local for summary in expected]
+    assert means == [summary.avg_weight_kg for summary in expected]
+    assert counts == [summary.count_entries for summary in expected]
+    assert [waists.get(start) for start in starts] == [summary.avg_waist_cm for summary in expected]
+
+
+def test_deleted_entries_are_ignored():
+    day = date(2024, 5, 6)
+    entries = [_entry(day, 80.0, 90.0), _entry(day, 200.0, 150.0, deleted=True)]
+
+    assert _weekly(entries) == ([week_start_date(day)], [80.0], [1])
+    assert _waist_by_week(entries) == {week_start_date(day): 90.0}
+    assert compute_weekly_summaries(entries)[0].avg_weight_kg == 80.0
+
+
+def test_weeks_without_waist_have_no_waist_bucket():
+    first, second = date(2024, 5, 6), date(2024, 5, 13)
+    entries = [_entry(first, 80.0), _entry(first, 81.0), _entry(second, 79.0, 88.0)]
+    summaries = compute_weekly_summaries(entries)
+
+    assert _waist_by_week(entries) == {week_start_date(second): 88.0}
+    assert [summary.avg_waist_cm for summary in summaries] == [None, 88.0]
+
+
+def test_gaps_between_weeks_are_preserved():
+    days = [date(2024, 1, 1), date(2024, 1, 9), date(2024, 2, 20)]
+    entries = [_entry(day, 80.0 + index) for index, day in enumerate(days)]
+
+    starts, _means, _counts = _weekly(entries)
+
+    assert starts == [summary.week_start_date_local for summary in compute_weekly_summaries(entries)]
+    assert np.diff([start.toordinal() for start in starts]).tolist() == [7, 42]
+
+
+def test_entries_without_local_date_are_skipped_like_the_engine():
+    dated = _entry(date(2024, 5, 6), 80.0, 90.0)
+    undated = _entry(None, 100.0, 100.0)
+    engine = AggregateEngine([dated, undated])
+
+    columns = EntryColumns.from_entries([dated, undated])
+    weekly = period_stats(columns, WEIGHT, WEEK)
+
+    assert weekly.start_dates() == [week.period_start for week in engine.weeks(WEIGHT)]
+    assert weekly.mean.tolist() == [week.mean for week in engine.weeks(WEIGHT)]
+    with pytest.raises(ValueError):
+        compute_weekly_summaries([dated, undated])
+
+
+@pytest.mark.parametrize("period", [WEEK, MONTH])
+@pytest.mark.parametrize("metric", [WEIGHT, WAIST])
+def test_period_stats_match_aggregate_engine(period, metric):
+    entries = _random_entries(7)
+    engine = AggregateEngine(entries)
+    expected = engine.weeks(metric) if period == WEEK else engine.months(metric)
+
+    stats = period_stats(EntryColumns.from_entries(entries), metric, period)
+
+    assert stats.start_dates() == [item.period_start for item in expected]
+    assert stats.counts.tolist() == [item.count for item in expected]
+    assert stats.mean.tolist() == [item.mean for item in expected]
+    assert stats.minimum.tolist() == [item.minimum for item in expected]
+    assert stats.maximum.tolist() == [item.maximum for item in expected]
+
+
+def test_shared_entries_with_unshared_weight():
+    day = date(2024, 5, 6)
+    entries = [
+        SharedEntry(
+            entry_id=uuid4(),
+            measured_at=datetime(2024, 5, 6, 8, tzinfo=timezone.utc),
+            date_local=day,
+            weight_kg=None,
+            waist_cm=85.0,
+            updated_at=datetime(2024, 5, 6, 8, tzinfo=timezone.utc),
+        )
+    ]
+    columns = EntryColumns.from_entries(entries)
+
+    assert len(period_stats(columns, WEIGHT, WEEK)) == 0
+    assert period_stats(columns, WAIST, WEEK).mean.tolist() == [85.0]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_weekly_summaries_and_deltas_match_the_scalar_path(seed):
+    entries = _random_entries(seed)
+    expected = compute_weekly_summaries(entries)
+    columns = EntryColumns.from_entries(entries)
+
+    assert weekly_summaries(columns) == expected
+    assert weekly_deltas(columns) == compute_weekly_deltas(expected)
+    assert AggregateEngine(entries).weekly_deltas() == compute_weekly_deltas(expected)
+
+
+def test_deltas_skip_gaps_and_weeks_without_waist():
+    days = [date(2024, 1, 1), date(2024, 1, 8), date(2024, 1, 15), date(2024, 2, 20)]
+    entries = [_entry(days[0], 80.0, 90.0), _entry(days[1], 79.0), _entry(days[2], 78.5, 89.0), _entry(days[3], 77.0)]
+    expected = compute_weekly_deltas(compute_weekly_summaries(entries))
+
+    deltas = weekly_deltas(EntryColumns.from_entries(entries))
+
+    assert deltas == expected
+    assert [delta.delta_weight_kg for delta in deltas] == [None, -1.0, -0.5, None]
+    assert [delta.delta_waist_cm for delta in deltas] == [None, None, None, None]
+    assert AggregateEngine([]).weekly_deltas() == []
+
+
+def test_monthly_summaries_match_aggregate_engine():
+    entries = _random_entries(11)
+
+    assert monthly_summaries(EntryColumns.from_entries(entries)) == AggregateEngine(entries).monthly_summaries()
+
+
+@pytest.mark.parametrize(("goal", "band"), [(80.0, 2.0), (80.0, None), (None, 2.0), (95.0, 0.5)])
+def test_goal_band_matches_a_scalar_check(goal, band):
+    values = np.array([77.5, 78.0, 79.9, 80.0, 81.0, 82.0, 82.5, 95.4, 95.6])
+
+    expected = [goal is not None and abs(value - goal) <= (band or 0.0) for value in values.tolist()]
+
+    assert within_goal_band(values, goal, band).tolist() == expected
+
+
+def test_extended_columns_match_a_full_rebuild():
+    entries = _random_entries(3, count=50)
+    full = EntryColumns.from_entries(entries)
+
+    extended = EntryColumns.from_entries(entries[:30]).extended(entries[30:])
+
+    for name in ("timestamps", "day_ordinals", "weight_kg", "waist_cm", "deleted"):
+        assert np.array_equal(getattr(extended, name), getattr(full, name), equal_nan=name in ("weight_kg", "waist_cm"))
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import errno
+import os
+
+import pytest
+
+from body_metrics_tracker.storage import SessionKey
+from body_metrics_tracker.storage import journal as journal_module
+from body_metrics_tracker.storage.journal import Journal, new_journal_id
+
+
+@pytest.fixture
+def key():
+    return SessionKey.derive("secret", iterations=1000)
+
+
+def test_failed_append_leaves_no_torn_record(tmp_path, key, monkeypatch):
+    journal = Journal(tmp_path / "store.journal")
+    journal_id = new_journal_id()
+    journal.reset(journal_id)
+    journal.append(key, [b"first", b"second"])
+    size = journal.size
+
+    real_write = os.write
+
+    def torn_write(fd, data):
+        # Half the batch reaches the disk, then the device fills up.
+        monkeypatch.setattr(journal_module.os, "write", real_write)
+        real_write(fd, bytes(data[: len(data) // 2]))
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    monkeypatch.setattr(journal_module.os, "write", torn_write)
+    with pytest.raises(OSError):
+        journal.append(key, [b"third", b"fourth"])
+    assert journal.path.stat().st_size == size
+    assert journal.count == 2
+
+    journal.append(key, [b"third", b"fourth"])
+
+    assert Journal(journal.path).replay(key, journal_id) == [b"first", b"second", b"third", b"fourth"]
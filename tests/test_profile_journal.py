@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+
+from body_metrics_tracker.core.models import FriendLink, SharedEntry, UserProfile
+from body_metrics_tracker.storage import JournalRecord, LocalStore, ProfileJournal, SessionKey
+from body_metrics_tracker.storage.codec import encode_profile
+
+START = datetime(2024, 3, 1, 8, tzinfo=timezone.utc)
+
+
+def _shared(day: int, weight: float = 80.0) -> SharedEntry:
+    measured = START + timedelta(days=day)
+    return SharedEntry(entry_id=uuid4(), measured_at=measured, weight_kg=weight, waist_cm=None, updated_at=measured)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return LocalStore(tmp_path / "store.bmt")
+
+
+@pytest.fixture
+def session():
+    return SessionKey.derive("secret", iterations=1000)
+
+
+@pytest.fixture
+def profile():
+    friend = FriendLink(
+        friend_id=uuid4(),
+        display_name="Sam",
+        status="connected",
+        avatar_b64="c2Ft",
+        shared_entries=[_shared(day) for day in range(50)],
+    )
+    return UserProfile(display_name="Test", avatar_b64="bWU=", friends=[friend], settings_updated_at=START)
+
+
+def test_inbox_tick_is_not_journaled(profile):
+    journal = ProfileJournal([profile])
+
+    profile.relay_last_checked_at = START
+
+    assert journal.records(profile) == []
+
+
+def test_field_change_leaves_out_avatars_and_shared_entries(profile):
+    journal = ProfileJournal([profile])
+
+    profile.display_name = "Renamed"
+    records = journal.records(profile)
+
+    assert [record.op for record in records] == ["profile_fields"]
+    payload = records[0].encoded()
+    assert payload["display_name"] == "Renamed"
+    assert "avatar_b64" not in payload
+    assert "shared_entries" not in payload["friends"][0]
+    assert "avatar_b64" not in payload["friends"][0]
+
+
+def test_shared_entries_are_journaled_as_deltas(profile):
+    journal = ProfileJournal([profile])
+    friend = profile.friends[0]
+    added, gone = _shared(60), friend.shared_entries[3]
+    edited = replace(friend.shared_entries[7], weight_kg=70.0)
+
+    friend.shared_entries = [entry for entry in friend.shared_entries if entry is not gone]
+    friend.shared_entries[6] = edited
+    friend.shared_entries.append(added)
+    records = journal.records(profile)
+
+    assert [record.op for record in records] == ["shared_entries"]
+    payload = records[0].encoded()
+    assert [item["entry_id"] for item in payload["upsert"]] == [str(edited.entry_id), str(added.entry_id)]
+    assert payload["delete"] == [str(gone.entry_id)]
+
+
+@pytest.mark.parametrize("staged", [False, True])
+def test_profile_deltas_round_trip(store, session, profile, staged):
+    data = store.initialize(session, profile)
+    journal = ProfileJournal(data.profiles)
+    friend = profile.friends[0]
+
+    friend.shared_entries = friend.shared_entries[5:] + [_shared(70, 90.0)]
+    store.write_records(session, journal.records(profile))
+    profile.avatar_b64 = None
+    friend.avatar_b64 = "bmV3"
+    profile.goal_weight_kg = 75.0
+    newcomer = FriendLink(friend_id=uuid4(), display_name="Kim", shared_entries=[_shared(1)])
+    profile.friends = [friend, newcomer]
+    store.write_records(session, journal.records(profile))
+    friend.shared_entries = friend.shared_entries[:-1]
+    store.write_records(session, journal.records(profile))
+
+    if staged:
+        loaded, deferred = store.load_staged(session)
+        for chunk in deferred.chunks():
+            loaded.merge(chunk)
+    else:
+        loaded = store.load(session)
+
+    assert [encode_profile(item) for item in loaded.profiles] == [encode_profile(profile)]
+
+
+def test_whole_profile_records_still_replay(store, session, profile):
+    store.initialize(session, profile)
+    profile.display_name = "Legacy"
+    profile.friends[0].shared_entries = profile.friends[0].shared_entries[:10]
+    store.write_records(session, [JournalRecord("profile", encode_profile(profile))])
+
+    loaded, deferred = store.load_staged(session)
+    for chunk in deferred.chunks():
+        loaded.merge(chunk)
+
+    assert [encode_profile(item) for item in loaded.profiles] == [encode_profile(profile)]
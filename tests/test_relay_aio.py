@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Callable
+
+import pytest
+
+from body_metrics_tracker.relay import client
+from body_metrics_tracker.relay.aio import AsyncRelayClient, StreamPool
+from body_metrics_tracker.relay.client import RelayConfig, RelayError
+
+pytestmark = pytest.mark.usefixtures("relay_client")
+
+
+def _response(body: bytes, *, version: str = "HTTP/1.1", headers: str = "") -> bytes:
+    head = f"{version} 200 OK\r\nContent-Type: application/json\r\n{headers}Content-Length: {len(body)}\r\n\r\n"
+    return head.encode("latin-1") + body
+
+
+class ScriptedServer:
+    def __init__(self, respond: Callable[[str], bytes | None]) -> None:
+        self.respond = respond
+        self.connections = 0
+        self.requests: list[tuple[str, bytes]] = []
+
+    async def __aenter__(self) -> ScriptedServer:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.url = f"http://127.0.0.1:{self._server.sockets[0].getsockname()[1]}"
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        self._server.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while True:
+                head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+                length = next(
+                    (int(line.split(":", 1)[1]) for line in head if line.lower().startswith("content-length:")),
+                    0,
+                )
+                self.requests.append((head[0], await reader.readexactly(length)))
+                reply = self.respond(head[0])
+                if reply is None:
+                    # Never answer; wait for the client to give up and hang up.
+                    await reader.read()
+                    return
+                writer.write(reply)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+def _run(scenario):
+    return asyncio.run(scenario())
+
+
+def test_content_length_body_and_stream_reuse():
+    async def scenario():
+        async with ScriptedServer(lambda _line: _response(b'{"ok": true}')) as server:
+            pool = StreamPool()
+            first = await pool.request("GET", f"{server.url}/v1/inbox")
+            second = await pool.request("POST", f"{server.url}/v1/status", b"{}")
+            assert first.status == second.status == 200
+            assert first.body == b'{"ok": true}'
+            assert server.connections == 1
+            assert pool.idle_count() == 1
+            pool.close()
+
+    _run(scenario)
+
+
+def test_chunked_body_is_reassembled():
+    chunked = (
+        b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n"
+        b"5;ext=1\r\nhello\r\n6\r\n world\r\n0\r\nX-Trailer: 1\r\n\r\n"
+    )
+
+    async def scenario():
+        async with ScriptedServer(lambda _line: chunked) as server:
+            pool = StreamPool()
+            response = await pool.request("GET", f"{server.url}/v1/inbox")
+            assert response.body == b"hello world"
+            again = await pool.request("GET", f"{server.url}/v1/inbox")
+            assert again.body == b"hello world"
+            assert server.connections == 1
+            pool.close()
+
+    _run(scenario)
+
+
+@pytest.mark.parametrize(
+    ("version", "headers", "reused"),
+    [
+        ("HTTP/1.1", "", True),
+        ("HTTP/1.1", "Connection: close\r\n", False),
+        ("HTTP/1.0", "", False),
+        ("HTTP/1.0", "Connection: keep-alive\r\n", True),
+    ],
+)
+def test_connection_persistence_follows_response_version(version, headers, reused):
+    async def scenario():
+        async with ScriptedServer(lambda _line: _response(b"{}", version=version, headers=headers)) as server:
+            pool = StreamPool()
+            await pool.request("GET", f"{server.url}/v1/inbox")
+            assert pool.idle_count() == (1 if reused else 0)
+            await pool.request("GET", f"{server.url}/v1/inbox")
+            assert server.connections == (1 if reused else 2)
+            pool.close()
+
+    _run(scenario)
+
+
+def test_body_without_length_reads_to_close():
+    async def scenario():
+        async def handle(reader, writer):
+            await reader.readuntil(b"\r\n\r\n")
+            writer.write(b"HTTP/1.1 200 OK\r\n\r\nstreamed")
+            await writer.drain()
+            writer.close()
+
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        url = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/v1/inbox"
+        pool = StreamPool()
+        response = await pool.request("GET", url)
+        assert response.body == b"streamed"
+        assert pool.idle_count() == 0
+        server.close()
+
+    _run(scenario)
+
+
+def test_relay_call_is_parsed():
+    payload = {"invites": [], "friends": [{"friend_code": "ABC"}]}
+
+    async def scenario():
+        async with ScriptedServer(lambda _line: _response(json.dumps(payload).encode())) as server:
+            async with AsyncRelayClient(max_concurrency=2) as relay:
+                config = RelayConfig(base_url=server.url, token="token")
+                results = await asyncio.gather(*(relay.fetch_inbox(config) for _ in range(5)))
+            assert results == [payload] * 5
+            assert [line for line, _body in server.requests] == ["GET /v1/inbox HTTP/1.1"] * 5
+            assert server.connections <= 2
+
+    _run(scenario)
+
+
+def test_timeout_maps_to_relay_error():
+    async def scenario():
+        async with ScriptedServer(lambda _line: None) as server:
+            async with AsyncRelayClient(timeout=0.2) as relay:
+                with pytest.raises(RelayError, match="timed out after 0.2s"):
+                    await relay.fetch_inbox(RelayConfig(base_url=server.url, token="token"))
+                with pytest.raises(RelayError, match="timed out after 0.1s"):
+                    await relay.call(client.fetch_inbox, RelayConfig(base_url=server.url), timeout=0.1)
+
+    _run(scenario)
+
+
+def test_refused_connection_maps_to_relay_error():
+    async def scenario():
+        server = await asyncio.start_server(lambda _reader, _writer: None, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        server.close()
+        await server.wait_closed()
+        async with AsyncRelayClient() as relay:
+            with pytest.raises(RelayError):
+                await relay.fetch_inbox(RelayConfig(base_url=f"http://127.0.0.1:{port}", token="token"))
+
+    _run(scenario)
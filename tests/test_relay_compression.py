@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import gzip
+import json
+
+import pytest
+
+from body_metrics_tracker.relay import client
+from body_metrics_tracker.relay.client import GZIP_MIN_BYTES, RelayConfig, RelayError
+
+
+def _config(relay) -> RelayConfig:
+    return RelayConfig(base_url=relay.url, token="token")
+
+
+def _large_avatar() -> str:
+    return "A" * (GZIP_MIN_BYTES * 2)
+
+
+def test_large_request_body_is_gzipped(stand_in_relay):
+    relay = stand_in_relay()
+    client.update_profile(_config(relay), "Sam", _large_avatar())
+
+    (request,) = relay.requests
+    assert request.headers["content-encoding"] == "gzip"
+    assert request.body == {"display_name": "Sam", "avatar_b64": _large_avatar()}
+    assert len(request.raw_body) < GZIP_MIN_BYTES
+    assert json.loads(gzip.decompress(request.raw_body)) == request.body
+
+
+def test_small_request_body_is_sent_plain(stand_in_relay):
+    relay = stand_in_relay()
+    client.update_profile(_config(relay), "Sam", None)
+
+    (request,) = relay.requests
+    assert "content-encoding" not in request.headers
+    assert len(request.raw_body) < GZIP_MIN_BYTES
+    assert json.loads(request.raw_body) == {"display_name": "Sam", "avatar_b64": None}
+
+
+def test_requests_advertise_compressed_responses(stand_in_relay):
+    relay = stand_in_relay()
+    client.fetch_inbox(_config(relay))
+
+    assert relay.requests[0].headers["accept-encoding"] == "gzip, deflate"
+
+
+@pytest.mark.parametrize("encoding", [None, "gzip", "deflate", "raw-deflate"])
+def test_response_bodies_are_decoded(stand_in_relay, encoding):
+    payload = {"invites": [], "friends": [{"friend_code": "ABC", "display_name": "x" * 4096}]}
+    relay = stand_in_relay(response_encoding=encoding, response=payload)
+
+    assert client.fetch_inbox(_config(relay)) == payload
+
+
+@pytest.mark.parametrize("status", [400, 415])
+def test_legacy_relay_gets_plain_retry_and_is_remembered(stand_in_relay, status):
+    relay = stand_in_relay(reject_gzip_with=status)
+    config = _config(relay)
+
+    assert client.update_profile(config, "Sam", _large_avatar()) == {"ok": True}
+    rejected, retried = relay.requests
+    assert rejected.headers["content-encoding"] == "gzip"
+    assert "content-encoding" not in retried.headers
+    assert retried.body == {"display_name": "Sam", "avatar_b64": _large_avatar()}
+    assert client._gzip_unsupported == {relay.url}
+
+    relay.requests.clear()
+    client.update_profile(config, "Sam", _large_avatar())
+    (request,) = relay.requests
+    assert "content-encoding" not in request.headers
+
+
+def test_gzip_fallback_is_tracked_per_origin(stand_in_relay):
+    legacy = stand_in_relay(reject_gzip_with=415)
+    current = stand_in_relay()
+
+    client.update_profile(_config(legacy), "Sam", _large_avatar())
+    client.update_profile(_config(current), "Sam", _large_avatar())
+
+    assert client._gzip_unsupported == {legacy.url}
+    (request,) = current.requests
+    assert request.headers["content-encoding"] == "gzip"
+
+
+def test_failed_plain_retry_is_not_remembered(stand_in_relay):
+    relay = stand_in_relay(reject_all_with=400)
+
+    with pytest.raises(RelayError, match="Invalid payload"):
+        client.update_profile(_config(relay), "Sam", _large_avatar())
+    assert [request.headers.get("content-encoding") for request in relay.requests] == ["gzip", None]
+    assert client._gzip_unsupported == set()
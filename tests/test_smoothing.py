@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from body_metrics_tracker.core.smoothing import (
+    DAYS,
+    EWMA,
+    POINTS,
+    SECONDS_PER_DAY,
+    Smoother,
+    SmoothingSpec,
+    ewma,
+    moving_average,
+    smooth,
+    time_window_average,
+)
+
+DAY = SECONDS_PER_DAY
+
+
+def _naive_moving_average(values, window):
+    return [sum(values[index - window + 1 : index + 1]) / window for index in range(window - 1, len(values))]
+
+
+def _naive_time_window(times, values, seconds):
+    return [
+        np.mean([value for other, value in zip(times, values) if time - seconds < other <= time])
+        for time in times
+    ]
+
+
+def test_moving_average_matches_window_sums():
+    values = [80.0, 81.5, 79.0, 82.0, 80.5, 78.0, 79.5, 81.0]
+
+    assert moving_average(values, 3) == pytest.approx(_naive_moving_average(values, 3))
+    assert moving_average(values, 1).tolist() == values
+    assert moving_average(values, len(values)) == pytest.approx([np.mean(values)])
+
+
+def test_moving_average_needs_a_full_window():
+    assert moving_average([1.0, 2.0], 3).size == 0
+    assert moving_average([1.0, 2.0], 0).size == 0
+
+
+def test_time_window_average_uses_elapsed_time_not_point_count():
+    # Two readings a day apart, a week-long gap, then a burst of three on one day.
+    times = [0.0, 1 * DAY, 9 * DAY, 9 * DAY + 60, 9 * DAY + 120, 10 * DAY]
+    values = [80.0, 82.0, 70.0, 71.0, 72.0, 74.0]
+
+    result = time_window_average(times, values, 7 * DAY)
+
+    assert result == pytest.approx(_naive_time_window(times, values, 7 * DAY))
+    assert result[2] == 70.0
+    assert result[-1] == pytest.approx(np.mean([70.0, 71.0, 72.0, 74.0]))
+
+
+def test_time_window_average_excludes_the_point_exactly_one_window_back():
+    result = time_window_average([0.0, 7 * DAY], [10.0, 20.0], 7 * DAY)
+
+    assert result.tolist() == [10.0, 20.0]
+
+
+def test_ewma_follows_the_recursive_definition():
+    values = [80.0, 82.0, 78.0, 81.0]
+    alpha = 2.0 / (7 + 1.0)
+    expected = [values[0]]
+    for value in values[1:]:
+        expected.append(expected[-1] + alpha * (value - expected[-1]))
+
+    assert ewma(values, 7) == pytest.approx(expected)
+    assert ewma([], 7).size == 0
+
+
+def test_smooth_aligns_points_mode_to_window_ends():
+    times = np.array([0.0, 1.0, 5.0, 6.0])
+    x, y = smooth(times, [1.0, 2.0, 3.0, 4.0], SmoothingSpec(POINTS, 2))
+
+    assert x.tolist() == [1.0, 5.0, 6.0]
+    assert y.tolist() == [1.5, 2.5, 3.5]
+
+
+SPECS = [
+    SmoothingSpec(POINTS, 1),
+    SmoothingSpec(POINTS, 7),
+    SmoothingSpec(DAYS, 7),
+    SmoothingSpec(DAYS, 14),
+    SmoothingSpec(EWMA, 7),
+]
+
+
+def _irregular_series(seed: int, count: int) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    gaps = rng.choice([600.0, 0.5 * DAY, DAY, 3 * DAY, 12 * DAY], size=count)
+    return np.cumsum(gaps), 80.0 + rng.normal(0.0, 1.5, size=count)
+
+
+@pytest.mark.parametrize("spec", SPECS, ids=lambda spec: spec.label)
+@pytest.mark.parametrize("split", [0, 1, 5, 59])
+def test_appending_matches_a_full_recompute(spec, split):
+    times, values = _irregular_series(3, 60)
+
+    smoother = Smoother.over(times[:split], values[:split], spec)
+    for index in range(split, len(values)):
+        smoother.append(times[index : index + 1], values[index : index + 1])
+    expected_x, expected_y = smooth(times, values, spec)
+
+    assert smoother.timestamps.tolist() == expected_x.tolist()
+    assert smoother.values == pytest.approx(expected_y)
+
+
+def test_unknown_kind_is_rejected():
+    with pytest.raises(ValueError):
+        Smoother(SmoothingSpec("median", 7))
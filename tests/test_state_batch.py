@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import date, datetime, timezone
+
+import pytest
+
+pytest.importorskip("PySide6")
+
+from body_metrics_tracker.core.models import MeasurementEntry, UserProfile
+from body_metrics_tracker.gui.state import AppState
+from body_metrics_tracker.storage import LocalStore, SessionKey
+
+
+@pytest.fixture
+def state(tmp_path):
+    store = LocalStore(tmp_path / "store.bmt")
+    session = SessionKey.derive("secret", iterations=1000)
+    data = store.initialize(session, UserProfile(display_name="Test"))
+    state = AppState(store, data, session)
+    yield state
+    state.close()
+
+
+def _entry(state: AppState, day: int) -> MeasurementEntry:
+    return MeasurementEntry(
+        user_id=state.profile.user_id,
+        measured_at=datetime(2024, 1, day, 8, tzinfo=timezone.utc),
+        weight_kg=80.0 + day,
+        waist_cm=None,
+        date_local=date(2024, 1, day),
+    )
+
+
+def test_batch_commits_once(state):
+    changes = []
+    state.subscribe(changes.append)
+    with state.batch():
+        state.add_entry(_entry(state, 1))
+        state.add_entry(_entry(state, 2))
+        assert changes == []
+    assert len(changes) == 1
+    assert len(changes[0].entries_added) == 2
+
+
+def _assert_persisted(state: AppState) -> None:
+    state.flush()
+    reloaded = state.store.load(state.session)
+    assert {entry.entry_id: entry for entry in reloaded.entries} == {
+        entry.entry_id: entry for entry in state.data.entries
+    }
+    assert [profile.display_name for profile in reloaded.profiles] == [
+        profile.display_name for profile in state.data.profiles
+    ]
+
+
+def test_failed_batch_is_rolled_back(state):
+    changes = []
+    state.subscribe(changes.append)
+    kept = _entry(state, 1)
+    state.add_entry(kept)
+    with pytest.raises(RuntimeError):
+        with state.batch():
+            state.add_entry(_entry(state, 2))
+            state.update_entry(replace(kept, weight_kg=60.0))
+            profile = state.profile
+            profile.display_name = "Renamed"
+            state.update_profile(profile)
+            raise RuntimeError("boom")
+
+    assert [entry.entry_id for entry in state.entries] == [kept.entry_id]
+    assert state.entries[0].weight_kg == kept.weight_kg
+    assert state.profile.display_name == "Test"
+    assert len(changes) == 1
+    _assert_persisted(state)
+    assert state.store.journal.count == 1
+
+
+def test_failed_inner_batch_keeps_the_outer_batch(state):
+    changes = []
+    state.subscribe(changes.append)
+    with state.batch():
+        state.add_entry(_entry(state, 1))
+        try:
+            with state.batch():
+                state.add_entry(_entry(state, 2))
+                state.add_entry(_entry(state, 3))
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+        state.add_entry(_entry(state, 4))
+
+    assert [entry.weight_kg for entry in state.entries] == [81.0, 84.0]
+    assert len(changes) == 1
+    assert len(changes[0].entries_added) == 2
+    _assert_persisted(state)
+    assert state.store.journal.count == 2
+
+
+def test_inbox_tick_only_is_not_journaled(state):
+    profile = state.profile
+    profile.relay_last_checked_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    state.update_profile(profile)
+    state.flush()
+    assert state.store.journal.count == 0
+
+    profile.display_name = "Renamed"
+    state.update_profile(profile)
+    state.flush()
+    assert state.store.journal.count == 1
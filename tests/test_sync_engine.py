@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+from body_metrics_tracker.core.models import UserProfile
+from body_metrics_tracker.core.timeline import EntryTimeline
+from body_metrics_tracker.relay.client import RelayError
+from body_metrics_tracker.sync.engine import SyncEngine
+
+
+@dataclass
+class FakeStore:
+    profile: UserProfile = field(
+        default_factory=lambda: UserProfile(relay_url="http://relay.test", relay_token="token")
+    )
+    timeline: EntryTimeline = field(default_factory=EntryTimeline)
+
+
+class FlakyTransport:
+    def __init__(self, failures: int) -> None:
+        self.failures = failures
+        self.posted: list[tuple] = []
+
+    def post_status(self, _config, *payload) -> dict:
+        self.posted.append(payload)
+        if self.failures:
+            self.failures -= 1
+            raise RelayError("relay unavailable")
+        return {"ok": True}
+
+
+def test_failed_status_is_retried_until_it_is_sent():
+    transport = FlakyTransport(failures=1)
+    engine = SyncEngine(FakeStore(), transport=transport)
+
+    failed = engine.run([engine.task("status")])
+    assert failed.errors == ["status: relay unavailable"]
+
+    retry = engine.task("status")
+    assert retry is not None
+    assert not engine.run([retry]).errors
+    assert len(transport.posted) == 2
+
+    assert engine.task("status") is None
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import pytest
+
+from body_metrics_tracker.sync.scheduler import SyncPolicy, SyncScheduler
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def scheduler(clock):
+    return SyncScheduler({"inbox": SyncPolicy(10.0, 80.0), "status": SyncPolicy(30.0, 300.0)}, clock=clock, jitter=0.0)
+
+
+def _run(scheduler, name, result=None):
+    scheduler.started(name)
+    return scheduler.completed(name, result)
+
+
+def test_everything_is_due_at_start(scheduler):
+    assert scheduler.due() == ["inbox", "status"]
+    assert scheduler.next_delay() == 0.0
+
+
+def test_unchanged_results_back_off_up_to_the_cap(scheduler):
+    delays = []
+    for _ in range(6):
+        _run(scheduler, "inbox", {"invites": []})
+        delays.append(scheduler.next_delay(["inbox"]))
+
+    assert delays == [10.0, 20.0, 40.0, 80.0, 80.0, 80.0]
+
+
+def test_changed_digest_resets_the_interval(scheduler):
+    assert _run(scheduler, "inbox", {"invites": []}) is True
+    _run(scheduler, "inbox", {"invites": []})
+    _run(scheduler, "inbox", {"invites": []})
+    assert scheduler.next_delay(["inbox"]) == 40.0
+
+    assert _run(scheduler, "inbox", {"invites": ["abc"]}) is True
+    assert scheduler.next_delay(["inbox"]) == 10.0
+
+
+def test_failures_back_off_and_success_clears_them(scheduler, clock):
+    for expected in (20.0, 40.0, 80.0, 80.0):
+        scheduler.started("inbox")
+        scheduler.failed("inbox")
+        assert scheduler.next_delay(["inbox"]) == expected
+
+    clock.advance(80.0)
+    assert scheduler.due(["inbox"]) == ["inbox"]
+    _run(scheduler, "inbox", {"invites": []})
+    assert scheduler.next_delay(["inbox"]) == 10.0
+
+
+def test_in_flight_resources_are_not_due(scheduler):
+    scheduler.started("inbox")
+
+    assert scheduler.in_flight("inbox")
+    assert scheduler.due() == ["status"]
+    assert scheduler.next_delay(["inbox"]) is None
+
+
+def test_trigger_while_in_flight_reruns_once_settled(scheduler, clock):
+    _run(scheduler, "inbox", {"invites": []})
+    _run(scheduler, "inbox", {"invites": []})
+    clock.advance(20.0)
+    scheduler.started("inbox")
+
+    scheduler.trigger("inbox")
+    assert scheduler.due(["inbox"]) == []
+    scheduler.completed("inbox", {"invites": []})
+
+    assert not scheduler.in_flight("inbox")
+    assert scheduler.due(["inbox"]) == ["inbox"]
+    _run(scheduler, "inbox", {"invites": []})
+    assert scheduler.next_delay(["inbox"]) == 20.0
+
+
+def test_trigger_makes_an_idle_resource_due_now(scheduler, clock):
+    for _ in range(3):
+        _run(scheduler, "status", {"ok": True})
+    assert scheduler.due(["status"]) == []
+
+    scheduler.trigger("status")
+
+    assert scheduler.due(["status"]) == ["status"]
+
+
+def test_pause_and_resume(scheduler, clock):
+    scheduler.pause()
+    assert scheduler.due() == []
+    assert scheduler.next_delay() is None
+
+    clock.advance(500.0)
+    scheduler.resume()
+    assert scheduler.due() == ["inbox", "status"]